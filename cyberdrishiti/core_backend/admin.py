@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PhishingDomain, DetectionLog, ContentAnalysis, DomainBehaviorAnalysis, SSLAnalysis, UICloneAnalysis
+from .models import PhishingDomain, DetectionLog, ContentAnalysis, DomainBehaviorAnalysis, SSLAnalysis, UICloneAnalysis, DomainRegistration, ReferenceBrand
 
 @admin.register(PhishingDomain)
 class PhishingDomainAdmin(admin.ModelAdmin):
@@ -33,3 +33,23 @@ class UICloneAnalysisAdmin(admin.ModelAdmin):
     list_display = ('domain', 'similar_to', 'similarity_score')
     list_filter = ('similar_to',)
     search_fields = ('domain__url', 'similar_to')
+
+@admin.register(DomainRegistration)
+class DomainRegistrationAdmin(admin.ModelAdmin):
+    list_display = ('domain', 'creation_date', 'registrar', 'source', 'imported_at')
+    list_filter = ('source',)
+    search_fields = ('domain',)
+
+@admin.register(ReferenceBrand)
+class ReferenceBrandAdmin(admin.ModelAdmin):
+    list_display = ('name', 'domain', 'active', 'refreshed_at', 'phash', 'refresh_error')
+    list_filter = ('active',)
+    search_fields = ('name', 'domain')
+    readonly_fields = ('screenshot_path', 'phash', 'refreshed_at', 'refresh_error')
+    actions = ('refresh_screenshots',)
+
+    @admin.action(description="Refresh screenshots and features")
+    def refresh_screenshots(self, request, queryset):
+        from .tasks import refresh_reference_brands_task
+        refresh_reference_brands_task.delay(force=True, brand_ids=list(queryset.values_list('pk', flat=True)))
+        self.message_user(request, f"Queued a refresh of {queryset.count()} reference brands.")
@@ -0,0 +1,102 @@
+"""Content-stage HTML parsing: BeautifulSoup traversals vs. the single-pass extractor.
+
+Builds synthetic phishing-kit pages (inlined scripts and styles, repeated
+login forms, hidden inputs, iframes) of increasing size and times the
+feature extraction of PhishingContentAnalyzer.analyze_content. The soup
+baseline needs beautifulsoup4 and is skipped when it is not installed.
+
+Run from the `cyberdrishiti` directory:
+
+    python -m core_backend.benchmarks.bench_html_features [--sizes-mb 0.1,1,5]
+"""
+import argparse
+import random
+import re
+import time
+
+from core_backend.ml_models.html_features import extract_features
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+KEYWORDS = ['login', 'verify', 'account',
+            'password', 'banking', 'secure', 'update', 'confirm']
+
+_FILLER = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do '
+           'eiusmod tempor incididunt ut labore et dolore magna aliqua ').split()
+
+
+def synthetic_page(size_bytes, seed=7):
+    rng = random.Random(seed)
+    parts = ['<!DOCTYPE html><html><head><title>Sign in</title>',
+             '<style>' + 'body{margin:0;padding:0}' * 200 + '</style></head><body>']
+    length = sum(map(len, parts))
+    while length < size_bytes:
+        block = rng.choice((
+            lambda: '<p>' + ' '.join(rng.choice(_FILLER) for _ in range(40)) + '</p>',
+            lambda: ('<form action="/auth"><input type="hidden" name="t" value="%d">'
+                     '<input type="text" name="user"><input type="password" name="pw">'
+                     '<button>Verify account</button></form>' % rng.randrange(10**6)),
+            lambda: '<script>var login = "' + 'x' * 400 + '";</script>',
+            lambda: '<script src="https://cdn.example/kit%d.js"></script>' % rng.randrange(99),
+            lambda: '<div class="row"><span>Secure banking update</span><iframe src="/f"></iframe></div>',
+        ))()
+        parts.append(block)
+        length += len(block)
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def soup_features(html, keywords=KEYWORDS):
+    """The BeautifulSoup pass analyze_content used before the extractor."""
+    soup = BeautifulSoup(html, 'html.parser')
+    forms = soup.find_all('form')
+    hidden_inputs = soup.find_all('input', {'type': 'hidden'})
+    scripts = soup.find_all('script', {'src': re.compile(r'^https?://')})
+    iframes = soup.find_all('iframe')
+    forms_with_inputs = sum(1 for form in forms if form.find_all(['input', 'password']))
+    text = soup.get_text().lower()
+    found = frozenset(k for k in keywords if re.search(rf'\b{k}\b', text))
+    return (len(hidden_inputs), len(scripts), len(iframes), forms_with_inputs, found)
+
+
+def extractor_features(html, keywords=KEYWORDS):
+    features = extract_features(html, keywords)
+    return (features.hidden_inputs, features.external_scripts, features.iframes,
+            features.forms_with_inputs, features.keywords)
+
+
+def _best_of(func, html, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(html)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes-mb', default='0.1,1,5',
+                        help="comma-separated page sizes in megabytes")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if BeautifulSoup is None:
+        print("beautifulsoup4 not installed: timing the extractor only")
+
+    for size_mb in (float(size) for size in args.sizes_mb.split(',')):
+        html = synthetic_page(int(size_mb * 1024 * 1024))
+        new_time, new_result = _best_of(extractor_features, html, args.repeat)
+        line = f"{len(html) / 1e6:>6.1f} MB  extractor {new_time * 1e3:>9.1f} ms"
+        if BeautifulSoup is not None:
+            old_time, old_result = _best_of(soup_features, html, args.repeat)
+            line += (f"  soup {old_time * 1e3:>9.1f} ms  speedup {old_time / new_time:>5.1f}x"
+                     f"  {'same features' if old_result == new_result else 'FEATURES DIFFER'}")
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""Throughput, latency and memory of the lexical detectors in Auto_Phish_detect.
+
+Builds deterministic synthetic corpora (benign hosts mixed with known
+typosquats, homoglyphs, subdomain spoofs, combo-squats and TLD swaps of the
+trusted list) and times the detectors over them. Everything is generated
+locally, so the suite runs offline. Each corpus size runs in a fresh process
+so peak RSS is per size.
+
+Run from the `cyberdrishiti` directory:
+
+    python -m core_backend.benchmarks.bench_lexical [--sizes 10000,100000,1000000]
+    python -m core_backend.benchmarks.bench_lexical --save-baseline
+    python -m core_backend.benchmarks.bench_lexical --fail-on-regression
+
+Results are compared against benchmarks/baselines/lexical.json when it
+exists. Throughput is only comparable on the machine that recorded it, so
+no baseline is committed: record one with --save-baseline on the machine
+that runs --fail-on-regression (e.g. from the main branch before a change).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from core_backend.ml_models.Auto_Phish_detect import (
+    HOMOGLYPH_MAP, SUSPICIOUS_TLDS, TRUSTED_DOMAINS, analyze_domain,
+    detect_subdomain_spoofing, generate_homoglyph_domains,
+    generate_typosquatting_domains, get_trusted_index)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'baselines', 'lexical.json')
+
+KINDS = ('benign', 'typosquat', 'homoglyph', 'subdomain', 'combo', 'tld')
+# Share of each kind in the corpus; benign hosts dominate real feeds.
+WEIGHTS = (70, 8, 8, 5, 5, 4)
+
+_LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+_BENIGN_TLDS = ('com', 'net', 'org', 'io', 'de', 'co.uk', 'com.au', 'in')
+_COMBO_WORDS = ('login', 'secure', 'verify', 'account', 'support', 'update')
+
+
+def _trusted():
+    return list(dict.fromkeys(TRUSTED_DOMAINS))
+
+
+def generate_corpus(size, seed=1337):
+    """Yields (domain, kind) pairs; the kind is the squat planted, if any."""
+    rng = random.Random(seed)
+    trusted = _trusted()
+    brands = [t.split('.')[0] for t in trusted if len(t.split('.')[0]) >= 4]
+    for _ in range(size):
+        kind = rng.choices(KINDS, WEIGHTS)[0]
+        target = rng.choice(trusted)
+        if kind == 'benign':
+            name = ''.join(rng.choice(_LETTERS) for _ in range(rng.randint(6, 14)))
+            domain = f"{name}.{rng.choice(_BENIGN_TLDS)}"
+        elif kind == 'typosquat':
+            domain = rng.choice(sorted(generate_typosquatting_domains(target)))
+        elif kind == 'homoglyph':
+            variants = sorted(generate_homoglyph_domains(target, HOMOGLYPH_MAP) - {target})
+            domain = rng.choice(variants) if variants else target
+        elif kind == 'subdomain':
+            name = ''.join(rng.choice(_LETTERS) for _ in range(8))
+            domain = f"{target}.{name}.{rng.choice(SUSPICIOUS_TLDS)}"
+        elif kind == 'combo':
+            domain = (f"{rng.choice(brands)}-{rng.choice(_COMBO_WORDS)}"
+                      f".{rng.choice(SUSPICIOUS_TLDS)}")
+        else:
+            domain = f"{target.split('.')[0]}.{rng.choice(SUSPICIOUS_TLDS)}"
+        yield domain, kind
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def _time_calls(func, inputs):
+    """Calls func on each input; returns throughput and latency stats."""
+    latencies = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for item in inputs:
+        t0 = clock()
+        func(item)
+        latencies.append(clock() - t0)
+    elapsed = (clock() - start) / 1e9
+    latencies.sort()
+    return {"calls": len(latencies),
+            "per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            "p50_us": round(_percentile(latencies, 0.50) / 1e3, 2),
+            "p99_us": round(_percentile(latencies, 0.99) / 1e3, 2)}
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_size(size, seed=1337):
+    """Runs every benchmark over a corpus of `size` domains."""
+    trusted = _trusted()
+    corpus = list(generate_corpus(size, seed))
+    domains = [domain for domain, _ in corpus]
+    results = {"size": size}
+
+    start = time.perf_counter()
+    index = get_trusted_index(TRUSTED_DOMAINS)
+    results["index_build_s"] = round(time.perf_counter() - start, 3)
+
+    # The generators work per trusted domain, not per corpus entry.
+    rounds = max(1, min(size // 1000, 20))
+    results["generate_typosquatting_domains"] = _time_calls(
+        generate_typosquatting_domains, trusted * rounds)
+    results["generate_homoglyph_domains"] = _time_calls(
+        lambda domain: generate_homoglyph_domains(domain, HOMOGLYPH_MAP), trusted * rounds)
+
+    results["detect_subdomain_spoofing"] = _time_calls(
+        lambda domain: detect_subdomain_spoofing(domain, index.trusted_set, index.brands),
+        domains)
+
+    reports = []
+    results["analyze_domain"] = _time_calls(
+        lambda domain: reports.append(
+            analyze_domain(domain, index.trusted_domains, index=index)["is_suspicious"]),
+        domains)
+
+    # Detection rates against the planted labels.
+    detection = {}
+    for kind in KINDS:
+        flags = [flag for flag, (_, planted) in zip(reports, corpus) if planted == kind]
+        if flags:
+            detection[kind] = round(sum(flags) / len(flags), 4)
+    results["flagged_rate"] = detection
+    results["peak_rss_mb"] = _peak_rss_mb()
+    return results
+
+
+def compare(current, baseline, threshold):
+    """Prints throughput changes; returns the list of regressions."""
+    regressions = []
+    previous = {entry["size"]: entry for entry in baseline.get("results", [])}
+    for entry in current["results"]:
+        old = previous.get(entry["size"])
+        if old is None:
+            continue
+        for name, stats in entry.items():
+            if not isinstance(stats, dict) or "per_sec" not in stats or name not in old:
+                continue
+            change = stats["per_sec"] / old[name]["per_sec"] - 1 if old[name]["per_sec"] else 0.0
+            marker = ''
+            if change < -threshold:
+                marker = '  REGRESSION'
+                regressions.append((entry["size"], name, change))
+            print(f"  {entry['size']:>8} {name:<32} {change:+7.1%}{marker}")
+        rss_change = entry["peak_rss_mb"] - old.get("peak_rss_mb", entry["peak_rss_mb"])
+        print(f"  {entry['size']:>8} {'peak RSS':<32} {rss_change:+7.1f} MB")
+    return regressions
+
+
+def _print_results(entry):
+    print(f"\n== {entry['size']} domains (index build {entry['index_build_s']} s, "
+          f"peak RSS {entry['peak_rss_mb']} MB)")
+    for name, stats in entry.items():
+        if isinstance(stats, dict) and "per_sec" in stats:
+            print(f"  {name:<32} {stats['per_sec']:>12,.0f}/s  "
+                  f"p50 {stats['p50_us']:>9.2f} us  p99 {stats['p99_us']:>9.2f} us")
+    print("  flagged: " + ', '.join(f"{kind} {rate:.1%}"
+                                   for kind, rate in entry["flagged_rate"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help="comma-separated corpus sizes")
+    parser.add_argument('--seed', type=int, default=1337)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="overwrite the baseline with this run")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="throughput drop counted as a regression (default 20%%)")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="exit non-zero when a regression is found")
+    args = parser.parse_args()
+
+    if args.fail_on_regression and not os.path.exists(args.baseline):
+        parser.error(f"--fail-on-regression needs a baseline recorded on this "
+                     f"machine; run with --save-baseline first ({args.baseline})")
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    current = {"python": platform.python_version(),
+               "machine": f"{platform.system()} {platform.machine()}",
+               "recorded": time.strftime('%Y-%m-%dT%H:%M:%S'),
+               "seed": args.seed,
+               "results": []}
+    for size in sizes:
+        # A fresh interpreter per size keeps peak RSS from carrying over.
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            entry = pool.submit(run_size, size, args.seed).result()
+        current["results"].append(entry)
+        _print_results(entry)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nChange vs. baseline recorded {baseline.get('recorded')} "
+              f"on {baseline.get('machine')}:")
+        if baseline.get('machine') != current['machine'] or baseline.get('python') != current['python']:
+            print(f"  warning: baseline is from {baseline.get('machine')}, Python "
+                  f"{baseline.get('python')}; changes below are not comparable")
+        regressions = compare(current, baseline, args.threshold)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+            f.write('\n')
+        print(f"\nBaseline written to {args.baseline}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Insert rate of the analysis_results persistence layer.
+
+Run from the `cyberdrishiti` directory:
+
+    python -m core_backend.benchmarks.bench_result_store [--rows N]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from core_backend.ml_models.result_store import AnalysisResultStore
+
+
+def synthetic_results(count, offset=0):
+    for i in range(offset, offset + count):
+        suspicious = i % 20 == 0
+        yield {"domain": f"domain-{i}.example",
+               "is_suspicious": suspicious,
+               "reasons": ["Typosquatting of 'example.com'"] if suspicious else []}
+
+
+def legacy_save_to_db(results, db_name):
+    """The original save_to_db: fresh connection, one INSERT per row."""
+    conn = sqlite3.connect(db_name)
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS analysis_results
+                 (id INTEGER PRIMARY KEY,
+                  domain TEXT,
+                  is_suspicious BOOLEAN,
+                  reasons TEXT,
+                  timestamp TEXT)''')
+    for result in results:
+        c.execute('''INSERT INTO analysis_results
+                     (domain, is_suspicious, reasons, timestamp)
+                     VALUES (?, ?, ?, ?)''',
+                  (result["domain"],
+                   result["is_suspicious"],
+                   ', '.join(result["reasons"]),
+                   datetime.now().isoformat()))
+    conn.commit()
+    conn.close()
+
+
+def _report(label, rows, elapsed):
+    print(f"{label:<40} {rows:>9} rows {elapsed:>8.2f} s {rows / elapsed:>12,.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--legacy-rows', type=int, default=100_000,
+                        help="rows for the legacy per-row baseline")
+    parser.add_argument('--legacy-batch', type=int, default=1000,
+                        help="rows per legacy save_to_db call (one call per scanned batch)")
+    parser.add_argument('--dir', default=None,
+                        help="directory for the databases (default: system temp); "
+                             "use a real disk to include fsync costs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        db = os.path.join(tmp, "legacy.db")
+        start = time.perf_counter()
+        for offset in range(0, args.legacy_rows, args.legacy_batch):
+            legacy_save_to_db(synthetic_results(args.legacy_batch, offset), db)
+        _report("legacy save_to_db", args.legacy_rows, time.perf_counter() - start)
+
+        conn = sqlite3.connect(db)
+        start = time.perf_counter()
+        for i in range(0, args.legacy_rows, max(args.legacy_rows // 100, 1)):
+            conn.execute("SELECT * FROM analysis_results WHERE domain = ?",
+                         (f"domain-{i}.example",)).fetchall()
+        legacy_lookup = (time.perf_counter() - start) / len(
+            range(0, args.legacy_rows, max(args.legacy_rows // 100, 1)))
+        conn.close()
+
+        db = os.path.join(tmp, "append.db")
+        start = time.perf_counter()
+        with AnalysisResultStore(db) as store:
+            store.add_many(synthetic_results(args.rows))
+        _report("store, append", args.rows, time.perf_counter() - start)
+
+        db = os.path.join(tmp, "upsert.db")
+        start = time.perf_counter()
+        with AnalysisResultStore(db, upsert=True) as store:
+            store.add_many(synthetic_results(args.rows))
+        _report("store, upsert (fresh rows)", args.rows, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with AnalysisResultStore(db, upsert=True) as store:
+            store.add_many(synthetic_results(args.rows))
+        _report("store, upsert (re-scan, all conflicts)", args.rows, time.perf_counter() - start)
+
+        with AnalysisResultStore(db, upsert=True) as store:
+            count = store.conn.execute("SELECT COUNT(*) FROM analysis_results").fetchone()[0]
+            start = time.perf_counter()
+            for i in range(0, args.rows, max(args.rows // 10000, 1)):
+                store.get(f"domain-{i}.example")
+            lookups = len(range(0, args.rows, max(args.rows // 10000, 1)))
+            elapsed = time.perf_counter() - start
+        print(f"\nrows after re-scan: {count}")
+        print(f"domain lookup: legacy full scan ({args.legacy_rows} rows) "
+              f"{legacy_lookup * 1e6:.1f} us, indexed ({args.rows} rows) "
+              f"{elapsed / lookups * 1e6:.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Typosquat lookup: variant enumeration vs. the symmetric-deletion index.
+
+Run from the `cyberdrishiti` directory:
+
+    python -m core_backend.benchmarks.bench_typosquat_index [--queries N]
+"""
+import argparse
+import random
+import time
+
+from core_backend.ml_models.Auto_Phish_detect import (
+    TRUSTED_DOMAINS, TYPO_CHARS, generate_typosquatting_domains)
+from core_backend.ml_models.typosquat_index import DeletionIndex
+
+
+def _mutate(domain, rng, edits):
+    for _ in range(edits):
+        i = rng.randrange(len(domain))
+        op = rng.choice('isdt')
+        if op == 'i':
+            domain = domain[:i] + rng.choice(TYPO_CHARS) + domain[i:]
+        elif op == 's':
+            domain = domain[:i] + rng.choice(TYPO_CHARS) + domain[i + 1:]
+        elif op == 'd' and len(domain) > 1:
+            domain = domain[:i] + domain[i + 1:]
+        elif op == 't' and i < len(domain) - 1:
+            domain = domain[:i] + domain[i + 1] + domain[i] + domain[i + 2:]
+    return domain
+
+
+def build_queries(trusted, count, seed=1337):
+    rng = random.Random(seed)
+    return [_mutate(rng.choice(trusted), rng, rng.choice((0, 1, 1, 2)))
+            for _ in range(count)]
+
+
+def enumeration_lookup(domain, trusted):
+    """What analyze_domain did before the index existed (distance 1 only)."""
+    return [t for t in trusted if domain in generate_typosquatting_domains(t)]
+
+
+def _time(label, func, queries):
+    start = time.perf_counter()
+    for query in queries:
+        func(query)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed / len(queries) * 1e6:>12.1f} us/query")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--enumeration-queries', type=int, default=20,
+                        help="the enumeration baseline is slow; sample fewer")
+    args = parser.parse_args()
+
+    trusted = list(dict.fromkeys(TRUSTED_DOMAINS))
+    queries = build_queries(trusted, args.queries)
+    print(f"{len(trusted)} trusted domains, {len(queries)} queries\n")
+
+    start = time.perf_counter()
+    index = DeletionIndex(trusted, max_distance=2)
+    print(f"{'index build (k<=2)':<34} {(time.perf_counter() - start) * 1e3:>12.1f} ms"
+          f"  ({len(index)} deletion keys)")
+
+    start = time.perf_counter()
+    variants = {}
+    for t in trusted:
+        for variant in generate_typosquatting_domains(t):
+            variants.setdefault(variant, t)
+    print(f"{'precomputed variant map (k=1)':<34} {(time.perf_counter() - start) * 1e3:>12.1f} ms"
+          f"  ({len(variants)} variants)\n")
+
+    baseline = _time("enumeration per query (k=1)",
+                     lambda q: enumeration_lookup(q, trusted),
+                     queries[:args.enumeration_queries])
+    baseline /= min(args.enumeration_queries, len(queries))
+    k1 = _time("deletion index (k=1)", lambda q: index.search(q, 1), queries)
+    k2 = _time("deletion index (k=2)", lambda q: index.search(q, 2), queries)
+    _time("precomputed variant map (k=1)", variants.get, queries)
+
+    print(f"\nspeedup vs enumeration: k=1 {baseline / (k1 / len(queries)):.0f}x, "
+          f"k=2 {baseline / (k2 / len(queries)):.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import csv
+import gzip
+import io
+import json
+import sys
+from datetime import timezone as dt_timezone
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core_backend.models import DomainRegistration
+from core_backend.services.whois_service import WhoisService, parse_creation_date
+
+# Column names accepted for each field, first match wins.
+DOMAIN_FIELDS = ('domain', 'domain_name', 'name', 'fqdn')
+DATE_FIELDS = ('creation_date', 'created', 'created_at', 'registration_date',
+               'registered', 'create_date')
+REGISTRAR_FIELDS = ('registrar', 'registrar_name', 'sponsoring_registrar')
+
+
+class Command(BaseCommand):
+    help = ("Bulk-load domain registration dates from CSV or JSONL dumps (optionally "
+            "gzipped) into DomainRegistration, which WHOIS lookups consult first. "
+            "Rows are upserted, so daily delta files can be imported on top.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="Dump files; '-' reads stdin")
+        parser.add_argument('--format', choices=('auto', 'csv', 'jsonl'), default='auto',
+                            help="Input format; 'auto' goes by file extension")
+        parser.add_argument('--source', default='',
+                            help="Label stored with each row, e.g. 'com-zone-2025-03-12'")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--delimiter', default=',', help="CSV delimiter")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+        total = 0
+        self.skipped = 0
+        for path in options['paths']:
+            rows = self._read(path, options['format'], options['delimiter'])
+            records = self._records(rows, options['source'])
+            file_total = 0
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+                self._upsert(batch)
+                file_total += len(batch)
+                self.stdout.write(f"{path}: {file_total} rows imported", ending='\r')
+            total += file_total
+            self.stdout.write(f"{path}: {file_total} rows imported")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {total} registrations, skipped {self.skipped} rows without "
+            f"a domain or a readable creation date"))
+
+    def _read(self, path, fmt, delimiter):
+        """Yields one dict per input row without loading the file."""
+        if fmt == 'auto':
+            name = path[:-3] if path.endswith('.gz') else path
+            fmt = 'jsonl' if name.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+        try:
+            if path == '-':
+                stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+            elif path.endswith('.gz'):
+                stream = gzip.open(path, 'rt', encoding='utf-8', newline='')
+            else:
+                stream = open(path, encoding='utf-8', newline='')
+        except OSError as e:
+            raise CommandError(f"Cannot open {path}: {e}")
+
+        with stream:
+            if fmt == 'csv':
+                yield from csv.DictReader(stream, delimiter=delimiter)
+                return
+            for line_number, line in enumerate(stream, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    self.stderr.write(f"{path}:{line_number}: skipped, {e}")
+
+    def _records(self, rows, source):
+        """Turns rows into model instances, normalizing domains and dates.
+
+        Rows without a readable date are skipped rather than stored empty,
+        so a sparse delta never erases a date an earlier dump provided.
+        """
+        imported_at = timezone.now()
+        fields = None
+        for row in rows:
+            if fields is None:
+                fields = [self._pick(row, names) for names in
+                          (DOMAIN_FIELDS, DATE_FIELDS, REGISTRAR_FIELDS)]
+                if fields[0] is None:
+                    raise CommandError(f"No domain column, expected one of {DOMAIN_FIELDS}")
+            domain_field, date_field, registrar_field = fields
+            domain = WhoisService.normalize(str(row.get(domain_field) or ''))
+            creation_date = parse_creation_date(row.get(date_field)) if date_field else None
+            if not domain or creation_date is None:
+                self.skipped += 1
+                continue
+            creation_date = creation_date.replace(tzinfo=dt_timezone.utc)
+            registrar = (str(row.get(registrar_field) or '') if registrar_field else '')[:255]
+            yield DomainRegistration(domain=domain, creation_date=creation_date,
+                                     registrar=registrar, source=source[:100],
+                                     imported_at=imported_at)
+
+    @staticmethod
+    def _pick(row, names):
+        columns = {key.strip().lower(): key for key in row if key}
+        return next((columns[name] for name in names if name in columns), None)
+
+    @staticmethod
+    def _upsert(batch):
+        # One statement per batch; a domain repeated within it keeps its
+        # last row, since an upsert cannot touch the same row twice.
+        unique = list({record.domain: record for record in batch}.values())
+        with transaction.atomic():
+            DomainRegistration.objects.bulk_create(
+                unique, batch_size=len(unique), update_conflicts=True,
+                unique_fields=['domain'],
+                update_fields=['creation_date', 'registrar', 'source', 'imported_at'])
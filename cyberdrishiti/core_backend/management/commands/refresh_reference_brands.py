@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core_backend.services.reference_brands import refresh_brands
+
+
+class Command(BaseCommand):
+    help = ("Screenshot the active reference brands and store their comparison features; "
+            "only brands older than REFERENCE_BRANDS['REFRESH_INTERVAL'] unless --force.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help="Refresh every active brand regardless of age")
+
+    def handle(self, *args, **options):
+        stats = refresh_brands(force=options['force'])
+        style = self.style.SUCCESS if not stats['failed'] else self.style.WARNING
+        self.stdout.write(style(
+            f"Refreshed {stats['refreshed']} reference brands, {stats['failed']} failed"))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core_backend.ml_models.tls_scanner import TLSScanner, read_hosts
+from core_backend.services.ssl_results import iter_store
+
+
+class Command(BaseCommand):
+    help = ("Scan the TLS certificates of many hosts concurrently and upsert the "
+            "analyze_certificate() results into SSLAnalysisResult.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('inputs', nargs='*', default=['-'],
+                            help="Files with one host or URL per line; '-' reads stdin")
+        parser.add_argument('--concurrency', type=int, default=500)
+        parser.add_argument('--timeout', type=float, default=5.0,
+                            help="Seconds allowed per handshake")
+        parser.add_argument('--deadline', type=float, default=300.0,
+                            help="Seconds allowed for the whole scan")
+        parser.add_argument('--tls-check', action='store_true',
+                            help="Only accept TLS 1.2 and 1.3")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        scanner = TLSScanner(options['concurrency'], options['timeout'],
+                             options['deadline'], options['tls_check'])
+        start = time.perf_counter()
+        scanned = failed = 0
+        for _, result in iter_store(scanner.scan(read_hosts(options['inputs'])),
+                                    options['batch_size']):
+            scanned += 1
+            failed += result['error'] is not None
+            if scanned % 1000 == 0:
+                self.stdout.write(f"{scanned} hosts scanned", ending='\r')
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {scanned} hosts in {time.perf_counter() - start:.1f}s "
+            f"({failed} without a usable certificate); cache {scanner.analyzer.cache_stats()}"))
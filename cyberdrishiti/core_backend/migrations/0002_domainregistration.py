@@ -0,0 +1,23 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_backend', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DomainRegistration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('domain', models.CharField(max_length=253, unique=True)),
+                ('creation_date', models.DateTimeField(blank=True, null=True)),
+                ('registrar', models.CharField(blank=True, default='', max_length=255)),
+                ('source', models.CharField(blank=True, default='', max_length=100)),
+                ('imported_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
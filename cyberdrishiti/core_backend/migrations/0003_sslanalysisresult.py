@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_backend', '0002_domainregistration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SSLAnalysisResult',
+            fields=[
+                ('url', models.TextField(primary_key=True, serialize=False)),
+                ('timestamp', models.DateTimeField()),
+                ('certificate_valid', models.BooleanField()),
+                ('hostname_match', models.BooleanField()),
+                ('tls_valid', models.BooleanField()),
+                ('validation_score', models.FloatField()),
+                ('error', models.TextField(blank=True, null=True)),
+                ('cert_details_json', models.TextField()),
+            ],
+        ),
+    ]
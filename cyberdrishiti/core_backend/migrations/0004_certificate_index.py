@@ -0,0 +1,53 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_backend', '0003_sslanalysisresult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificateRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=64, unique=True)),
+                ('serial_number', models.CharField(blank=True, default='', max_length=100)),
+                ('issuer', models.CharField(blank=True, default='', max_length=255)),
+                ('not_after', models.DateTimeField(blank=True, null=True)),
+                ('san_count', models.IntegerField(default=0)),
+                ('first_seen', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CertificateSAN',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=253)),
+                ('certificate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sans', to='core_backend.certificaterecord')),
+            ],
+            options={
+                'unique_together': {('certificate', 'name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DomainCertificate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seen_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('certificate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core_backend.certificaterecord')),
+                ('domain', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core_backend.phishingdomain')),
+            ],
+            options={
+                'unique_together': {('domain', 'certificate')},
+            },
+        ),
+        migrations.AddField(
+            model_name='certificaterecord',
+            name='domains',
+            field=models.ManyToManyField(related_name='certificates', through='core_backend.DomainCertificate', to='core_backend.phishingdomain'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations, models
+
+# The sites the UI stage used to screenshot on every analysis.
+INITIAL_BRANDS = [
+    ('Google', 'google.com'),
+    ('Facebook', 'facebook.com'),
+    ('Apple', 'apple.com'),
+    ('Amazon', 'amazon.com'),
+    ('Microsoft', 'microsoft.com'),
+]
+
+
+def add_initial_brands(apps, schema_editor):
+    ReferenceBrand = apps.get_model('core_backend', 'ReferenceBrand')
+    for name, domain in INITIAL_BRANDS:
+        ReferenceBrand.objects.get_or_create(
+            domain=domain, defaults={'name': name, 'url': f"https://{domain}"})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_backend', '0004_certificate_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceBrand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('domain', models.CharField(max_length=253, unique=True)),
+                ('url', models.URLField(max_length=255)),
+                ('active', models.BooleanField(default=True)),
+                ('screenshot_path', models.CharField(blank=True, default='', max_length=255)),
+                ('features', models.BinaryField(blank=True, editable=False, null=True)),
+                ('phash', models.CharField(blank=True, default='', max_length=16)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('refresh_error', models.TextField(blank=True, default='')),
+            ],
+        ),
+        migrations.RunPython(add_initial_brands, migrations.RunPython.noop),
+    ]
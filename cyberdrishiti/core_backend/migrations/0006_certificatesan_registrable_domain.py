@@ -0,0 +1,92 @@
+import os
+
+from django.db import migrations, models
+
+PSL_PATH = os.environ.get(
+    'PUBLIC_SUFFIX_LIST',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 'ml_models', 'data', 'public_suffix_list.dat'))
+
+
+# Frozen copy of cert_index.linkable_domain as of this migration, so later
+# changes to the live code do not alter what the backfill writes.
+
+def load_suffix_rules(path):
+    """(all rules, private-section rules) of a Public Suffix List file."""
+    rules, private = set(), set()
+    in_private = False
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('// ===BEGIN PRIVATE DOMAINS==='):
+                in_private = True
+            if not line or line.startswith('//'):
+                continue
+            rule = line.split()[0].lower()
+            forms = {rule}
+            try:
+                ascii_rule = rule.lstrip('!').encode('idna').decode('ascii')
+                forms.add(('!' if rule.startswith('!') else '') + ascii_rule)
+            except UnicodeError:
+                pass
+            rules.update(forms)
+            if in_private:
+                private.update(form.lstrip('!') for form in forms)
+    return rules, private
+
+
+def linkable_domain(name, rules, private):
+    name = name.lower().rstrip('.')
+    if name.startswith('*.'):
+        name = name[2:]
+    if not name:
+        return None
+    labels = name.split('.')
+    if ':' in name or labels[-1].isdigit():
+        return name  # IP literal
+    suffix_length = 1  # implicit "*" rule
+    for i in range(len(labels)):
+        candidate = '.'.join(labels[i:])
+        if '!' + candidate in rules:
+            suffix_length = len(labels) - i - 1
+            break
+        if candidate in rules or (i + 1 < len(labels)
+                                  and '*.' + '.'.join(labels[i + 1:]) in rules):
+            suffix_length = len(labels) - i
+            break
+    suffix = '.'.join(labels[len(labels) - suffix_length:])
+    parent = suffix.partition('.')[2]
+    if suffix in private or (parent and '*.' + parent in private):
+        return None
+    if suffix_length >= len(labels):
+        return None
+    return '.'.join(labels[-suffix_length - 1:])
+
+
+def fill_registrable_domains(apps, schema_editor):
+    CertificateSAN = apps.get_model('core_backend', 'CertificateSAN')
+    rules, private = load_suffix_rules(PSL_PATH)
+    batch = []
+    for san in CertificateSAN.objects.only('pk', 'name').iterator():
+        san.registrable_domain = (linkable_domain(san.name, rules, private) or '')[:253]
+        batch.append(san)
+        if len(batch) >= 1000:
+            CertificateSAN.objects.bulk_update(batch, ['registrable_domain'])
+            batch = []
+    CertificateSAN.objects.bulk_update(batch, ['registrable_domain'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_backend', '0005_referencebrand'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificatesan',
+            name='registrable_domain',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=253),
+        ),
+        migrations.RunPython(fill_registrable_domains, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_backend', '0007_referencebrand_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentanalysis',
+            name='suspicious_elements_partial',
+            field=models.BooleanField(default=False),
+        ),
+    ]
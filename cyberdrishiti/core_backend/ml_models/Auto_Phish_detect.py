@@ -1,8 +1,30 @@
+import argparse
+import json
+import os
 import re
-import sqlite3
-from itertools import product
-from datetime import datetime
-from typing import Set, List, Dict, Optional
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice, product
+from typing import Set, List, Dict, Collection, Iterable, Iterator, Optional, Tuple
+
+try:
+    from .brand_matcher import BrandMatcher
+    from .confusables import build_confusable_map, normalize_domain, skeleton
+    from .known_bad_store import KnownBadDomainStore, load_known_bad_store
+    from .public_suffix import split_host
+    from .result_store import AnalysisResultStore
+    from .squat_variants import VariantStore
+    from .typosquat_index import DeletionIndex
+except ImportError:  # executed as a standalone script
+    from brand_matcher import BrandMatcher
+    from confusables import build_confusable_map, normalize_domain, skeleton
+    from known_bad_store import KnownBadDomainStore, load_known_bad_store
+    from public_suffix import split_host
+    from result_store import AnalysisResultStore
+    from squat_variants import VariantStore
+    from typosquat_index import DeletionIndex
 
 # Constants
 HOMOGLYPH_MAP = {
@@ -36,15 +58,369 @@ HOMOGLYPH_MAP = {
     '0': ['o', 'O', 'Ο', 'О'],
 }
 
+# Characters an attacker can insert or substitute in a typosquat
+TYPO_CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789-'
+
 SUSPICIOUS_TLDS = ['ru', 'top', 'biz', 'cc',
                    'xyz', 'tk', 'ml', 'ga', 'cf', 'gq']
 
+# Report wording for the precomputed squatting techniques (squat_variants)
+VARIANT_REASONS = {
+    "keyboard": "Keyboard-adjacent typo of '{}'",
+    "bitsquat": "Bitsquatting of '{}'",
+    "vowel-swap": "Vowel swap of '{}'",
+    "repetition": "Character repetition of '{}'",
+    "hyphenation": "Hyphenated variant of '{}'",
+    "tld-swap": "TLD swap of '{}'",
+}
+
+# Prebuilt stores for the Django workers (lexical_analysis), overridable
+# through the LEXICAL_DETECTION dict in Django settings.
+DEFAULTS = {
+    'VARIANT_STORE': None,    # squat_variants.py build output; generated in memory if unset
+    'KNOWN_BAD_STORE': None,  # known_bad_store.py build output; no blocklist check if unset
+}
+
+# Internal trusted domains remain hardcoded
+TRUSTED_DOMAINS = [
+    "google.com",
+    "microsoft.com",
+    "amazon.com",
+    "apple.com",
+    "cloudflare.com",
+    "paypal.com",
+    "bankofamerica.com",
+    "chase.com",
+    "wellsfargo.com",
+    "citibank.com",
+    "visa.com",
+    "mastercard.com",
+    "americanexpress.com",
+    "nytimes.com",
+    "bbc.com",
+    "reuters.com",
+    "ap.org",
+    "usa.gov",
+    "gov.uk",
+    "canada.ca",
+    "europa.eu",
+    "harvard.edu",
+    "mit.edu",
+    "ox.ac.uk",
+    "cam.ac.uk",
+    "stanford.edu",
+    "ieee.org",
+    "w3.org",
+    "ietf.org",
+    "mozilla.org",
+    "github.com",
+    "gitlab.com",
+    "wikipedia.org",
+    "who.int",
+    "redcross.org",
+    "un.org",
+    "nasa.gov",
+    "weather.gov",
+    "cdc.gov",
+    "nih.gov",
+    "fbi.gov",
+    "cisa.gov",
+    "dhs.gov",
+    "sec.gov",
+    "irs.gov",
+    "justice.gov",
+    "state.gov",
+    "treasury.gov",
+    "commerce.gov",
+    "energy.gov",
+    "defense.gov",
+    "education.gov",
+    "health.gov",
+    "hhs.gov",
+    "hud.gov",
+    "doi.gov",
+    "dol.gov",
+    "dot.gov",
+    "usda.gov",
+    "va.gov",
+    "census.gov",
+    "nist.gov",
+    "nsf.gov",
+    "nps.gov",
+    "gsa.gov",
+    "sba.gov",
+    "socialsecurity.gov",
+    "uspto.gov",
+    "usps.com",
+    "fedex.com",
+    "ups.com",
+    "dhl.com",
+    "bmw.com",
+    "mercedes-benz.com",
+    "toyota.com",
+    "honda.com",
+    "ford.com",
+    "volkswagen.com",
+    "siemens.com",
+    "ge.com",
+    "ibm.com",
+    "intel.com",
+    "oracle.com",
+    "sap.com",
+    "cisco.com",
+    "adobe.com",
+    "salesforce.com",
+    "zoom.us",
+    "slack.com",
+    "reddit.com",
+    "linkedin.com",
+    "twitter.com",
+    "instagram.com",
+    "youtube.com",
+    "twitch.tv",
+    "discord.com",
+    "airbnb.com",
+    "booking.com",
+    "expedia.com",
+    "tripadvisor.com",
+    "uber.com",
+    "lyft.com",
+    "spotify.com",
+    "netflix.com",
+    "hulu.com",
+    "disneyplus.com",
+    "hbomax.com",
+    "vimeo.com",
+    "medium.com",
+    "wordpress.org",
+    "drupal.org",
+    "joomla.org",
+    "apache.org",
+    "nginx.org",
+    "python.org",
+    "java.com",
+    "php.net",
+    "ruby-lang.org",
+    "rust-lang.org",
+    "golang.org",
+    "nodejs.org",
+    "angular.io",
+    "reactjs.org",
+    "vuejs.org",
+    "docker.com",
+    "kubernetes.io",
+    "aws.amazon.com",
+    "azure.microsoft.com",
+    "cloud.google.com",
+    "digitalocean.com",
+    "linode.com",
+    "oracle.com",
+    "salesforce.com",
+    "sap.com",
+    "servicenow.com",
+    "shopify.com",
+    "squarespace.com",
+    "wix.com",
+    "mailchimp.com",
+    "constantcontact.com",
+    "eventbrite.com",
+    "meetup.com",
+    "coursera.org",
+    "edx.org",
+    "udacity.com",
+    "udemy.com",
+    "khanacademy.org",
+    "nationalgeographic.com",
+    "smithsonianmag.com",
+    "scientificamerican.com",
+    "nature.com",
+    "sciencemag.org",
+    "cnet.com",
+    "techcrunch.com",
+    "wired.com",
+    "pcmag.com",
+    "theverge.com",
+    "arsTechnica.com",
+    "engadget.com",
+    "bloomberg.com",
+    "wsj.com",
+    "ft.com",
+    "economist.com",
+    "forbes.com",
+    "fortune.com",
+    "cnbc.com",
+    "foxnews.com",
+    "msnbc.com",
+    "npr.org",
+    "pbs.org",
+    "cbc.ca",
+    "abc.net.au",
+    "aljazeera.com",
+    "dw.com",
+    "france24.com",
+    "nikkei.com",
+    "yale.edu",
+    "princeton.edu",
+    "caltech.edu",
+    "ethz.ch",
+    "ucla.edu",
+    "berkeley.edu",
+    "mcgill.ca",
+    "utoronto.ca",
+    "kyoto-u.ac.jp",
+    "tokyo.ac.jp",
+    "weforum.org",
+    "imf.org",
+    "worldbank.org",
+    "oecd.org",
+    "nato.int",
+    "interpol.int",
+    "icrc.org",
+    "amnesty.org",
+    "hrw.org",
+    "eff.org",
+    "fsf.org",
+    "opensource.org",
+    "apache.org",
+    "linuxfoundation.org",
+    "w3c.org",
+    "iso.org",
+    "ansi.org",
+    "itu.int",
+    "iec.ch",
+    "nist.gov",
+    "bsigroup.com",
+    "ul.com",
+    "ieee.org",
+    "google.com",
+    "youtube.com",
+    "facebook.com",
+    "twitter.com",
+    "linkedin.com",
+    "microsoft.com",
+    "apple.com",
+    "icloud.com",
+    "github.com",
+    "gitlab.com",
+    "bitbucket.org",
+    "stackoverflow.com",
+    "reddit.com",
+    "amazon.com",
+    "aws.amazon.com",
+    "gmail.com",
+    "yahoo.com",
+    "hotmail.com",
+    "outlook.com",
+    "bing.com",
+    "duckduckgo.com",
+    "mozilla.org",
+    "opera.com",
+    "wordpress.org",
+    "nytimes.com",
+    "bbc.co.uk",
+    "cnn.com",
+    "theguardian.com",
+    "washingtonpost.com",
+    "reuters.com",
+    "bloomberg.com",
+    "forbes.com",
+    "cnbc.com",
+    "foxnews.com",
+    "nbcnews.com",
+    "time.com",
+    "usatoday.com",
+    "thehindu.com",
+    "indiatimes.com",
+    "aljazeera.com",
+    "france24.com",
+    "wikipedia.org",
+    "harvard.edu",
+    "mit.edu",
+    "stanford.edu",
+    "ox.ac.uk",
+    "cam.ac.uk",
+    "berkeley.edu",
+    "ucla.edu",
+    "umich.edu",
+    "utoronto.ca",
+    "nus.edu.sg",
+    "purdue.edu",
+    "edx.org",
+    "coursera.org",
+    "udemy.com",
+    "khanacademy.org",
+    "usa.gov",
+    "whitehouse.gov",
+    "senate.gov",
+    "nasa.gov",
+    "nps.gov",
+    "europa.eu",
+    "gov.uk",
+    "canada.ca",
+    "india.gov.in",
+    "australia.gov.au",
+    "gov.za",
+    "gov.sg",
+    "visa.com",
+    "mastercard.com",
+    "paypal.com",
+    "stripe.com",
+    "coinbase.com",
+    "chase.com",
+    "bankofamerica.com",
+    "wellsfargo.com",
+    "hsbc.com",
+    "barclays.co.uk",
+    "ing.com",
+    "citibank.com",
+    "goldmansachs.com",
+    "americanexpress.com",
+    "icicibank.com",
+    "hdfcbank.com",
+    "ebay.com",
+    "etsy.com",
+    "alibaba.com",
+    "aliexpress.com",
+    "walmart.com",
+    "target.com",
+    "costco.com",
+    "bestbuy.com",
+    "homedepot.com",
+    "ikea.com",
+    "macys.com",
+    "dropbox.com",
+    "slack.com",
+    "zoom.us",
+    "skype.com",
+    "salesforce.com",
+    "adobe.com",
+    "cloudflare.com",
+    "spotify.com",
+    "netflix.com",
+    "hulu.com",
+    "disneyplus.com",
+    "zoom.com",
+    "airbnb.com",
+    "booking.com",
+    "tripadvisor.com",
+    "uber.com",
+    "lyft.com",
+    "tesla.com",
+    "ford.com",
+    "nike.com",
+    "adidas.com",
+    "samsung.com",
+    "lg.com",
+    "sony.com",
+    "panasonic.com",
+]
+
 
 def generate_typosquatting_domains(domain: str) -> Set[str]:
     """Generates typosquatting variations of a domain."""
     variations = set()
     n = len(domain)
-    chars = 'abcdefghijklmnopqrstuvwxyz0123456789-'
+    chars = TYPO_CHARS
 
     # Insertion
     for i in range(n + 1):
@@ -81,442 +457,475 @@ def generate_homoglyph_domains(domain: str, homoglyph_map: Dict[str, List[str]])
     return variations
 
 
-def detect_subdomain_spoofing(domain: str, trusted_domains: List[str]) -> bool:
-    """Detects subdomain spoofing attempts."""
-    parts = domain.split('.')
-    main_domain = '.'.join(parts[-2:]) if len(parts) >= 2 else domain
+def detect_subdomain_spoofing(domain: str, trusted_domains: Set[str],
+                              matcher: Optional[BrandMatcher] = None) -> bool:
+    """Detects subdomain spoofing attempts.
+
+    Flags hosts that carry a trusted domain on label or hyphen boundaries
+    in front of an untrusted registrable domain, e.g.
+    accounts.google.com.evil.tk or paypal.com-secure.example.
+    """
+    subdomain, main_domain, _ = split_host(domain)
+    main_domain = main_domain or domain.lower()
 
     # Check if main domain is trusted but different
     if main_domain in trusted_domains:
         return False  # It's the actual trusted domain
 
-    # Check subdomain parts for trusted domains
-    for part in parts[:-2]:  # Exclude main domain parts
-        if part in trusted_domains:
-            return True
-        # Check for hyphen-separated subparts
-        for subpart in part.split('-'):
-            if subpart in trusted_domains:
-                return True
-
-    return False
+    if matcher is None:
+        matcher = _cached_matcher(frozenset(trusted_domains))
+    # Any trusted domain starting left of the registrable domain is spoofed.
+    return any(match.start < len(subdomain)
+               for match in matcher.embedded_domains(domain))
+
+
+@lru_cache(maxsize=8)
+def _cached_matcher(trusted_domains: frozenset) -> BrandMatcher:
+    return BrandMatcher(sorted(trusted_domains))
+
+
+class TrustedDomainIndex:
+    """Precomputed lookup structures for the trusted domain list.
+
+    Typosquats are found through a symmetric-deletion index, which answers
+    "which trusted domains are within edit distance k" without enumerating
+    every insertion/substitution. Homoglyphs are found by mapping the
+    candidate to its confusable skeleton and looking that up among the
+    trusted domains' skeletons, which catches any number of substituted
+    characters (and punycode-encoded IDNs) in one dict lookup. The other
+    squatting techniques (bitsquats, keyboard slips, TLD swaps, ...) are
+    precomputed into a VariantStore; pass `variant_store` to share a
+    memory-mapped prebuilt one instead of building it here.
+    """
+
+    TYPOSQUAT = "typosquat"
+    HOMOGLYPH = "homoglyph"
+
+    # Edits outside this alphabet are reported by the homoglyph check.
+    _TYPO_ALPHABET = frozenset(TYPO_CHARS + '.')
+
+    def __init__(self, trusted_domains: List[str],
+                 homoglyph_map: Dict[str, List[str]] = HOMOGLYPH_MAP,
+                 max_edit_distance: int = 1,
+                 search_distance: int = 2,
+                 variant_store: Optional[VariantStore] = None):
+        # Keep list order (it decides the order of reported reasons) but
+        # drop the duplicates present in TRUSTED_DOMAINS.
+        self.trusted_domains = list(dict.fromkeys(trusted_domains))
+        self.trusted_set = frozenset(self.trusted_domains)
+        self.max_edit_distance = max_edit_distance
+        # Edit distances are measured case-insensitively.
+        self._by_lower: Dict[str, str] = {}
+        for trusted in self.trusted_domains:
+            self._by_lower.setdefault(trusted.lower(), trusted)
+        self.edit_index = DeletionIndex(
+            self._by_lower, max(search_distance, max_edit_distance))
+
+        self.brands = BrandMatcher(self.trusted_domains)
+
+        self.confusable_map = build_confusable_map(homoglyph_map)
+        # skeleton -> [(normalized trusted domain, trusted domain), ...]
+        self.skeletons: Dict[str, List[Tuple[str, str]]] = {}
+        for trusted in self.trusted_domains:
+            # Trusted names are compared by name, whatever their case.
+            normalized = normalize_domain(trusted)
+            self.skeletons.setdefault(
+                skeleton(normalized, self.confusable_map), []).append((normalized, trusted))
+
+        if variant_store is not None and set(variant_store.trusted_domains) != self.trusted_set:
+            raise ValueError("variant store was built for a different trusted domain list")
+        self.variants = variant_store or VariantStore.build(self.trusted_domains)
+
+    def skeleton(self, domain: str) -> str:
+        """Returns the confusable skeleton used for homoglyph matching."""
+        return skeleton(domain, self.confusable_map)
+
+    def near_matches(self, domain: str, max_distance: int = 2) -> List[Tuple[str, int]]:
+        """Returns (trusted_domain, distance) pairs within max_distance edits."""
+        return [(self._by_lower[trusted], distance)
+                for trusted, distance in self.edit_index.search(domain.lower(), max_distance)
+                if distance > 0]
+
+    def lookup(self, domain: str) -> List[Tuple[str, str]]:
+        """Returns the (kind, trusted_domain) pairs that `domain` imitates.
+        Pass it in its original case: the homoglyph check reads capitals."""
+        hits = []
+        if self._TYPO_ALPHABET.issuperset(domain.lower()):
+            hits.extend((self.TYPOSQUAT, trusted) for trusted, _ in
+                        self.near_matches(domain, self.max_edit_distance))
+
+        lookalikes = self.skeletons.get(self.skeleton(domain))
+        if lookalikes:
+            normalized = normalize_domain(domain)
+            hits.extend((self.HOMOGLYPH, trusted)
+                        for normalized_trusted, trusted in lookalikes
+                        if normalized_trusted != normalized)
+
+        # Precomputed techniques, for trusted domains not already matched.
+        matched = {trusted for _, trusted in hits}
+        for technique, trusted in self.variants.lookup(domain):
+            if trusted not in matched:
+                matched.add(trusted)
+                hits.append((technique, trusted))
+        return hits
+
+    def __contains__(self, domain: str) -> bool:
+        return domain in self.trusted_set
+
+    def __len__(self) -> int:
+        return len(self.skeletons) + len(self.edit_index)
+
+
+@lru_cache(maxsize=8)
+def _cached_index(trusted_domains: Tuple[str, ...],
+                  variant_store_path: Optional[str] = None) -> TrustedDomainIndex:
+    variant_store = VariantStore.open(variant_store_path) if variant_store_path else None
+    return TrustedDomainIndex(list(trusted_domains), variant_store=variant_store)
+
+
+def get_trusted_index(trusted_domains: List[str],
+                      variant_store_path: Optional[str] = None) -> TrustedDomainIndex:
+    """Returns a shared TrustedDomainIndex for the given trusted list.
+
+    `variant_store_path` names a store built with squat_variants.py for the
+    same list; it is memory-mapped instead of generating the variants,
+    which saves the build on every process start.
+    """
+    return _cached_index(tuple(trusted_domains), variant_store_path)
 
 
 def analyze_domain(
     domain: str,
     trusted_domains: List[str],
-    known_suspicious_domains: Optional[List[str]] = None
+    known_suspicious_domains: Optional[Collection[str]] = None,
+    index: Optional[TrustedDomainIndex] = None
 ) -> Dict:
-    """Analyzes a domain for phishing indicators."""
+    """Analyzes a domain for phishing indicators.
+
+    Pass a prebuilt `index` when analyzing many domains against the same
+    trusted list; otherwise a cached one is built from `trusted_domains`.
+    `known_suspicious_domains` may be any container; large blocklists
+    should be a KnownBadDomainStore rather than a list. The report keeps
+    `domain` as given; the checks see it without the root's trailing dot
+    and, past the homoglyph check (where a capital I can pose as an l),
+    lower-cased, so "Google.com." is google.com, not a typosquat.
+    """
+    if index is None:
+        index = get_trusted_index(trusted_domains)
+
     report = {
         "domain": domain,
         "is_suspicious": False,
         "reasons": []
     }
+    domain = domain.rstrip('.')
 
     # Typosquatting and Homoglyph checks
-    for trusted in trusted_domains:
-        # Typosquatting
-        typosquat_vars = generate_typosquatting_domains(trusted)
-        if domain in typosquat_vars and domain != trusted:
-            report["is_suspicious"] = True
+    for kind, trusted in index.lookup(domain):
+        report["is_suspicious"] = True
+        if kind == TrustedDomainIndex.TYPOSQUAT:
             report["reasons"].append(f"Typosquatting of '{trusted}'")
-
-        # Homoglyph
-        homoglyph_vars = generate_homoglyph_domains(trusted, HOMOGLYPH_MAP)
-        if domain in homoglyph_vars and domain != trusted:
-            report["is_suspicious"] = True
+        elif kind == TrustedDomainIndex.HOMOGLYPH:
             report["reasons"].append(f"Homoglyph attack mimicking '{trusted}'")
+        else:
+            report["reasons"].append(VARIANT_REASONS[kind].format(trusted))
+    domain = domain.lower()
 
     # Subdomain Spoofing
-    if detect_subdomain_spoofing(domain, trusted_domains):
+    if detect_subdomain_spoofing(domain, index.trusted_set, index.brands):
         report["is_suspicious"] = True
         report["reasons"].append("Subdomain spoofing detected")
 
+    # Combo-squatting (brand glued to other words, e.g. paypal-login.xyz)
+    _, registrable, suffix = split_host(domain)
+    if (registrable or domain.lower()) not in index.trusted_set:
+        seen = set()
+        for match in index.brands.combo_squats(domain):
+            trusted = match.trusted[0]
+            if trusted not in seen:
+                seen.add(trusted)
+                report["is_suspicious"] = True
+                report["reasons"].append(f"Combo-squatting of '{trusted}'")
+
     # Bulk Registration Check
     if known_suspicious_domains and domain in known_suspicious_domains:
         report["is_suspicious"] = True
         report["reasons"].append("Listed in known suspicious domains")
 
     # TLD Analysis
-    domain_parts = domain.split('.')
-    if len(domain_parts) >= 2:
-        tld = domain_parts[-1]
+    if suffix and registrable:
+        tld = suffix.rsplit('.', 1)[-1]
         if tld in SUSPICIOUS_TLDS:
-            base_domain = '.'.join(domain_parts[:-1])
-            # Check if base resembles any trusted domain
-            for trusted in trusted_domains:
-                trusted_base = trusted.split('.')[0]
-                if trusted_base in base_domain and tld not in trusted:
-                    report["is_suspicious"] = True
-                    report["reasons"].append(
-                        f"Suspicious TLD '{tld}' for '{trusted_base}'")
-                    break
+            base_domain = domain[:len(domain) - len(suffix) - 1]
+            # Check if base resembles any trusted domain; report the first
+            # one in trusted-list order, as the original linear scan did.
+            candidates = [trusted
+                          for match in index.brands.embedded_brands(base_domain, aligned=False)
+                          for trusted in match.trusted
+                          if tld not in trusted]
+            if candidates:
+                trusted = min(candidates, key=index.brands.order.__getitem__)
+                report["is_suspicious"] = True
+                report["reasons"].append(
+                    f"Suspicious TLD '{tld}' for '{BrandMatcher.brand_token(trusted)}'")
 
     return report
 
 
-def save_to_db(results: List[Dict], db_name: str = "phishing_analysis.db"):
-    """Saves analysis results to SQLite database."""
-    conn = sqlite3.connect(db_name)
-    c = conn.cursor()
-
-    # Create table if not exists. Using TEXT for timestamp (ISO 8601 format)
-    c.execute('''CREATE TABLE IF NOT EXISTS analysis_results
-                 (id INTEGER PRIMARY KEY,
-                  domain TEXT,
-                  is_suspicious BOOLEAN,
-                  reasons TEXT,
-                  timestamp TEXT)''')
-
-    # Insert data
-    for result in results:
-        c.execute('''INSERT INTO analysis_results 
-                     (domain, is_suspicious, reasons, timestamp)
-                     VALUES (?, ?, ?, ?)''',
-                  (result["domain"],
-                   result["is_suspicious"],
-                   ', '.join(result["reasons"]),
-                   datetime.now().isoformat()))
-    conn.commit()
-    conn.close()
+def lexical_config() -> Dict:
+    """DEFAULTS updated from the LEXICAL_DETECTION setting."""
+    config = dict(DEFAULTS)
+    try:
+        from django.conf import settings
+        config.update(getattr(settings, 'LEXICAL_DETECTION', {}))
+    except Exception:  # Django missing or settings not configured
+        pass
+    return config
+
+
+def lexical_analysis(hostname: str) -> Dict:
+    """analyze_domain against TRUSTED_DOMAINS for Celery tasks and views.
+
+    The index and the known-bad store are loaded once per process, from
+    the prebuilt stores named in LEXICAL_DETECTION when set; prefork
+    workers inherit them from the parent when they were loaded there.
+    """
+    config = lexical_config()
+    index = get_trusted_index(TRUSTED_DOMAINS, config['VARIANT_STORE'])
+    known_bad = (load_known_bad_store(config['KNOWN_BAD_STORE'])
+                 if config['KNOWN_BAD_STORE'] else None)
+    return analyze_domain(hostname, index.trusted_domains,
+                          known_suspicious_domains=known_bad, index=index)
+
+
+def save_to_db(results: List[Dict], db_name: str = "phishing_analysis.db",
+               upsert: bool = False):
+    """Saves analysis results to SQLite database.
+
+    Each call appends rows. With `upsert` the table keeps one row per
+    domain, so re-scanning a domain updates its row instead of adding
+    another; a table that already holds repeats needs
+    AnalysisResultStore(db_name, dedupe=True) once first, and from then
+    on every call needs `upsert`.
+    """
+    with AnalysisResultStore(db_name, upsert=upsert) as store:
+        store.add_many(results)
+
+
+def iter_domains(path: str) -> Iterator[str]:
+    """Lazily yields the non-empty lines of a domain list ('-' for stdin)."""
+    if path == '-':
+        for line in sys.stdin:
+            domain = line.strip()
+            if domain:
+                yield domain
+        return
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            domain = line.strip()
+            if domain:
+                yield domain
+
+
+def _chunked(iterable: Iterable[str], size: int) -> Iterator[List[str]]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
 
 
-def main():
-    # Internal trusted domains remain hardcoded
-    TRUSTED_DOMAINS = [
-        "google.com",
-        "microsoft.com",
-        "amazon.com",
-        "apple.com",
-        "cloudflare.com",
-        "paypal.com",
-        "bankofamerica.com",
-        "chase.com",
-        "wellsfargo.com",
-        "citibank.com",
-        "visa.com",
-        "mastercard.com",
-        "americanexpress.com",
-        "nytimes.com",
-        "bbc.com",
-        "reuters.com",
-        "ap.org",
-        "usa.gov",
-        "gov.uk",
-        "canada.ca",
-        "europa.eu",
-        "harvard.edu",
-        "mit.edu",
-        "ox.ac.uk",
-        "cam.ac.uk",
-        "stanford.edu",
-        "ieee.org",
-        "w3.org",
-        "ietf.org",
-        "mozilla.org",
-        "github.com",
-        "gitlab.com",
-        "wikipedia.org",
-        "who.int",
-        "redcross.org",
-        "un.org",
-        "nasa.gov",
-        "weather.gov",
-        "cdc.gov",
-        "nih.gov",
-        "fbi.gov",
-        "cisa.gov",
-        "dhs.gov",
-        "sec.gov",
-        "irs.gov",
-        "justice.gov",
-        "state.gov",
-        "treasury.gov",
-        "commerce.gov",
-        "energy.gov",
-        "defense.gov",
-        "education.gov",
-        "health.gov",
-        "hhs.gov",
-        "hud.gov",
-        "doi.gov",
-        "dol.gov",
-        "dot.gov",
-        "usda.gov",
-        "va.gov",
-        "census.gov",
-        "nist.gov",
-        "nsf.gov",
-        "nps.gov",
-        "gsa.gov",
-        "sba.gov",
-        "socialsecurity.gov",
-        "uspto.gov",
-        "usps.com",
-        "fedex.com",
-        "ups.com",
-        "dhl.com",
-        "bmw.com",
-        "mercedes-benz.com",
-        "toyota.com",
-        "honda.com",
-        "ford.com",
-        "volkswagen.com",
-        "siemens.com",
-        "ge.com",
-        "ibm.com",
-        "intel.com",
-        "oracle.com",
-        "sap.com",
-        "cisco.com",
-        "adobe.com",
-        "salesforce.com",
-        "zoom.us",
-        "slack.com",
-        "reddit.com",
-        "linkedin.com",
-        "twitter.com",
-        "instagram.com",
-        "youtube.com",
-        "twitch.tv",
-        "discord.com",
-        "airbnb.com",
-        "booking.com",
-        "expedia.com",
-        "tripadvisor.com",
-        "uber.com",
-        "lyft.com",
-        "spotify.com",
-        "netflix.com",
-        "hulu.com",
-        "disneyplus.com",
-        "hbomax.com",
-        "vimeo.com",
-        "medium.com",
-        "wordpress.org",
-        "drupal.org",
-        "joomla.org",
-        "apache.org",
-        "nginx.org",
-        "python.org",
-        "java.com",
-        "php.net",
-        "ruby-lang.org",
-        "rust-lang.org",
-        "golang.org",
-        "nodejs.org",
-        "angular.io",
-        "reactjs.org",
-        "vuejs.org",
-        "docker.com",
-        "kubernetes.io",
-        "aws.amazon.com",
-        "azure.microsoft.com",
-        "cloud.google.com",
-        "digitalocean.com",
-        "linode.com",
-        "oracle.com",
-        "salesforce.com",
-        "sap.com",
-        "servicenow.com",
-        "shopify.com",
-        "squarespace.com",
-        "wix.com",
-        "mailchimp.com",
-        "constantcontact.com",
-        "eventbrite.com",
-        "meetup.com",
-        "coursera.org",
-        "edx.org",
-        "udacity.com",
-        "udemy.com",
-        "khanacademy.org",
-        "nationalgeographic.com",
-        "smithsonianmag.com",
-        "scientificamerican.com",
-        "nature.com",
-        "sciencemag.org",
-        "cnet.com",
-        "techcrunch.com",
-        "wired.com",
-        "pcmag.com",
-        "theverge.com",
-        "arsTechnica.com",
-        "engadget.com",
-        "bloomberg.com",
-        "wsj.com",
-        "ft.com",
-        "economist.com",
-        "forbes.com",
-        "fortune.com",
-        "cnbc.com",
-        "foxnews.com",
-        "msnbc.com",
-        "npr.org",
-        "pbs.org",
-        "cbc.ca",
-        "abc.net.au",
-        "aljazeera.com",
-        "dw.com",
-        "france24.com",
-        "nikkei.com",
-        "yale.edu",
-        "princeton.edu",
-        "caltech.edu",
-        "ethz.ch",
-        "ucla.edu",
-        "berkeley.edu",
-        "mcgill.ca",
-        "utoronto.ca",
-        "kyoto-u.ac.jp",
-        "tokyo.ac.jp",
-        "weforum.org",
-        "imf.org",
-        "worldbank.org",
-        "oecd.org",
-        "nato.int",
-        "interpol.int",
-        "icrc.org",
-        "amnesty.org",
-        "hrw.org",
-        "eff.org",
-        "fsf.org",
-        "opensource.org",
-        "apache.org",
-        "linuxfoundation.org",
-        "w3c.org",
-        "iso.org",
-        "ansi.org",
-        "itu.int",
-        "iec.ch",
-        "nist.gov",
-        "bsigroup.com",
-        "ul.com",
-        "ieee.org",
-        "google.com",
-        "youtube.com",
-        "facebook.com",
-        "twitter.com",
-        "linkedin.com",
-        "microsoft.com",
-        "apple.com",
-        "icloud.com",
-        "github.com",
-        "gitlab.com",
-        "bitbucket.org",
-        "stackoverflow.com",
-        "reddit.com",
-        "amazon.com",
-        "aws.amazon.com",
-        "gmail.com",
-        "yahoo.com",
-        "hotmail.com",
-        "outlook.com",
-        "bing.com",
-        "duckduckgo.com",
-        "mozilla.org",
-        "opera.com",
-        "wordpress.org",
-        "nytimes.com",
-        "bbc.co.uk",
-        "cnn.com",
-        "theguardian.com",
-        "washingtonpost.com",
-        "reuters.com",
-        "bloomberg.com",
-        "forbes.com",
-        "cnbc.com",
-        "foxnews.com",
-        "nbcnews.com",
-        "time.com",
-        "usatoday.com",
-        "thehindu.com",
-        "indiatimes.com",
-        "aljazeera.com",
-        "france24.com",
-        "wikipedia.org",
-        "harvard.edu",
-        "mit.edu",
-        "stanford.edu",
-        "ox.ac.uk",
-        "cam.ac.uk",
-        "berkeley.edu",
-        "ucla.edu",
-        "umich.edu",
-        "utoronto.ca",
-        "nus.edu.sg",
-        "purdue.edu",
-        "edx.org",
-        "coursera.org",
-        "udemy.com",
-        "khanacademy.org",
-        "usa.gov",
-        "whitehouse.gov",
-        "senate.gov",
-        "nasa.gov",
-        "nps.gov",
-        "europa.eu",
-        "gov.uk",
-        "canada.ca",
-        "india.gov.in",
-        "australia.gov.au",
-        "gov.za",
-        "gov.sg",
-        "visa.com",
-        "mastercard.com",
-        "paypal.com",
-        "stripe.com",
-        "coinbase.com",
-        "chase.com",
-        "bankofamerica.com",
-        "wellsfargo.com",
-        "hsbc.com",
-        "barclays.co.uk",
-        "ing.com",
-        "citibank.com",
-        "goldmansachs.com",
-        "americanexpress.com",
-        "icicibank.com",
-        "hdfcbank.com",
-        "ebay.com",
-        "etsy.com",
-        "alibaba.com",
-        "aliexpress.com",
-        "walmart.com",
-        "target.com",
-        "costco.com",
-        "bestbuy.com",
-        "homedepot.com",
-        "ikea.com",
-        "macys.com",
-        "dropbox.com",
-        "slack.com",
-        "zoom.us",
-        "skype.com",
-        "salesforce.com",
-        "adobe.com",
-        "cloudflare.com",
-        "spotify.com",
-        "netflix.com",
-        "hulu.com",
-        "disneyplus.com",
-        "zoom.com",  
-        "airbnb.com",
-        "booking.com",
-        "tripadvisor.com",
-        "uber.com",
-        "lyft.com",
-        "tesla.com",
-        "ford.com",
-        "nike.com",
-        "adidas.com",
-        "samsung.com",
-        "lg.com",
-        "sony.com",
-        "panasonic.com",
-    ]
+# Index used by bulk-scan workers. Built in the parent before the pool
+# starts so forked workers share its pages copy-on-write; spawned workers
+# build their own in _init_scan_worker.
+_WORKER_INDEX: Optional[TrustedDomainIndex] = None
+_WORKER_KNOWN_BAD: Optional[KnownBadDomainStore] = None
 
+
+def _init_scan_worker(trusted_domains: Tuple[str, ...], known_bad_path: Optional[str] = None,
+                      variant_store_path: Optional[str] = None):
+    global _WORKER_INDEX, _WORKER_KNOWN_BAD
+    if _WORKER_INDEX is None:
+        _WORKER_INDEX = get_trusted_index(list(trusted_domains), variant_store_path)
+    if known_bad_path and _WORKER_KNOWN_BAD is None:
+        _WORKER_KNOWN_BAD = load_known_bad_store(known_bad_path)
+
+
+def _scan_chunk(domains: List[str]) -> List[Dict]:
+    results = []
+    for domain in domains:
+        try:
+            results.append(analyze_domain(
+                domain, _WORKER_INDEX.trusted_domains,
+                known_suspicious_domains=_WORKER_KNOWN_BAD, index=_WORKER_INDEX))
+        except Exception as e:
+            results.append({"domain": domain, "is_suspicious": False,
+                            "reasons": [], "error": str(e)})
+    return results
+
+
+def iter_scan_chunks(
+    chunks: Iterable[List[str]],
+    trusted_domains: List[str] = TRUSTED_DOMAINS,
+    workers: Optional[int] = None,
+    known_bad_path: Optional[str] = None,
+    variant_store_path: Optional[str] = None
+) -> Iterator[List[Dict]]:
+    """Runs analyze_domain over chunks of domains on a process pool and
+    yields each chunk's reports, in input order.
+
+    Chunks are pulled only while fewer than two per worker are in flight,
+    so a slow consumer holds the producer back instead of letting work
+    pile up in memory. Empty chunks are skipped but still let finished
+    results out, which keeps results flowing from an idle live source.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    global _WORKER_INDEX, _WORKER_KNOWN_BAD
+    _WORKER_INDEX = get_trusted_index(trusted_domains, variant_store_path)
+    _WORKER_KNOWN_BAD = load_known_bad_store(known_bad_path) if known_bad_path else None
+
+    if workers == 1:
+        for chunk in chunks:
+            if chunk:
+                yield _scan_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_scan_worker,
+                             initargs=(tuple(trusted_domains), known_bad_path,
+                                       variant_store_path)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            if chunk:
+                pending.append(pool.submit(_scan_chunk, chunk))
+            while pending and (len(pending) >= workers * 2 or pending[0].done()):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class _JSONLWriter:
+    def __init__(self, path: str):
+        self.file = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8')
+
+    def write(self, results: List[Dict]):
+        self.file.write(''.join(
+            json.dumps(result, ensure_ascii=False) + '\n' for result in results))
+
+    def close(self):
+        if self.file is sys.stdout:
+            self.file.flush()
+        else:
+            self.file.close()
+
+
+class _SQLiteWriter:
+    def __init__(self, path: str, upsert: bool = False, dedupe: bool = False):
+        self.store = AnalysisResultStore(path, upsert=upsert, dedupe=dedupe)
+
+    def write(self, results: List[Dict]):
+        self.store.add_many(results)
+
+    def close(self):
+        self.store.close()
+
+
+def bulk_scan(
+    input_path: str,
+    output_path: str,
+    output_format: str = "jsonl",
+    trusted_domains: List[str] = TRUSTED_DOMAINS,
+    workers: Optional[int] = None,
+    chunk_size: int = 2000,
+    suspicious_only: bool = False,
+    known_bad_path: Optional[str] = None,
+    upsert: bool = False,
+    dedupe: bool = False,
+    variant_store_path: Optional[str] = None
+) -> Dict[str, int]:
+    """Streams a domain file through analyze_domain on a process pool.
+
+    Input is read lazily in chunks and at most two chunks per worker are in
+    flight at any time, so memory stays bounded whatever the input size.
+    Results are written incrementally, in input order, either as JSON lines
+    or into the SQLite results table. `known_bad_path` names a store built
+    with known_bad_store and `variant_store_path` one built with
+    squat_variants for `trusted_domains`; both are memory-mapped, so
+    workers share their pages. `upsert` and `dedupe` are passed to AnalysisResultStore for SQLite
+    output.
+    """
+    if output_format not in ("jsonl", "sqlite"):
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+    if output_format == "jsonl":
+        writer = _JSONLWriter(output_path)
+    else:
+        writer = _SQLiteWriter(output_path, upsert, dedupe)
+    stats = {"scanned": 0, "suspicious": 0, "errors": 0}
+
+    def emit(results):
+        stats["scanned"] += len(results)
+        for result in results:
+            if result.get("error"):
+                stats["errors"] += 1
+            if result["is_suspicious"]:
+                stats["suspicious"] += 1
+        if suspicious_only:
+            results = [r for r in results if r["is_suspicious"] or r.get("error")]
+        if results:
+            writer.write(results)
+
+    chunks = _chunked(iter_domains(input_path), chunk_size)
+    try:
+        for results in iter_scan_chunks(chunks, trusted_domains, workers, known_bad_path,
+                                        variant_store_path):
+            emit(results)
+        return stats
+    finally:
+        writer.close()
+
+
+def bulk_main(argv: List[str]):
+    parser = argparse.ArgumentParser(
+        description="Bulk-scan a domain list for typosquatting, homoglyph and spoofing indicators.")
+    parser.add_argument("input", help="file with one domain per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="JSONL file ('-' for stdout) or SQLite database path")
+    parser.add_argument("-f", "--format", choices=("jsonl", "sqlite"), default="jsonl")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--suspicious-only", action="store_true",
+                        help="only write suspicious domains")
+    parser.add_argument("--known-bad", default=None, metavar="STORE",
+                        help="known-bad domain store built with known_bad_store.py")
+    parser.add_argument("--variant-store", default=None, metavar="STORE",
+                        help="squatting variant store built with squat_variants.py "
+                             "(default: generate the variants at startup)")
+    parser.add_argument("--upsert", action="store_true",
+                        help="SQLite: keep one row per domain instead of appending "
+                             "(required once the table has been switched)")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="SQLite: switch an existing table to --upsert, deleting "
+                             "all but the latest row per domain")
+    args = parser.parse_args(argv)
+
+    if args.format == "sqlite" and args.output == "-":
+        parser.error("--format sqlite needs an --output database path")
+
+    stats = bulk_scan(args.input, args.output, args.format,
+                      workers=args.workers, chunk_size=args.chunk_size,
+                      suspicious_only=args.suspicious_only,
+                      known_bad_path=args.known_bad,
+                      upsert=args.upsert, dedupe=args.dedupe,
+                      variant_store_path=args.variant_store)
+    print(f"Scanned {stats['scanned']} domains: {stats['suspicious']} suspicious, "
+          f"{stats['errors']} errors", file=sys.stderr)
+
+
+def main():
     print("Choose input method:")
     print("1. Enter domains manually (comma separated)")
     print("2. Provide a file path to a txt file (one domain per line)")
@@ -545,12 +954,14 @@ def main():
         return
 
     # Analyze provided domains
+    index = get_trusted_index(TRUSTED_DOMAINS)
     results = []
     print("\nAnalysis Results:")
     for domain in domains:
         try:
             analysis = analyze_domain(
-                domain, TRUSTED_DOMAINS, known_suspicious_domains=[])
+                domain, TRUSTED_DOMAINS, known_suspicious_domains=[],
+                index=index)
             results.append(analysis)
             status = "SUSPICIOUS" if analysis["is_suspicious"] else "CLEAN"
             print(f"{status}: {domain}")
@@ -568,4 +979,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1:
+        bulk_main(sys.argv[1:])
+    else:
+        main()
@@ -0,0 +1,142 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    from .public_suffix import registrable_domain
+except ImportError:  # executed as a standalone script
+    from public_suffix import registrable_domain
+
+# Brand tokens shorter than this ("ge", "ap", "un", ...) occur inside too
+# many ordinary words to be treated as combo-squats on their own.
+MIN_COMBO_BRAND_LENGTH = 4
+
+_SEPARATORS = '.-'
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton: finds every occurrence of a fixed set of
+    patterns in one left-to-right pass over the text, at a cost that does
+    not depend on how many patterns there are."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = list(dict.fromkeys(patterns))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = next_state
+            self._out[state] += (pattern_id,)
+
+        # Breadth-first pass to set failure links and merge the outputs of
+        # each state's longest proper suffix into the state itself.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                if fail == next_state:
+                    fail = 0
+                self._fail[next_state] = fail
+                self._out[next_state] += self._out[fail]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Yields (start, end, pattern_id) for every pattern occurrence."""
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in out[state]:
+                yield end - len(patterns[pattern_id]), end, pattern_id
+
+
+class BrandMatch(NamedTuple):
+    start: int
+    end: int
+    token: str
+    trusted: Tuple[str, ...]
+
+
+class BrandMatcher:
+    """Finds trusted domains and brand names embedded in a hostname.
+
+    One automaton is compiled from every trusted domain ("google.com") and
+    its brand token ("google"), so a hostname is scanned once no matter how
+    long the trusted list grows.
+    """
+
+    def __init__(self, trusted_domains: Iterable[str]):
+        self.trusted_domains = list(dict.fromkeys(trusted_domains))
+        self.order = {trusted: i for i, trusted in enumerate(self.trusted_domains)}
+        domains: Dict[str, List[str]] = {}
+        brands: Dict[str, List[str]] = {}
+        for trusted in self.trusted_domains:
+            domains.setdefault(trusted.lower(), []).append(trusted)
+            brands.setdefault(self.brand_token(trusted), []).append(trusted)
+
+        self.automaton = AhoCorasick(list(domains) + list(brands))
+        self._domain_hits: List[Optional[Tuple[str, ...]]] = []
+        self._brand_hits: List[Optional[Tuple[str, ...]]] = []
+        for pattern in self.automaton.patterns:
+            self._domain_hits.append(tuple(domains[pattern]) if pattern in domains else None)
+            self._brand_hits.append(tuple(brands[pattern]) if pattern in brands else None)
+
+    @staticmethod
+    def brand_token(trusted: str) -> str:
+        """The label left of the public suffix: "ox" for ox.ac.uk,
+        "amazon" for aws.amazon.com."""
+        return (registrable_domain(trusted) or trusted.lower()).split('.')[0]
+
+    @staticmethod
+    def _aligned(text: str, start: int, end: int) -> bool:
+        return ((start == 0 or text[start - 1] in _SEPARATORS)
+                and (end == len(text) or text[end] in _SEPARATORS))
+
+    def embedded_domains(self, hostname: str) -> List[BrandMatch]:
+        """Trusted domains occurring on label/hyphen boundaries."""
+        text = hostname.lower()
+        return [BrandMatch(start, end, self.automaton.patterns[pid], self._domain_hits[pid])
+                for start, end, pid in self.automaton.iter_matches(text)
+                if self._domain_hits[pid] and self._aligned(text, start, end)]
+
+    def embedded_brands(self, hostname: str, aligned: bool = True) -> List[BrandMatch]:
+        """Brand tokens occurring in the hostname.
+
+        With `aligned` only whole labels or hyphen-separated parts count;
+        otherwise any substring occurrence is returned.
+        """
+        text = hostname.lower()
+        return [BrandMatch(start, end, self.automaton.patterns[pid], self._brand_hits[pid])
+                for start, end, pid in self.automaton.iter_matches(text)
+                if self._brand_hits[pid] and (not aligned or self._aligned(text, start, end))]
+
+    def combo_squats(self, hostname: str) -> List[BrandMatch]:
+        """Brand tokens glued to other words with hyphens, e.g.
+        paypal-login-secure.xyz."""
+        text = hostname.lower()
+        matches = []
+        for match in self.embedded_brands(text):
+            if len(match.token) < MIN_COMBO_BRAND_LENGTH:
+                continue
+            label_start = text.rfind('.', 0, match.start) + 1
+            label_end = text.find('.', match.end)
+            if label_end == -1:
+                label_end = len(text)
+            if (label_start, label_end) != (match.start, match.end):
+                matches.append(match)
+        return matches
@@ -0,0 +1,100 @@
+import unicodedata
+from typing import Dict, List
+
+# Prototype ASCII character for common confusables that NFKD decomposition
+# does not already reduce to ASCII (Cyrillic, Greek, IPA and other look-alike
+# letters). Modelled on the Unicode confusables.txt data used by UTS #39,
+# restricted to what matters in domain labels.
+CONFUSABLES = {
+    # Cyrillic
+    'а': 'a', 'в': 'b', 'ь': 'b', 'с': 'c', 'ԁ': 'd', 'е': 'e',
+    'һ': 'h', 'і': 'i', 'ӏ': 'l', 'ј': 'j', 'к': 'k', 'м': 'm', 'н': 'h',
+    'о': 'o', 'р': 'p', 'ԛ': 'q', 'г': 'r', 'ѕ': 's', 'т': 't', 'ц': 'u',
+    'ѵ': 'v', 'ԝ': 'w', 'ѡ': 'w', 'х': 'x', 'у': 'y', 'п': 'n', 'є': 'e',
+    'ғ': 'f',
+    # Greek
+    'α': 'a', 'β': 'b', 'ϲ': 'c', 'ε': 'e', 'η': 'n', 'ι': 'i', 'ϳ': 'j',
+    'κ': 'k', 'ν': 'v', 'ο': 'o', 'ρ': 'p', 'τ': 't', 'υ': 'u', 'χ': 'x',
+    'γ': 'y', 'ζ': 'z', 'ω': 'w',
+    # Armenian and others
+    'հ': 'h', 'օ': 'o', 'զ': 'q', 'ո': 'n', 'ս': 'u', 'Ꭵ': 'i',
+    # Latin letters without a canonical decomposition
+    'ı': 'i', 'ɩ': 'i', 'ɪ': 'i', 'ł': 'l', 'ʟ': 'l', 'ⅼ': 'l', 'ɑ': 'a',
+    'ɒ': 'a', 'ʙ': 'b', 'ƅ': 'b', 'ƈ': 'c', 'ɗ': 'd', 'đ': 'd', 'ƒ': 'f',
+    'ꜰ': 'f', 'ɡ': 'g', 'ɢ': 'g', 'ʝ': 'j', 'ᴋ': 'k', 'ᴍ': 'm', 'ɴ': 'n',
+    'ᴏ': 'o', 'ø': 'o', 'ᴘ': 'p', 'ƥ': 'p', 'þ': 'p', 'ʠ': 'q', 'ɋ': 'q',
+    'ʀ': 'r', 'ꜱ': 's', 'ᴛ': 't', 'ᴜ': 'u', 'ᴠ': 'v', 'ʋ': 'v', 'ᴡ': 'w',
+    '×': 'x', 'ʏ': 'y', 'ᴢ': 'z', 'ʐ': 'z',
+    # Digits that pass for letters
+    '0': 'o', '1': 'l',
+    # Capitals that pass for a different lower-case letter: an I standing
+    # in for an l would otherwise be folded to i.
+    'I': 'l', 'І': 'l', 'Ι': 'l', 'Ӏ': 'l',
+}
+
+# Multi-character sequences that render like a single letter.
+SEQUENCE_CONFUSABLES = (('rn', 'm'), ('vv', 'w'))
+
+
+def build_confusable_map(homoglyph_map: Dict[str, List[str]]) -> Dict[str, str]:
+    """Extends CONFUSABLES with the non-ASCII entries of a homoglyph map."""
+    table = dict(CONFUSABLES)
+    for ascii_char, replacements in homoglyph_map.items():
+        if not ascii_char.isalpha():
+            continue
+        for glyph in replacements:
+            if not glyph.isascii():
+                table.setdefault(glyph, ascii_char)
+    return table
+
+
+def decode_idna(domain: str) -> str:
+    """Decodes punycode (`xn--`) labels, leaving malformed ones untouched."""
+    if 'xn--' not in domain.lower():
+        return domain
+    labels = []
+    for label in domain.split('.'):
+        if label[:4].lower() == 'xn--':
+            try:
+                label = label[4:].encode('ascii').decode('punycode')
+            except (UnicodeError, ValueError):
+                pass
+        labels.append(label)
+    return '.'.join(labels)
+
+
+def normalize_domain(domain: str) -> str:
+    """Lower-cased, IDNA-decoded form of a domain without a trailing dot."""
+    return decode_idna(domain.strip().rstrip('.')).lower()
+
+
+def skeleton(domain: str, confusable_map: Dict[str, str] = CONFUSABLES) -> str:
+    """Maps a domain to a canonical ASCII skeleton, in the style of UTS #39.
+
+    Two domains that render alike get the same skeleton however many of
+    their characters were substituted, so homoglyph detection becomes a
+    single lookup of the candidate's skeleton. Pass the domain as written:
+    each character is mapped in its original case and only folded after,
+    so googIe.com (capital I) and google.com share a skeleton.
+    """
+    chars = []
+    for char in decode_idna(domain.strip().rstrip('.')):
+        mapped = confusable_map.get(char)
+        if mapped is not None:
+            chars.append(mapped)
+            continue
+        # NFKD folds accents, fullwidth and mathematical letters to ASCII.
+        for part in unicodedata.normalize('NFKD', char):
+            if unicodedata.combining(part):
+                continue
+            mapped = confusable_map.get(part)
+            if mapped is None:
+                lower = part.lower()
+                mapped = confusable_map.get(lower, lower)
+            chars.append(mapped)
+    result = ''.join(chars)
+    for sequence, replacement in SEQUENCE_CONFUSABLES:
+        if sequence in result:
+            result = result.replace(sequence, replacement)
+    return result
+
@@ -1,15 +1,121 @@
-from bs4 import BeautifulSoup
 from datetime import datetime
 from urllib.parse import urlparse
+import codecs
 import whois
 import re
 import requests
+import zlib
+
+try:
+    from .html_features import HTMLFeatureExtractor, extract_features
+    from .public_suffix import registrable_domain
+except ImportError:  # executed as a standalone script
+    from html_features import HTMLFeatureExtractor, extract_features
+    from public_suffix import registrable_domain
+
+try:
+    from ..services.http_client import get_http_client
+    from ..services.whois_service import get_whois_service
+except ImportError:  # executed as a standalone script, outside the project
+    get_http_client = None
+    get_whois_service = None
+
+MAX_SCORE = 20
+# Decompressed body bytes analyzed per page; phishing kits rarely need more
+# and a hostile server must not be able to pin a worker's memory.
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+def _decompressor(content_encoding):
+    """Returns a zlib decompressor for the body, None for identity, or
+    False for encodings we did not ask for and cannot decode."""
+    encoding = (content_encoding or 'identity').strip().lower()
+    if encoding in ('identity', ''):
+        return None
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        # zlib-wrapped, or raw deflate from misbehaving servers.
+        return _DeflateDecompressor()
+    return False
+
+
+class _DeflateDecompressor:
+    """Handles servers that send raw deflate streams as 'deflate'."""
+
+    def __init__(self):
+        self._inner = zlib.decompressobj(32 + zlib.MAX_WBITS)
+        self._started = False
+
+    @property
+    def unconsumed_tail(self):
+        return self._inner.unconsumed_tail
+
+    def decompress(self, data, max_length):
+        if not self._started:
+            self._started = True
+            try:
+                return self._inner.decompress(data, max_length)
+            except zlib.error:
+                self._inner = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._inner.decompress(data, max_length)
+
+
+def text_decoder(encoding):
+    """Incremental decoder for the response charset, falling back to UTF-8."""
+    try:
+        return codecs.getincrementaldecoder(encoding or 'utf-8')('replace')
+    except LookupError:
+        return codecs.getincrementaldecoder('utf-8')('replace')
+
+
+class BoundedBodyReader:
+    """Decompresses a response body chunk by chunk without ever producing
+    more than max_bytes of content or consuming more than max_bytes of
+    input, so neither huge bodies nor decompression bombs are held in
+    memory."""
+
+    def __init__(self, content_encoding, max_bytes=DEFAULT_MAX_BYTES):
+        self.decompressor = _decompressor(content_encoding)
+        self.supported = self.decompressor is not False
+        self.max_bytes = max_bytes
+        self.remaining = max_bytes
+        self.bytes_read = 0
+        self.truncated = False
+
+    def feed(self, raw):
+        """Returns the content decoded from `raw`; empty once truncated."""
+        if self.truncated or not self.supported:
+            return b''
+        self.bytes_read += len(raw)
+        if self.decompressor is None:
+            data = raw[:self.remaining]
+            cut = len(raw) > self.remaining
+        else:
+            # max_length bounds the output whatever the ratio. One byte past
+            # the cap tells content beyond it from a bare trailer (and 0
+            # would mean no limit at all).
+            data = self.decompressor.decompress(raw, self.remaining + 1)
+            cut = len(data) > self.remaining
+            data = data[:self.remaining]
+        self.remaining -= len(data)
+        # A body of exactly max_bytes is complete; only content past the
+        # cap truncates it.
+        if cut or self.bytes_read > self.max_bytes:
+            self.truncated = True
+        return data
 
 
 class PhishingContentAnalyzer:
-    def __init__(self, url):
+    def __init__(self, url, max_bytes=DEFAULT_MAX_BYTES, fetch_context=None):
         self.url = url
+        # A FetchContext shared with the other analyzers replaces our own GET.
+        self.fetch_context = fetch_context
         self.domain = urlparse(url).netloc
+        hostname = urlparse(url).hostname or self.domain
+        # WHOIS only knows registrable domains, not hosts like login.bank.co.uk
+        self.registered_domain = registrable_domain(hostname) or hostname
         self.content = None
         self.keywords = ['login', 'verify', 'account',
                          'password', 'banking', 'secure', 'update', 'confirm']
@@ -17,30 +123,86 @@ class PhishingContentAnalyzer:
         self.ssl_valid = False
         self.domain_age = 0
         self.suspicious_elements = 0
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.truncated = False
+        # Set when the body was not (fully) read because the score was
+        # already capped; suspicious_elements then counts only what was read.
+        self.stopped_early = False
 
-    def fetch_content(self):
+    def _open(self):
+        """Sends the request and returns the response with its body still
+        unread, or None when there is no page to analyze."""
         try:
-            response = requests.get(self.url, timeout=10, verify=True)
-            self.ssl_valid = response.ok
-            if response.status_code == 200:
-                self.content = response.text
-                return True
-            return False
+            http = get_http_client() if get_http_client else requests
+            response = http.get(self.url, timeout=10, verify=True, stream=True,
+                                headers={'Accept-Encoding': 'gzip, deflate'})
         except (requests.exceptions.SSLError, requests.exceptions.ConnectionError):
             self.ssl_valid = False
+            return None
+        except Exception:
+            return None
+        self.ssl_valid = response.ok
+        if response.status_code != 200:
+            response.close()
+            return None
+        return response
+
+    def _iter_text(self, response):
+        """Yields the decoded body in chunks, bounded by max_bytes."""
+        reader = BoundedBodyReader(response.headers.get('Content-Encoding'), self.max_bytes)
+        try:
+            if not reader.supported:
+                return
+            decoder = text_decoder(response.encoding)
+            for raw in response.raw.stream(CHUNK_SIZE, decode_content=False):
+                data = reader.feed(raw)
+                if data:
+                    yield decoder.decode(data)
+                if reader.truncated:
+                    return
+            yield decoder.decode(b'', final=True)
+        finally:
+            self.bytes_read += reader.bytes_read
+            self.truncated = reader.truncated
+            response.close()
+
+    def _context_chunks(self):
+        """Body chunks from the shared FetchContext, or None if there is no
+        page to analyze."""
+        context = self.fetch_context
+        self.ssl_valid = context.ssl_valid
+        if context.status_code != 200 or context.body is None:
+            return None
+        self.bytes_read, self.truncated = context.bytes_read, context.truncated
+        text = context.text
+        return (text[i:i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE))
+
+    def fetch_content(self):
+        if self.fetch_context is not None:
+            chunks = self._context_chunks()
+            self.content = self.fetch_context.text if chunks is not None else None
+            return chunks is not None
+        response = self._open()
+        if response is None:
             return False
+        try:
+            self.content = ''.join(self._iter_text(response))
         except Exception:
             return False
+        return True
 
     def check_ssl(self):
         self.threat_score += 0 if self.ssl_valid else 5
 
     def check_domain_age(self):
         try:
-            domain_info = whois.whois(self.domain)
-            creation_date = domain_info.creation_date
-            if isinstance(creation_date, list):
-                creation_date = creation_date[0]
+            if get_whois_service is not None:
+                creation_date = get_whois_service().creation_date(self.registered_domain)
+            else:
+                creation_date = whois.whois(self.registered_domain).creation_date
+                if isinstance(creation_date, list):
+                    creation_date = creation_date[0]
             self.domain_age = (datetime.now() - creation_date).days
             if self.domain_age < 180:
                 self.threat_score += 3
@@ -51,28 +213,43 @@ class PhishingContentAnalyzer:
         if not self.content:
             return
         try:
-            soup = BeautifulSoup(self.content, 'html.parser')
-            forms = soup.find_all('form')
-            hidden_inputs = soup.find_all('input', {'type': 'hidden'})
-            scripts = soup.find_all(
-                'script', {'src': re.compile(r'^https?://')})
-            iframes = soup.find_all('iframe')
-
-            self.suspicious_elements = len(
-                hidden_inputs) + len(scripts) + len(iframes)
-            self.threat_score += min(self.suspicious_elements * 0.5, 4)
-
-            for form in forms:
-                if form.find_all(['input', 'password']):
-                    self.threat_score += 2
-
-            text = soup.get_text().lower()
-            for keyword in self.keywords:
-                if re.search(rf'\b{keyword}\b', text):
-                    self.threat_score += 1.5
+            features = extract_features(self.content, self.keywords)
+            self._score_features(features)
         except Exception:
             pass
 
+    def analyze_stream(self, response):
+        """Feeds the body into the feature extractor as it downloads and
+        stops reading once the capped score can no longer change."""
+        self._analyze_chunks(self._iter_text(response))
+
+    def _analyze_chunks(self, chunks):
+        extractor = HTMLFeatureExtractor(self.keywords)
+        try:
+            for text in chunks:
+                extractor.feed(text)
+                if self.threat_score + self._content_score(extractor.snapshot()) >= MAX_SCORE:
+                    self.stopped_early = True
+                    break
+            self._score_features(extractor.close())
+        except Exception:
+            pass
+        finally:
+            chunks.close()
+
+    @staticmethod
+    def _content_score(features):
+        suspicious_elements = (features.hidden_inputs + features.external_scripts
+                               + features.iframes)
+        return (min(suspicious_elements * 0.5, 4)
+                + 2 * features.forms_with_inputs
+                + 1.5 * len(features.keywords))
+
+    def _score_features(self, features):
+        self.suspicious_elements = (features.hidden_inputs + features.external_scripts
+                                    + features.iframes)
+        self.threat_score += self._content_score(features)
+
     def check_url_structure(self):
         parsed = urlparse(self.url)
         if re.match(r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}', parsed.netloc):
@@ -83,12 +260,25 @@ class PhishingContentAnalyzer:
             self.threat_score += 1.5
 
     def calculate_threat_score(self):
-        self.fetch_content()
-        self.check_ssl()
-        self.check_domain_age()
-        self.analyze_content()
+        # Cheap checks first, so the body is only read while it can still
+        # move the capped score.
         self.check_url_structure()
-        return min(self.threat_score, 20)
+        self.check_domain_age()
+        response = None
+        if self.fetch_context is not None:
+            chunks = self._context_chunks()
+        else:
+            response = self._open()
+            chunks = self._iter_text(response) if response is not None else None
+        self.check_ssl()
+        if chunks is not None:
+            if self.threat_score >= MAX_SCORE:
+                self.stopped_early = True
+                if response is not None:
+                    response.close()
+            else:
+                self._analyze_chunks(chunks)
+        return min(self.threat_score, MAX_SCORE)
 
     def get_threat_level(self):
         score = self.calculate_threat_score()
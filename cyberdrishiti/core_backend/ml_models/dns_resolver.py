@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import dns.exception
+import dns.resolver
+
+# Queries the behavior analysis needs per domain, keyed by the name the
+# analyzer uses for each; '{}' is the domain.
+RECORD_SET = {
+    'mx': ('{}', 'MX'),
+    'txt': ('{}', 'TXT'),
+    'dmarc': ('_dmarc.{}', 'TXT'),
+    'a': ('{}', 'A'),
+}
+
+# Answers meaning "no such records", cached like positive answers (RFC 2308).
+NEGATIVE_ANSWERS = (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)
+
+Records = Tuple[str, ...]
+
+
+class CachingResolver:
+    """dnspython resolver shared by every analysis in the process.
+
+    Answers, including NXDOMAIN and empty answers, are kept in an LRU for
+    their record TTL (clamped to [min_ttl, max_ttl]; negative_ttl for the
+    negative ones), so re-analyzing a domain or its siblings costs no
+    round-trips. Queries run on a thread pool, letting one domain's record
+    set resolve concurrently and large batches resolve with bounded
+    parallelism. Timeouts are not cached.
+    """
+
+    def __init__(self, resolver: Optional[dns.resolver.Resolver] = None,
+                 max_entries: int = 20000, min_ttl: int = 30, max_ttl: int = 3600,
+                 negative_ttl: int = 300, max_workers: int = 32):
+        self.resolver = resolver or dns.resolver.Resolver()
+        self.max_entries = max_entries
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.max_workers = max_workers
+        self._entries: 'OrderedDict[Tuple[str, str], tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='dns-resolve')
+        self._stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'timeouts': 0}
+
+    def resolve(self, name: str, rdtype: str) -> Records:
+        """The records' text, or () for NXDOMAIN, no answer or a timeout.
+        Other resolver errors (e.g. NoNameservers) propagate."""
+        key = (name.rstrip('.').lower(), rdtype.upper())
+        records = self._cached(key)
+        if records is not None:
+            return records
+        with self._lock:
+            self._stats['misses'] += 1
+        try:
+            answer = self.resolver.resolve(key[0], key[1])
+        except NEGATIVE_ANSWERS:
+            self._store(key, (), self.negative_ttl)
+            return ()
+        except dns.exception.Timeout:
+            with self._lock:
+                self._stats['timeouts'] += 1
+            return ()
+        records = tuple(rdata.to_text() for rdata in answer)
+        ttl = answer.rrset.ttl if answer.rrset is not None else self.min_ttl
+        self._store(key, records, min(max(ttl, self.min_ttl), self.max_ttl))
+        return records
+
+    def _cached(self, key: Tuple[str, str]) -> Optional[Records]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits' if entry[1] else 'negative_hits'] += 1
+            return entry[1]
+
+    def _store(self, key: Tuple[str, str], records: Records, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, records)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def submit(self, name: str, rdtype: str) -> 'Future[Records]':
+        """Resolves in the background; cached answers come back already done."""
+        records = self._cached((name.rstrip('.').lower(), rdtype.upper()))
+        if records is not None:
+            future: 'Future[Records]' = Future()
+            future.set_result(records)
+            return future
+        return self._executor.submit(self.resolve, name, rdtype)
+
+    def submit_record_set(self, domain: str) -> Dict[str, 'Future[Records]']:
+        """Starts every RECORD_SET query for the domain at once."""
+        return {label: self.submit(template.format(domain), rdtype)
+                for label, (template, rdtype) in RECORD_SET.items()}
+
+    def resolve_record_set(self, domain: str) -> Dict[str, Records]:
+        """The domain's RECORD_SET, in about the time of its slowest query."""
+        return {label: future.result()
+                for label, future in self.submit_record_set(domain).items()}
+
+    def resolve_batch(self, domains: Iterable[str],
+                      max_in_flight: Optional[int] = None
+                      ) -> Iterator[Tuple[str, Dict[str, Records]]]:
+        """Yields (domain, record set) for each domain as it completes.
+
+        At most max_in_flight domains (default: enough to keep every
+        worker busy) are queued at once, so an iterator over millions of
+        domains is consumed lazily. A domain whose queries failed with an
+        unexpected resolver error is yielded with the exception instead.
+        """
+        max_in_flight = max_in_flight or self.max_workers * 2
+        domains = iter(domains)
+        pending: Dict[Future, Tuple[str, Dict[str, Future]]] = {}
+
+        def start(domain):
+            futures = self.submit_record_set(domain)
+            done: Future = Future()
+            remaining = [len(futures)]
+            remaining_lock = threading.Lock()
+
+            def finished(_):
+                with remaining_lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    done.set_result(None)
+            for future in futures.values():
+                future.add_done_callback(finished)
+            pending[done] = (domain, futures)
+
+        for domain in domains:
+            start(domain)
+            if len(pending) >= max_in_flight:
+                break
+        while pending:
+            completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for done in completed:
+                domain, futures = pending.pop(done)
+                try:
+                    yield domain, {label: future.result() for label, future in futures.items()}
+                except dns.exception.DNSException as e:
+                    yield domain, e
+                next_domain = next(domains, None)
+                if next_domain is not None:
+                    start(next_domain)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_resolver: Optional[CachingResolver] = None
+_resolver_pid: Optional[int] = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver() -> CachingResolver:
+    """The process-wide resolver, rebuilt after a fork since its worker
+    threads do not survive into the child."""
+    global _resolver, _resolver_pid
+    with _resolver_lock:
+        if _resolver is None or _resolver_pid != os.getpid():
+            _resolver = CachingResolver()
+            _resolver_pid = os.getpid()
+        return _resolver
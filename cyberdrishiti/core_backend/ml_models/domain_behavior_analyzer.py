@@ -1,17 +1,29 @@
-import dns.resolver
 import whois
 from datetime import datetime
 
+try:
+    from .dns_resolver import get_resolver
+    from .public_suffix import registrable_domain
+except ImportError:  # executed as a standalone script
+    from dns_resolver import get_resolver
+    from public_suffix import registrable_domain
+
+try:
+    from ..services.whois_service import get_whois_service
+except ImportError:  # executed as a standalone script, outside the project
+    get_whois_service = None
+
 
 class PhishingDetector:
     """
     Analyzes a domain’s DNS records and provided traffic data to compute a threat score.
     """
 
-    def __init__(self, domain, traffic_data=None):
+    def __init__(self, domain, traffic_data=None, resolver=None):
         self.domain = domain
+        self.registered_domain = registrable_domain(domain) or domain
         self.traffic_data = traffic_data if traffic_data is not None else {}
-        self.resolver = dns.resolver.Resolver()
+        self.resolver = resolver or get_resolver()
         self.threat_score = 0
         self.mx_exists = False
         self.spf_exists = False
@@ -23,59 +35,46 @@ class PhishingDetector:
         self.unusual_geolocations = False
 
     def check_dns(self):
-        """Checks DNS records for MX, SPF, DMARC, A records and calculates the domain age score."""
-        self._check_mx()
-        self._check_spf()
-        self._check_dmarc()
-        self._check_a_records()
+        """Checks DNS records for MX, SPF, DMARC, A records and calculates the domain age score.
+
+        The four queries go out together through the shared caching
+        resolver while WHOIS runs in this thread, so the stage takes about
+        as long as its slowest lookup rather than the sum of all five.
+        """
+        pending = self.resolver.submit_record_set(self.domain)
         self._get_domain_age_score()
+        records = {label: future.result() for label, future in pending.items()}
+        self._check_mx(records['mx'])
+        self._check_spf(records['txt'])
+        self._check_dmarc(records['dmarc'])
+        self._check_a_records(records['a'])
 
-    def _check_mx(self):
+    def _check_mx(self, mx_records):
         """Checks if MX records exist for the domain."""
-        try:
-            mx_records = self.resolver.resolve(self.domain, 'MX')
-            self.mx_exists = len(mx_records) > 0
-        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.exception.Timeout):
-            self.mx_exists = False
+        self.mx_exists = len(mx_records) > 0
 
-    def _check_spf(self):
+    def _check_spf(self, txt_records):
         """Checks if an SPF record is present in the TXT records."""
-        try:
-            txt_records = self.resolver.resolve(self.domain, 'TXT')
-            for record in txt_records:
-                if 'v=spf1' in str(record):
-                    self.spf_exists = True
-                    break
-        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.exception.Timeout):
-            self.spf_exists = False
-
-    def _check_dmarc(self):
-        """Checks for the presence of a DMARC record."""
-        dmarc_domain = f'_dmarc.{self.domain}'
-        try:
-            txt_records = self.resolver.resolve(dmarc_domain, 'TXT')
-            for record in txt_records:
-                if 'v=DMARC1' in str(record):
-                    self.dmarc_exists = True
-                    break
-        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.exception.Timeout):
-            self.dmarc_exists = False
-
-    def _check_a_records(self):
+        self.spf_exists = any('v=spf1' in record for record in txt_records)
+
+    def _check_dmarc(self, dmarc_records):
+        """Checks for the presence of a DMARC record in the _dmarc TXT records."""
+        self.dmarc_exists = any('v=DMARC1' in record for record in dmarc_records)
+
+    def _check_a_records(self, a_records):
         """Checks the number of A records for the domain."""
-        try:
-            a_records = self.resolver.resolve(self.domain, 'A')
-            self.a_record_count = len(a_records)
-        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.exception.Timeout):
-            self.a_record_count = 0
+        self.a_record_count = len(a_records)
 
     def _get_domain_age_score(self):
         """Calculates a score based on the age of the domain."""
         try:
-            domain_info = whois.whois(self.domain)
-            creation_date = domain_info.creation_date
-            if isinstance(creation_date, list):
-                creation_date = creation_date[0]
+            if get_whois_service is not None:
+                # Already normalized to a datetime (or None) by the service.
+                creation_date = get_whois_service().creation_date(self.registered_domain)
+            else:
+                creation_date = whois.whois(self.registered_domain).creation_date
+                if isinstance(creation_date, list):
+                    creation_date = creation_date[0]
             if creation_date:
                 # Convert to datetime if not already a datetime object
                 if not isinstance(creation_date, datetime):
@@ -0,0 +1,119 @@
+import re
+from html.parser import HTMLParser
+from typing import FrozenSet, Iterable, List, NamedTuple, Set
+
+# Strings BeautifulSoup's get_text() leaves out, so keyword hits match the
+# old soup-based analysis.
+_TEXTLESS_TAGS = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+
+_EXTERNAL_SRC = re.compile(r'^https?://')
+
+
+class HTMLFeatures(NamedTuple):
+    forms: int
+    forms_with_inputs: int
+    password_inputs: int
+    hidden_inputs: int
+    external_scripts: int
+    iframes: int
+    keywords: FrozenSet[str]
+
+
+class HTMLFeatureExtractor(HTMLParser):
+    """Single-pass phishing feature extractor.
+
+    Counts forms, password/hidden inputs, external scripts and iframes from
+    parser events and matches every keyword with one compiled alternation
+    over the visible text as it streams past, so no tree is built and the
+    page can be fed in chunks of any size.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        super().__init__(convert_charrefs=True)
+        keywords = list(keywords)
+        self._keyword_re = re.compile(
+            r'\b(?:' + '|'.join(map(re.escape, keywords)) + r')\b') if keywords else None
+        # Text carried between data events: enough to re-check a keyword
+        # that ended exactly at a chunk boundary, plus the \b before it.
+        self._carry_length = max(map(len, keywords), default=0) + 1
+        self._carry = ''
+        self._found: Set[str] = set()
+        self._open_forms: List[bool] = []
+        self._textless_depth = 0
+
+        self.forms = 0
+        self.forms_with_inputs = 0
+        self.password_inputs = 0
+        self.hidden_inputs = 0
+        self.external_scripts = 0
+        self.iframes = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'form':
+            self.forms += 1
+            self._open_forms.append(False)
+        elif tag == 'input' or tag == 'password':
+            # Any enclosing form now has an input, nested ones included.
+            self._open_forms = [True] * len(self._open_forms)
+            if tag == 'input':
+                input_type = dict(attrs).get('type')
+                if input_type == 'hidden':
+                    self.hidden_inputs += 1
+                elif input_type and input_type.lower() == 'password':
+                    self.password_inputs += 1
+        elif tag == 'script':
+            src = dict(attrs).get('src')
+            if src and _EXTERNAL_SRC.match(src):
+                self.external_scripts += 1
+        elif tag == 'iframe':
+            self.iframes += 1
+        if tag in _TEXTLESS_TAGS:
+            self._textless_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'form':
+            if self._open_forms and self._open_forms.pop():
+                self.forms_with_inputs += 1
+        elif tag in _TEXTLESS_TAGS and self._textless_depth:
+            self._textless_depth -= 1
+
+    def handle_data(self, data):
+        if self._textless_depth or self._keyword_re is None:
+            return
+        text = self._carry + data.lower()
+        for match in self._keyword_re.finditer(text, self._carry_start()):
+            # A hit touching the end may still grow into a longer word.
+            if match.end() < len(text):
+                self._found.add(match.group())
+        self._carry = text[-self._carry_length:]
+
+    def _carry_start(self) -> int:
+        # A full carry's first character is only context for \b; matches
+        # starting there were already settled by the previous event.
+        return 1 if len(self._carry) == self._carry_length else 0
+
+    def snapshot(self) -> HTMLFeatures:
+        """Features of the input fed so far. Every count only grows as more
+        input arrives, so this is a lower bound on the final result."""
+        return HTMLFeatures(self.forms, self.forms_with_inputs + sum(self._open_forms),
+                            self.password_inputs, self.hidden_inputs, self.external_scripts,
+                            self.iframes, frozenset(self._found))
+
+    def close(self) -> HTMLFeatures:
+        super().close()
+        if self._carry and self._keyword_re is not None:
+            self._found.update(match.group() for match in
+                               self._keyword_re.finditer(self._carry, self._carry_start()))
+            self._carry = ''
+        # Forms left open at the end of the page still count.
+        self.forms_with_inputs += sum(self._open_forms)
+        self._open_forms = []
+        return HTMLFeatures(self.forms, self.forms_with_inputs, self.password_inputs,
+                            self.hidden_inputs, self.external_scripts, self.iframes,
+                            frozenset(self._found))
+
+
+def extract_features(html: str, keywords: Iterable[str]) -> HTMLFeatures:
+    extractor = HTMLFeatureExtractor(keywords)
+    extractor.feed(html)
+    return extractor.close()
@@ -0,0 +1,141 @@
+import os
+from functools import lru_cache
+from typing import Dict, Optional, Set, Tuple
+
+# Local snapshot of https://publicsuffix.org/list/public_suffix_list.dat.
+# Refresh it by replacing the file, or point PUBLIC_SUFFIX_LIST elsewhere.
+DEFAULT_PSL_PATH = os.environ.get(
+    'PUBLIC_SUFFIX_LIST',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'public_suffix_list.dat'))
+
+_TERMINAL = ''  # trie key marking the end of a rule; labels are never empty
+
+
+class PublicSuffixList:
+    """Suffix trie built from a Public Suffix List file.
+
+    Rules are stored label by label from the right ("ox.ac.uk" walks
+    uk -> ac -> ox), so finding a host's public suffix is one dict lookup
+    per label. Results are memoized in an LRU cache because feeds repeat
+    the same hosts over and over.
+    """
+
+    def __init__(self, path: str = DEFAULT_PSL_PATH, include_private: bool = True,
+                 cache_size: int = 65536):
+        self._root: Dict[str, dict] = {}
+        # Rules from the private section: platforms such as github.io or
+        # herokuapp.com whose subdomains belong to unrelated customers.
+        self._private: Set[str] = set()
+        private = False
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('// ===BEGIN PRIVATE DOMAINS==='):
+                    if not include_private:
+                        break
+                    private = True
+                if not line or line.startswith('//'):
+                    continue
+                rule = line.split()[0].lower()
+                self._add_rule(rule)
+                if private:
+                    self._private.add(rule.lstrip('!'))
+                # Rules are listed in Unicode; hosts usually arrive as punycode.
+                try:
+                    ascii_rule = rule.lstrip('!').encode('idna').decode('ascii')
+                except UnicodeError:
+                    continue
+                if ascii_rule != rule.lstrip('!'):
+                    self._add_rule(('!' if rule.startswith('!') else '') + ascii_rule)
+                    if private:
+                        self._private.add(ascii_rule)
+        self.split = lru_cache(maxsize=cache_size)(self._split)
+
+    def _add_rule(self, rule: str):
+        exception = rule.startswith('!')
+        labels = rule.lstrip('!').split('.')
+        node = self._root
+        for label in reversed(labels[1:] if exception else labels):
+            node = node.setdefault(label, {})
+        if exception:
+            node['!' + labels[0]] = {_TERMINAL: True}
+        else:
+            node[_TERMINAL] = True
+
+    def _suffix_length(self, labels: list) -> int:
+        """Number of trailing labels forming the public suffix."""
+        length = 1  # implicit "*" rule: an unlisted TLD is a public suffix
+        node = self._root
+        for depth, label in enumerate(reversed(labels)):
+            if '!' + label in node:
+                return depth
+            wildcard = node.get('*')
+            if wildcard is not None and _TERMINAL in wildcard:
+                length = depth + 1
+            child = node.get(label)
+            if child is None:
+                break
+            if _TERMINAL in child:
+                length = depth + 1
+            node = child
+        return min(length, len(labels))
+
+    def _split(self, host: str) -> Tuple[str, Optional[str], str]:
+        """Splits a host into (subdomain, registrable domain, public suffix)."""
+        host = host.strip().rstrip('.').lower()
+        if not host:
+            return '', None, ''
+        if ':' in host or host.rsplit('.', 1)[-1].isdigit():
+            return '', host, ''  # IP literal: no suffix to strip
+        labels = host.split('.')
+        suffix_length = self._suffix_length(labels)
+        suffix = '.'.join(labels[-suffix_length:]) if suffix_length else ''
+        if suffix_length >= len(labels):
+            return '', None, suffix
+        registrable = '.'.join(labels[-suffix_length - 1:])
+        subdomain = '.'.join(labels[:-suffix_length - 1])
+        return subdomain, registrable, suffix
+
+    def public_suffix(self, host: str) -> str:
+        return self.split(host)[2]
+
+    def registrable_domain(self, host: str) -> Optional[str]:
+        """The eTLD+1 of `host`, or None if the host is itself a public suffix."""
+        return self.split(host)[1]
+
+    def is_private_suffix(self, suffix: str) -> bool:
+        """True if `suffix` comes from the list's private section."""
+        if suffix in self._private:
+            return True
+        parent = suffix.partition('.')[2]
+        return bool(parent) and '*.' + parent in self._private
+
+
+_default_list: Optional[PublicSuffixList] = None
+
+
+def get_public_suffix_list() -> PublicSuffixList:
+    """Process-wide list, loaded from DEFAULT_PSL_PATH on first use."""
+    global _default_list
+    if _default_list is None:
+        _default_list = PublicSuffixList()
+    return _default_list
+
+
+def split_host(host: str) -> Tuple[str, Optional[str], str]:
+    return get_public_suffix_list().split(host)
+
+
+def registrable_domain(host: str) -> Optional[str]:
+    return get_public_suffix_list().split(host)[1]
+
+
+def public_suffix(host: str) -> str:
+    return get_public_suffix_list().split(host)[2]
+
+
+def under_private_suffix(host: str) -> bool:
+    """True for hosts on shared hosting platforms (PSL private section),
+    e.g. foo.github.io, where the registrable domain is a single tenant."""
+    psl = get_public_suffix_list()
+    return psl.is_private_suffix(psl.split(host)[2])
@@ -0,0 +1,160 @@
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+# Pragmas tuned for a write-heavy results table that dashboards read
+# concurrently: WAL lets readers proceed during batch inserts, NORMAL
+# synchronous is durable across application crashes under WAL.
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("temp_store", "MEMORY"),
+    ("cache_size", -64000),          # ~64 MB page cache
+    ("mmap_size", 268435456),        # 256 MB
+    ("busy_timeout", 5000),
+)
+
+logger = logging.getLogger(__name__)
+
+UNIQUE_DOMAIN_INDEX = "uq_analysis_results_domain"
+
+
+class AnalysisResultStore:
+    """Batched, indexed writer for the analysis_results table.
+
+    Keeps one connection open, buffers rows and writes them with
+    `executemany` in a single transaction per batch. By default every
+    scan appends rows. In upsert mode the table holds one row per domain
+    and re-scans update it in place; a table already holding repeats must
+    be converted explicitly with `dedupe`, which deletes all but the
+    latest row per domain. Once converted, the table must be opened with
+    `upsert` (or `dedupe`): appending to it raises ValueError.
+    """
+
+    def __init__(self, db_name: str = "phishing_analysis.db", upsert: bool = False,
+                 batch_size: int = 20000, dedupe: bool = False):
+        self.db_name = db_name
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(db_name)
+        for name, value in PRAGMAS:
+            self.conn.execute(f"PRAGMA {name}={value}")
+        self._pending: List[tuple] = []
+        self._create_schema()
+        if dedupe:
+            self.dedupe()
+        elif upsert:
+            self._add_unique_index()
+        elif self._has_index(UNIQUE_DOMAIN_INDEX):
+            self.conn.close()
+            raise ValueError(
+                f"{db_name} keeps one row per domain; open it with upsert=True "
+                f"to update those rows")
+        self.upsert = upsert or dedupe
+
+    def _has_index(self, name: str) -> bool:
+        return any(row[1] == name for row in
+                   self.conn.execute("PRAGMA index_list(analysis_results)"))
+
+    def _create_schema(self):
+        with self.conn:
+            # Using TEXT for timestamp (ISO 8601 format)
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS analysis_results
+                                 (id INTEGER PRIMARY KEY,
+                                  domain TEXT,
+                                  is_suspicious BOOLEAN,
+                                  reasons TEXT,
+                                  timestamp TEXT)''')
+            self.conn.execute('''CREATE INDEX IF NOT EXISTS idx_analysis_results_timestamp
+                                 ON analysis_results (timestamp)''')
+            if not self._has_index(UNIQUE_DOMAIN_INDEX):
+                self.conn.execute('''CREATE INDEX IF NOT EXISTS idx_analysis_results_domain
+                                     ON analysis_results (domain)''')
+
+    def _add_unique_index(self):
+        try:
+            with self.conn:
+                self.conn.execute(f'''CREATE UNIQUE INDEX IF NOT EXISTS {UNIQUE_DOMAIN_INDEX}
+                                      ON analysis_results (domain)''')
+                self.conn.execute("DROP INDEX IF EXISTS idx_analysis_results_domain")
+        except sqlite3.IntegrityError:
+            raise ValueError(
+                f"{self.db_name} holds several rows for some domains; open it with "
+                f"dedupe=True to keep only the latest row per domain") from None
+
+    def dedupe(self) -> int:
+        """Switches the table to upsert mode, deleting all but the latest
+        row per domain first. Returns the number of rows deleted."""
+        self.flush()
+        with self.conn:
+            removed = self.conn.execute('''DELETE FROM analysis_results WHERE id NOT IN
+                                           (SELECT MAX(id) FROM analysis_results
+                                            GROUP BY domain)''').rowcount
+        logger.warning("Removed %d older duplicate rows from %s", removed, self.db_name)
+        self._add_unique_index()
+        self.upsert = True
+        return removed
+
+    def add(self, result: Dict, timestamp: Optional[str] = None):
+        """Queues one analyze_domain report, flushing when the batch is full."""
+        self._pending.append((result["domain"],
+                              result["is_suspicious"],
+                              ', '.join(result["reasons"]),
+                              timestamp or datetime.now().isoformat()))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, results: Iterable[Dict]):
+        """Queues a batch of reports sharing one timestamp."""
+        timestamp = datetime.now().isoformat()
+        pending = self._pending
+        for result in results:
+            pending.append((result["domain"],
+                            result["is_suspicious"],
+                            ', '.join(result["reasons"]),
+                            timestamp))
+            if len(pending) >= self.batch_size:
+                self.flush()
+                pending = self._pending
+
+    def flush(self):
+        if not self._pending:
+            return
+        if self.upsert:
+            sql = '''INSERT INTO analysis_results
+                     (domain, is_suspicious, reasons, timestamp)
+                     VALUES (?, ?, ?, ?)
+                     ON CONFLICT(domain) DO UPDATE SET
+                         is_suspicious = excluded.is_suspicious,
+                         reasons = excluded.reasons,
+                         timestamp = excluded.timestamp'''
+        else:
+            sql = '''INSERT INTO analysis_results
+                     (domain, is_suspicious, reasons, timestamp)
+                     VALUES (?, ?, ?, ?)'''
+        with self.conn:
+            self.conn.executemany(sql, self._pending)
+        self._pending = []
+
+    def get(self, domain: str) -> Optional[Dict]:
+        """Returns the most recent stored result for a domain."""
+        self.flush()
+        row = self.conn.execute('''SELECT domain, is_suspicious, reasons, timestamp
+                                   FROM analysis_results WHERE domain = ?
+                                   ORDER BY id DESC LIMIT 1''', (domain,)).fetchone()
+        if row is None:
+            return None
+        return {"domain": row[0],
+                "is_suspicious": bool(row[1]),
+                "reasons": row[2].split(', ') if row[2] else [],
+                "timestamp": row[3]}
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,279 @@
+import argparse
+import bisect
+import io
+import json
+import mmap
+import struct
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from .known_bad_store import check_byteorder, domain_hash
+    from .public_suffix import split_host
+except ImportError:  # executed as a standalone script
+    from known_bad_store import check_byteorder, domain_hash
+    from public_suffix import split_host
+
+HOSTNAME_CHARS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789-')
+VOWELS = 'aeiou'
+
+# Common generic TLDs plus the ones phishing campaigns favour.
+SWAP_TLDS = ('com', 'net', 'org', 'info', 'co', 'io', 'online', 'site',
+             'ru', 'top', 'biz', 'cc', 'xyz', 'tk', 'ml', 'ga', 'cf', 'gq')
+
+_KEYBOARD_ROWS = ('1234567890-', 'qwertyuiop', 'asdfghjkl', 'zxcvbnm')
+
+
+def _keyboard_neighbours() -> Dict[str, str]:
+    """Keys physically adjacent on a QWERTY keyboard (row and diagonals)."""
+    position = {char: (row, col)
+                for row, keys in enumerate(_KEYBOARD_ROWS)
+                for col, char in enumerate(keys)}
+    neighbours = {}
+    for char, (row, col) in position.items():
+        near = []
+        for other, (other_row, other_col) in position.items():
+            if other != char and abs(other_row - row) <= 1 and abs(other_col - col) <= 1:
+                near.append(other)
+        neighbours[char] = ''.join(sorted(near))
+    return neighbours
+
+
+KEYBOARD_NEIGHBOURS = _keyboard_neighbours()
+
+
+def _split_name(domain: str) -> Tuple[str, str, str]:
+    """Splits a domain into (prefix, name, suffix) where `name` is the
+    registrable label the generators mutate: ("", "google", ".co.uk")."""
+    subdomain, registrable, suffix = split_host(domain)
+    if not registrable:
+        return '', domain.lower(), ''
+    name = registrable[:len(registrable) - len(suffix) - 1] if suffix else registrable
+    return (subdomain + '.' if subdomain else ''), name, ('.' + suffix if suffix else '')
+
+
+def _mutate_name(domain: str, mutate: Callable[[str], Iterable[str]]) -> Iterator[str]:
+    prefix, name, suffix = _split_name(domain)
+    for variant in mutate(name):
+        if variant != name and variant and variant[0] != '-' and variant[-1] != '-':
+            yield prefix + variant + suffix
+
+
+def keyboard_adjacent_domains(domain: str) -> Iterator[str]:
+    """Each character replaced by a neighbouring key (gopgle.com)."""
+    def mutate(name):
+        for i, char in enumerate(name):
+            for near in KEYBOARD_NEIGHBOURS.get(char, ''):
+                yield name[:i] + near + name[i+1:]
+    return _mutate_name(domain, mutate)
+
+
+def bitsquat_domains(domain: str) -> Iterator[str]:
+    """Each character with one bit flipped, kept if still a hostname
+    character (googme.com); models memory and transmission errors."""
+    def mutate(name):
+        for i, char in enumerate(name):
+            code = ord(char)
+            for bit in range(8):
+                flipped = chr(code ^ (1 << bit))
+                if flipped in HOSTNAME_CHARS:
+                    yield name[:i] + flipped + name[i+1:]
+    return _mutate_name(domain, mutate)
+
+
+def vowel_swap_domains(domain: str) -> Iterator[str]:
+    """Each vowel replaced by another vowel (gougle.com)."""
+    def mutate(name):
+        for i, char in enumerate(name):
+            if char in VOWELS:
+                for vowel in VOWELS:
+                    yield name[:i] + vowel + name[i+1:]
+    return _mutate_name(domain, mutate)
+
+
+def repetition_domains(domain: str) -> Iterator[str]:
+    """Each character doubled (gooogle.com)."""
+    def mutate(name):
+        for i, char in enumerate(name):
+            if char != '-':
+                yield name[:i] + char + name[i:]
+    return _mutate_name(domain, mutate)
+
+
+def hyphenation_domains(domain: str) -> Iterator[str]:
+    """A hyphen inserted between two characters (goo-gle.com)."""
+    def mutate(name):
+        for i in range(1, len(name)):
+            if name[i - 1] != '-' and name[i] != '-':
+                yield name[:i] + '-' + name[i:]
+    return _mutate_name(domain, mutate)
+
+
+def tld_swap_domains(domain: str, tlds: Sequence[str] = SWAP_TLDS) -> Iterator[str]:
+    """The public suffix replaced by another TLD (google.xyz)."""
+    prefix, name, suffix = _split_name(domain)
+    for tld in tlds:
+        if '.' + tld != suffix:
+            yield prefix + name + '.' + tld
+
+
+# Technique ids are stored in variant files; only append to this list.
+GENERATORS: Dict[str, Callable[[str], Iterable[str]]] = {
+    "keyboard": keyboard_adjacent_domains,
+    "bitsquat": bitsquat_domains,
+    "vowel-swap": vowel_swap_domains,
+    "repetition": repetition_domains,
+    "hyphenation": hyphenation_domains,
+    "tld-swap": tld_swap_domains,
+}
+
+
+def generate_variants(domain: str) -> Iterator[Tuple[str, str]]:
+    """Yields (variant, technique) pairs from every generator."""
+    for technique, generator in GENERATORS.items():
+        for variant in generator(domain):
+            yield variant, technique
+
+
+# File layout (little-endian): header, `count` sorted uint64 variant hashes,
+# `count` uint32 payloads (trusted id << 8 | technique id) in the same order,
+# then a JSON table naming the trusted domains and techniques.
+MAGIC = b'CDSV'
+VERSION = 1
+_HEADER = struct.Struct('<4sIQQQQQ')
+
+
+def build_variant_file(trusted_domains: Iterable[str], output) -> int:
+    """Writes the variant store for `trusted_domains` to a path or binary
+    file object; returns the number of (variant, trusted, technique) entries."""
+    check_byteorder()
+    trusted_domains = list(dict.fromkeys(trusted_domains))
+    techniques = list(GENERATORS)
+    trusted_set = {trusted.lower() for trusted in trusted_domains}
+
+    entries = set()
+    for trusted_id, trusted in enumerate(trusted_domains):
+        for variant, technique in generate_variants(trusted):
+            if variant not in trusted_set:
+                entries.add((domain_hash(variant),
+                             trusted_id << 8 | techniques.index(technique)))
+    entries = sorted(entries)
+
+    hashes = struct.pack(f'<{len(entries)}Q', *(h for h, _ in entries))
+    payloads = struct.pack(f'<{len(entries)}I', *(p for _, p in entries))
+    meta = json.dumps({"trusted": trusted_domains, "techniques": techniques}).encode('utf-8')
+    hashes_offset = _HEADER.size
+    payload_offset = hashes_offset + len(hashes)
+    meta_offset = payload_offset + len(payloads)
+
+    stream = open(output, 'wb') if isinstance(output, str) else output
+    try:
+        stream.write(_HEADER.pack(MAGIC, VERSION, len(entries), hashes_offset,
+                                  payload_offset, meta_offset, len(meta)))
+        stream.write(hashes)
+        stream.write(payloads)
+        stream.write(meta)
+    finally:
+        if stream is not output:
+            stream.close()
+    return len(entries)
+
+
+class VariantStore:
+    """Precomputed squatting variants of the trusted domains.
+
+    Only a 64-bit hash and a 32-bit payload are kept per variant, sorted by
+    hash, so the whole variant space costs 12 bytes an entry and a lookup is
+    one binary search. Open a prebuilt file with `open()` to memory-map it,
+    or `build()` one in memory.
+    """
+
+    def __init__(self, buffer):
+        check_byteorder()
+        self._buffer = buffer
+        (magic, version, self.count, hashes_offset, payload_offset,
+         meta_offset, meta_length) = _HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a squatting variant store")
+        view = memoryview(buffer)
+        self._hashes = view[hashes_offset:hashes_offset + self.count * 8].cast('Q')
+        self._payloads = view[payload_offset:payload_offset + self.count * 4].cast('I')
+        meta = json.loads(bytes(view[meta_offset:meta_offset + meta_length]))
+        self.trusted_domains: List[str] = meta["trusted"]
+        self.techniques: List[str] = meta["techniques"]
+
+    @classmethod
+    def open(cls, path: str) -> 'VariantStore':
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def build(cls, trusted_domains: Iterable[str]) -> 'VariantStore':
+        buffer = io.BytesIO()
+        build_variant_file(trusted_domains, buffer)
+        return cls(buffer.getvalue())
+
+    def lookup(self, domain: str) -> List[Tuple[str, str]]:
+        """Returns the (technique, trusted_domain) pairs producing `domain`."""
+        value = domain_hash(domain)
+        hashes = self._hashes
+        i = bisect.bisect_left(hashes, value)
+        hits = []
+        while i < self.count and hashes[i] == value:
+            payload = self._payloads[i]
+            hits.append((self.techniques[payload & 0xFF], self.trusted_domains[payload >> 8]))
+            i += 1
+        return hits
+
+    def __contains__(self, domain: str) -> bool:
+        value = domain_hash(domain)
+        i = bisect.bisect_left(self._hashes, value)
+        return i < self.count and self._hashes[i] == value
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        self._hashes.release()
+        self._payloads.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Build or query a squatting variant store.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="precompute variants of a trusted domain list")
+    build.add_argument('output', help="store file to write")
+    build.add_argument('trusted', nargs='?', default=None,
+                       help="file with one trusted domain per line "
+                            "(default: Auto_Phish_detect's TRUSTED_DOMAINS)")
+
+    check = commands.add_parser('check', help="look domains up in a store")
+    check.add_argument('store')
+    check.add_argument('domains', nargs='+')
+
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        if args.trusted is None:
+            try:
+                from .Auto_Phish_detect import TRUSTED_DOMAINS
+            except ImportError:  # executed as a standalone script
+                from Auto_Phish_detect import TRUSTED_DOMAINS
+            trusted = list(TRUSTED_DOMAINS)
+        else:
+            with open(args.trusted, encoding='utf-8') as f:
+                trusted = [line.strip() for line in f
+                           if line.strip() and not line.startswith('#')]
+        count = build_variant_file(trusted, args.output)
+        print(f"Wrote {count} variants of {len(set(trusted))} trusted domains to {args.output}")
+    else:
+        store = VariantStore.open(args.store)
+        for domain in args.domains:
+            hits = store.lookup(domain)
+            print(f"{domain}: " + (', '.join(f"{technique} of {trusted}"
+                                            for technique, trusted in hits) or "no match"))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,263 @@
 import ssl
 import socket
+import functools
+import hashlib
 import logging
+import threading
+import time
 from urllib.parse import urlparse
 from datetime import datetime
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 import ipaddress
 
+from cryptography import x509
+from cryptography.x509.oid import AuthorityInformationAccessOID, ExtensionOID, NameOID
+
 # Set up logging configuration
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s [%(levelname)s] %(message)s')
 
 
+def decode_der_certificate(der_cert):
+    """Decodes a DER certificate into the dict getpeercert() returns.
+
+    getpeercert() only fills that dict for verified connections; this
+    recovers it for certificates captured with CERT_NONE, which are
+    exactly the ones worth inspecting. Returns {} if it cannot decode.
+    """
+    if not der_cert:
+        return {}
+    # Shared hosting serves one certificate for many hosts; decode it once.
+    return dict(_decode_der(bytes(der_cert)))
+
+
+def certificate_fingerprint(der_cert):
+    """Hex SHA-256 of the DER certificate, as browsers and CT logs show it."""
+    return hashlib.sha256(der_cert).hexdigest() if der_cert else None
+
+
+# Attribute names as getpeercert() (OpenSSL) reports them; others keep
+# their dotted OID, as OpenSSL prints unknown attributes.
+_NAME_ATTRIBUTES = {
+    NameOID.COUNTRY_NAME: 'countryName',
+    NameOID.STATE_OR_PROVINCE_NAME: 'stateOrProvinceName',
+    NameOID.LOCALITY_NAME: 'localityName',
+    NameOID.STREET_ADDRESS: 'streetAddress',
+    NameOID.POSTAL_CODE: 'postalCode',
+    NameOID.ORGANIZATION_NAME: 'organizationName',
+    NameOID.ORGANIZATIONAL_UNIT_NAME: 'organizationalUnitName',
+    NameOID.COMMON_NAME: 'commonName',
+    NameOID.SERIAL_NUMBER: 'serialNumber',
+    NameOID.EMAIL_ADDRESS: 'emailAddress',
+    NameOID.DOMAIN_COMPONENT: 'domainComponent',
+    NameOID.USER_ID: 'userId',
+    NameOID.GIVEN_NAME: 'givenName',
+    NameOID.SURNAME: 'surname',
+    NameOID.TITLE: 'title',
+    NameOID.BUSINESS_CATEGORY: 'businessCategory',
+    NameOID.JURISDICTION_COUNTRY_NAME: 'jurisdictionCountryName',
+    NameOID.JURISDICTION_STATE_OR_PROVINCE_NAME: 'jurisdictionStateOrProvinceName',
+    NameOID.JURISDICTION_LOCALITY_NAME: 'jurisdictionLocalityName',
+    x509.ObjectIdentifier('2.5.4.97'): 'organizationIdentifier',
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def _decode_der(der_cert):
+    try:
+        cert = x509.load_der_x509_certificate(der_cert)
+        decoded = {
+            'subject': _name_tuple(cert.subject),
+            'issuer': _name_tuple(cert.issuer),
+            'version': cert.version.value + 1,
+            'serialNumber': _serial_hex(cert.serial_number),
+            'notBefore': _cert_time(getattr(cert, 'not_valid_before_utc', None)
+                                    or cert.not_valid_before),
+            'notAfter': _cert_time(getattr(cert, 'not_valid_after_utc', None)
+                                   or cert.not_valid_after),
+        }
+        sans = _extension(cert, ExtensionOID.SUBJECT_ALTERNATIVE_NAME)
+        if sans is not None:
+            decoded['subjectAltName'] = tuple(_general_name(name) for name in sans)
+        access = _extension(cert, ExtensionOID.AUTHORITY_INFORMATION_ACCESS)
+        for method, key in ((AuthorityInformationAccessOID.OCSP, 'OCSP'),
+                            (AuthorityInformationAccessOID.CA_ISSUERS, 'caIssuers')):
+            urls = tuple(description.access_location.value for description in access or ()
+                         if description.access_method == method
+                         and isinstance(description.access_location,
+                                        x509.UniformResourceIdentifier))
+            if urls:
+                decoded[key] = urls
+        points = _extension(cert, ExtensionOID.CRL_DISTRIBUTION_POINTS)
+        urls = tuple(name.value for point in points or () for name in point.full_name or ()
+                     if isinstance(name, x509.UniformResourceIdentifier))
+        if urls:
+            decoded['crlDistributionPoints'] = urls
+        return decoded
+    except ValueError:  # not a parsable certificate
+        return {}
+
+
+def _extension(cert, oid):
+    """The extension's value; None when it is absent or malformed, since
+    a phishing site's broken extension should not hide its subject."""
+    try:
+        return cert.extensions.get_extension_for_oid(oid).value
+    except (x509.ExtensionNotFound, ValueError):
+        return None
+
+
+def _name_tuple(name):
+    return tuple(tuple((_NAME_ATTRIBUTES.get(attribute.oid, attribute.oid.dotted_string),
+                        str(attribute.value)) for attribute in rdn)
+                 for rdn in name.rdns)
+
+
+def _serial_hex(serial):
+    digits = format(serial, 'X')
+    return digits if len(digits) % 2 == 0 else '0' + digits
+
+
+def _cert_time(moment):
+    # OpenSSL's format, which ssl.cert_time_to_seconds() parses.
+    return f"{moment:%b} {moment.day:2d} {moment:%H:%M:%S %Y} GMT"
+
+
+def _general_name(name):
+    if isinstance(name, x509.DNSName):
+        return ('DNS', name.value)
+    if isinstance(name, x509.IPAddress):
+        if name.value.version == 6:
+            # OpenSSL writes every group, in upper case without leading zeros.
+            return ('IP Address', ':'.join(format(int(group, 16), 'X')
+                                           for group in name.value.exploded.split(':')))
+        return ('IP Address', str(name.value))
+    if isinstance(name, x509.RFC822Name):
+        return ('email', name.value)
+    if isinstance(name, x509.UniformResourceIdentifier):
+        return ('URI', name.value)
+    if isinstance(name, x509.DirectoryName):
+        return ('DirName', _name_tuple(name.value))
+    if isinstance(name, x509.RegisteredID):
+        return ('Registered ID', name.value.dotted_string)
+    return ('othername', '<unsupported>')
+
+
+class CertificateCache:
+    """Parsed certificates by (host, port), bounded by age and count.
+
+    Phishing campaigns share hosting, so the same certificate is requested
+    over and over; entries hold the handshake's parsed details, so a hit
+    needs neither a connection nor a parse.
+    """
+
+    def __init__(self, ttl=3600, max_entries=4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0}
+
+    def get(self, host, port):
+        key = (host.lower(), port)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self._stats['expired'] += 1
+                entry = None
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[1]
+
+    def put(self, host, port, details):
+        key = (host.lower(), port)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, details)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evicted'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries))
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+# Shared by every analyzer in the process.
+certificate_cache = CertificateCache()
+
+
 class SSLCertificateAnalyzer:
-    def __init__(self):
-        pass
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else certificate_cache
 
-    def analyze_certificate(self, url, tls_check=False):
-        
-        result = {
+    def cache_stats(self):
+        """Hit/miss/expiry/eviction counters of the certificate cache."""
+        return self.cache.stats()
+
+    def analyze_certificate(self, url, tls_check=False, fetch_context=None):
+        """Analyzes the certificate served for `url`. With a FetchContext
+        the certificate captured by its fetch is used instead of opening
+        another TLS connection."""
+        try:
+            hostname, port = self.target(url)
+            result = self.cached_analysis(hostname, port, tls_check)
+            if result is not None:
+                return result
+            if fetch_context is not None:
+                cert_info = self._certificate_from_context(fetch_context)
+            else:
+                cert_info = self._fetch_certificate(hostname, self.shared_context(), port)
+            return self._analyze_certificate_info(hostname, port, cert_info, tls_check)
+        except Exception as e:
+            return self.error_result(e)
+
+    def target(self, url):
+        """(hostname, port) whose certificate analyze_certificate inspects
+        for `url`; raises ValueError when the URL has no hostname."""
+        parsed_url = self._validate_url(url)
+        return parsed_url.hostname, self.port_for(parsed_url)
+
+    def cached_analysis(self, hostname, port, tls_check=False):
+        """The analysis result from the certificate cache, or None when the
+        certificate still has to be fetched."""
+        details = self.cache.get(hostname, port)
+        if details is None:
+            return None
+        return self.build_result(hostname, details, tls_check)
+
+    def analyze_connection(self, hostname, port, tls_object, tls_check=False):
+        """Analyzes the certificate presented on an established TLS
+        connection (an ssl.SSLSocket, or the ssl.SSLObject of an asyncio
+        stream) and caches its parsed details."""
+        der = tls_object.getpeercert(binary_form=True)
+        cert_info = None
+        if der:
+            cert_info = self._certificate_info(decode_der_certificate(der), tls_object.version(),
+                                               tls_object.cipher(), der)
+        return self._analyze_certificate_info(hostname, port, cert_info, tls_check)
+
+    def _analyze_certificate_info(self, hostname, port, cert_info, tls_check):
+        if not cert_info:
+            return self.build_result(hostname, None, tls_check)
+        details = self._parse_certificate_details(cert_info)
+        self.cache.put(hostname, port, details)
+        return self.build_result(hostname, details, tls_check)
+
+    @staticmethod
+    def new_result():
+        return {
             'certificate_valid': False,
             'hostname_match': False,
             'tls_valid': False,
@@ -26,55 +266,57 @@ class SSLCertificateAnalyzer:
             'error': None
         }
 
-        try:
-            parsed_url = self._validate_url(url)
-            if not parsed_url:
-                result['error'] = "Invalid URL format"
-                result['validation_score'] = 0.7
-                return result
+    @staticmethod
+    def port_for(parsed_url):
+        return parsed_url.port if parsed_url.scheme == 'https' and parsed_url.port else 443
 
-            context = self._create_ssl_context()
-            cert_info = self._fetch_certificate(parsed_url.hostname, context)
-
-            if not cert_info:
-                result['error'] = "No certificate retrieved"
-                result['validation_score'] = 0.9
-                return result
+    def build_result(self, hostname, details, tls_check=False):
+        """The analysis result for parsed certificate details (None when
+        the server presented no certificate)."""
+        result = self.new_result()
+        if details is None:
+            result['error'] = "No certificate retrieved"
+            result['validation_score'] = 0.9
+            return result
+
+        # Process certificate details; the cached dict stays untouched.
+        result['cert_details'] = dict(details)
+        result['cert_details']['validity_status'] = self._check_validity(details['validity'])
+        result['hostname_match'] = self._check_hostname_match(
+            hostname,
+            result['cert_details']['subject'],
+            result['cert_details']['extensions'].get('subjectAltName', [])
+        )
+
+        # TLS version check
+        tls_status = self._check_tls_version(
+            details['tls_version'], tls_check)
+        result['tls_valid'] = tls_status['valid']
+        if tls_status['message']:
+            result['cert_details']['tls_warning'] = tls_status['message']
+
+        # Calculate final validation score
+        result['certificate_valid'] = result['hostname_match'] and result['tls_valid']
+        result['validation_score'] = self._calculate_score(
+            result['hostname_match'],
+            result['tls_valid'],
+            result['cert_details']['validity_status']
+        )
+        return result
 
-            # Process certificate details
-            result['cert_details'] = self._parse_certificate_details(cert_info)
-            result['hostname_match'] = self._check_hostname_match(
-                parsed_url.hostname,
-                result['cert_details']['subject'],
-                result['cert_details']['extensions'].get('subjectAltName', [])
-            )
-
-            # TLS version check
-            tls_status = self._check_tls_version(
-                cert_info['tls_version'], tls_check)
-            result['tls_valid'] = tls_status['valid']
-            if tls_status['message']:
-                result['cert_details']['tls_warning'] = tls_status['message']
-
-            # Calculate final validation score
-            result['certificate_valid'] = result['hostname_match'] and result['tls_valid']
-            result['validation_score'] = self._calculate_score(
-                result['hostname_match'],
-                result['tls_valid'],
-                result['cert_details']['validity_status']
-            )
-
-        except (socket.timeout, socket.gaierror) as e:
-            result['error'] = f"Connection error: {str(e)}"
+    def error_result(self, error):
+        """The analysis result for a failed certificate fetch."""
+        result = self.new_result()
+        if isinstance(error, (socket.timeout, socket.gaierror)):
+            result['error'] = f"Connection error: {str(error)}"
             result['validation_score'] = 0.9
-        except ssl.SSLError as e:
-            result['error'] = f"SSL error: {str(e)}"
+        elif isinstance(error, ssl.SSLError):
+            result['error'] = f"SSL error: {str(error)}"
             result['validation_score'] = 0.9
-        except Exception as e:
-            result['error'] = f"Unexpected error: {str(e)}"
+        else:
+            result['error'] = f"Unexpected error: {str(error)}"
             result['validation_score'] = 0.5
-            logging.exception("Unexpected error occurred")
-
+            logging.error("Unexpected error occurred", exc_info=error)
         return result
 
     def _validate_url(self, url):
@@ -98,7 +340,18 @@ class SSLCertificateAnalyzer:
 
         return parsed
 
-    def _create_ssl_context(self):
+    _context = None
+
+    @classmethod
+    def shared_context(cls):
+        """The unverified client context certificates are fetched with.
+        Loading the CA store makes contexts costly to build; one serves all."""
+        if cls._context is None:
+            cls._context = cls._create_ssl_context()
+        return cls._context
+
+    @staticmethod
+    def _create_ssl_context():
         """Create SSL context with modern security settings."""
         context = ssl.create_default_context()
         context.check_hostname = False
@@ -106,26 +359,45 @@ class SSLCertificateAnalyzer:
         context.options |= ssl.OP_NO_SSLv2 | ssl.OP_NO_SSLv3 | ssl.OP_NO_TLSv1 | ssl.OP_NO_TLSv1_1
         return context
 
-    def _fetch_certificate(self, hostname, context):
+    def _fetch_certificate(self, hostname, context, port=443):
         """Retrieve SSL certificate details from server."""
         try:
-            with socket.create_connection((hostname, 443), timeout=10) as sock:
+            with socket.create_connection((hostname, port), timeout=10) as sock:
                 with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                    return {
-                        'cert': ssock.getpeercert(),
-                        'tls_version': ssock.version(),
-                        'cipher': ssock.cipher(),
-                        'issuer': ssock.getpeercert().get('issuer', []),
-                        'subject': ssock.getpeercert().get('subject', []),
-                        'san': self._get_subject_alt_names(ssock.getpeercert()),
-                        'valid_from': ssock.getpeercert().get('notBefore'),
-                        'valid_to': ssock.getpeercert().get('notAfter'),
-                        'serial': ssock.getpeercert().get('serialNumber', '')
-                    }
+                    # Unverified handshakes leave getpeercert() empty, so the
+                    # DER certificate is read once and decoded here.
+                    der = ssock.getpeercert(binary_form=True)
+                    return self._certificate_info(decode_der_certificate(der), ssock.version(),
+                                                  ssock.cipher(), der)
         except Exception as e:
             logging.error("Connection failed: %s", str(e))
             raise
 
+    def _certificate_from_context(self, fetch_context):
+        """Builds the _fetch_certificate result from a FetchContext."""
+        if fetch_context.peer_cert_der is None:
+            if fetch_context.tls_error is not None:
+                raise fetch_context.tls_error
+            return None
+        return self._certificate_info(fetch_context.peer_cert,
+                                      fetch_context.tls_version,
+                                      fetch_context.cipher,
+                                      fetch_context.peer_cert_der)
+
+    def _certificate_info(self, cert, tls_version, cipher, der=None):
+        return {
+            'fingerprint_sha256': certificate_fingerprint(der),
+            'cert': cert,
+            'tls_version': tls_version,
+            'cipher': cipher,
+            'issuer': cert.get('issuer', []),
+            'subject': cert.get('subject', []),
+            'san': self._get_subject_alt_names(cert),
+            'valid_from': cert.get('notBefore'),
+            'valid_to': cert.get('notAfter'),
+            'serial': cert.get('serialNumber', '')
+        }
+
     def _parse_certificate_details(self, cert_info):
         """Parse raw certificate information into structured format."""
         details = {
@@ -140,7 +412,8 @@ class SSLCertificateAnalyzer:
                 cert_info['valid_from'],
                 cert_info['valid_to']
             ),
-            'serial_number': self._parse_serial(cert_info['serial'])
+            'serial_number': self._parse_serial(cert_info['serial']),
+            'fingerprint_sha256': cert_info.get('fingerprint_sha256'),
         }
         details['validity_status'] = self._check_validity(details['validity'])
         return details
@@ -0,0 +1,214 @@
+import argparse
+import asyncio
+import json
+import queue
+import socket
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from .ssl_mismatch_detector import SSLCertificateAnalyzer
+except ImportError:  # executed as a standalone script
+    from ssl_mismatch_detector import SSLCertificateAnalyzer
+
+ScanResult = Tuple[str, Dict]
+
+
+class TLSScanner:
+    """Concurrent certificate scanner producing analyze_certificate() results.
+
+    Handshakes run on one event loop, at most `concurrency` at a time, each
+    bounded by `timeout` and the whole scan by `deadline`, so thousands of
+    hosts take seconds instead of one blocking connection after another.
+    Hosts are read from the input only as slots free up, so memory stays
+    bounded however long the input is; repeats are skipped while they are
+    among the last `dedupe_window` distinct hosts. Certificates go through
+    the analyzer's cache and parsing, so results match
+    SSLCertificateAnalyzer.analyze_certificate exactly.
+
+    After each scan `stats` holds how many hosts were scanned, how many
+    were cut off mid-handshake by the deadline, and whether input was
+    left unread.
+    """
+
+    def __init__(self, concurrency: int = 500, timeout: float = 5.0, deadline: float = 300.0,
+                 tls_check: bool = False, resolver_threads: int = 64,
+                 analyzer: Optional[SSLCertificateAnalyzer] = None,
+                 dedupe_window: int = 100000):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.deadline = deadline
+        self.tls_check = tls_check
+        # getaddrinfo blocks; a pool of this size resolves in parallel.
+        self.resolver_threads = resolver_threads
+        self.analyzer = analyzer or SSLCertificateAnalyzer()
+        self.dedupe_window = dedupe_window
+        self.stats = {'scanned': 0, 'timed_out': 0, 'input_left': False}
+
+    async def _handshake(self, hostname: str, port: int,
+                         resolver: ThreadPoolExecutor) -> Dict:
+        loop = asyncio.get_running_loop()
+        infos = await loop.run_in_executor(resolver, socket.getaddrinfo, hostname, port,
+                                           0, socket.SOCK_STREAM)
+        writer = None
+        last_error: Optional[OSError] = None
+        # Addresses in resolver order, as socket.create_connection tries them.
+        for info in infos:
+            try:
+                _, writer = await asyncio.open_connection(
+                    info[4][0], port, ssl=self.analyzer.shared_context(),
+                    server_hostname=hostname)
+                break
+            except OSError as e:
+                last_error = e
+        if writer is None:
+            raise last_error or OSError(f"No addresses for {hostname}")
+        try:
+            return self.analyzer.analyze_connection(
+                hostname, port, writer.get_extra_info('ssl_object'), self.tls_check)
+        finally:
+            writer.close()
+
+    async def _scan_one(self, url: str, resolver: ThreadPoolExecutor) -> ScanResult:
+        analyzer = self.analyzer
+        try:
+            hostname, port = analyzer.target(url)
+            result = analyzer.cached_analysis(hostname, port, self.tls_check)
+            if result is None:
+                try:
+                    result = await asyncio.wait_for(
+                        self._handshake(hostname, port, resolver), self.timeout)
+                except asyncio.TimeoutError:
+                    raise socket.timeout('timed out') from None
+            return url, result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return url, analyzer.error_result(e)
+
+    def _distinct(self, hosts: Iterable[str]) -> Iterator[str]:
+        recent: 'OrderedDict[str, None]' = OrderedDict()
+        for host in hosts:
+            url = host.strip()
+            if not url:
+                continue
+            if url in recent:
+                recent.move_to_end(url)
+                continue
+            recent[url] = None
+            if len(recent) > self.dedupe_window:
+                recent.popitem(last=False)
+            yield url
+
+    async def iter_scan(self, hosts: Iterable[str]) -> AsyncIterator[ScanResult]:
+        """Yields (host, result) per distinct host as handshakes complete;
+        hosts mid-handshake at the deadline come last, as connection
+        errors. No input is read after the deadline."""
+        stats = self.stats = {'scanned': 0, 'timed_out': 0, 'input_left': False}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        resolver = ThreadPoolExecutor(self.resolver_threads, thread_name_prefix='tls-scan-dns')
+        urls = self._distinct(hosts)
+        in_flight: Dict[asyncio.Future, str] = {}
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(in_flight) < self.concurrency:
+                    url = next(urls, None)
+                    if url is None:
+                        exhausted = True
+                    else:
+                        in_flight[asyncio.ensure_future(self._scan_one(url, resolver))] = url
+                remaining = deadline - loop.time()
+                if not in_flight or remaining <= 0:
+                    break
+                done, _ = await asyncio.wait(in_flight, timeout=remaining,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    del in_flight[task]
+                    stats['scanned'] += 1
+                    yield task.result()
+        finally:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            resolver.shutdown(wait=False, cancel_futures=True)
+
+        stats['timed_out'] = len(in_flight)
+        stats['input_left'] = not exhausted
+        error = TimeoutError(f"scan deadline of {self.deadline}s exceeded")
+        for url in in_flight.values():
+            yield url, self.analyzer.error_result(error)
+
+    def scan(self, hosts: Iterable[str]) -> Iterator[ScanResult]:
+        """Synchronous iter_scan: the event loop runs in a helper thread and
+        results are handed over as they complete."""
+        results: 'queue.Queue' = queue.Queue()
+        done = object()
+
+        async def pump():
+            async for item in self.iter_scan(hosts):
+                results.put(item)
+
+        def run():
+            try:
+                asyncio.run(pump())
+            except Exception as e:
+                results.put(e)
+            finally:
+                results.put(done)
+
+        threading.Thread(target=run, name='tls-scan-loop', daemon=True).start()
+        while True:
+            item = results.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+def read_hosts(paths: List[str]) -> Iterator[str]:
+    for path in paths:
+        stream = sys.stdin if path == '-' else open(path, encoding='utf-8', errors='replace')
+        try:
+            for line in stream:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    yield line
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Scan hosts' TLS certificates concurrently; prints JSON lines.")
+    parser.add_argument('inputs', nargs='*', default=['-'],
+                        help="files with one host or URL per line ('-' for stdin)")
+    parser.add_argument('--concurrency', type=int, default=500)
+    parser.add_argument('--timeout', type=float, default=5.0, help="per-handshake seconds")
+    parser.add_argument('--deadline', type=float, default=300.0, help="whole-scan seconds")
+    parser.add_argument('--tls-check', action='store_true')
+    args = parser.parse_args(argv)
+
+    scanner = TLSScanner(args.concurrency, args.timeout, args.deadline, args.tls_check)
+    start = time.perf_counter()
+    count = 0
+    for host, result in scanner.scan(read_hosts(args.inputs)):
+        print(json.dumps({'host': host, **result}, default=str))
+        count += 1
+    print(f"Scanned {count} hosts in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    stats = scanner.stats
+    if stats['timed_out'] or stats['input_left']:
+        print(f"Deadline reached: {stats['timed_out']} hosts timed out mid-handshake"
+              + ("; the rest of the input was not read" if stats['input_left'] else ""),
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
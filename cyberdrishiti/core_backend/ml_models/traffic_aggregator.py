@@ -0,0 +1,433 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+# Snapshots live in one SQLite file (domain -> the JSON `traffic_data` dict
+# that domain_behavior_analyzer.PhishingDetector.analyze_traffic consumes),
+# so the long-running ingester and the Django workers only share a file, and
+# a worker reads the one row it needs instead of parsing every domain.
+SNAPSHOT_VERSION = 2
+RELOAD_INTERVAL = 5.0  # seconds between snapshot mtime checks
+
+DOMAIN_KEYS = ('domain', 'host', 'server_name', 'vhost', 'sni')
+TIME_KEYS = ('timestamp', 'ts', 'time', '@timestamp')
+LOCATION_KEYS = ('country', 'geo', 'location', 'src_country', 'country_code')
+STATUS_KEYS = ('status', 'status_code')
+
+# Apache/nginx "vhost_combined": host[:port] client - user [time] "request" status ...
+_VHOST_LOG = re.compile(r'^(?P<host>\S+) \S+ \S+ \S+ \[(?P<time>[^\]]+)\] "[^"]*" (?P<status>\d{3}|-)')
+
+
+class TrafficRecord(NamedTuple):
+    timestamp: float
+    domain: str
+    location: Optional[str] = None
+    failed: bool = False
+
+
+def normalize_host(host: str) -> str:
+    host = host.strip().lower()
+    if host.startswith('['):  # [v6]:port
+        return host[1:host.find(']')] if ']' in host else host
+    if host.count(':') == 1:
+        host = host.split(':', 1)[0]
+    return host.rstrip('.')
+
+
+class SpaceSaving:
+    """Space-Saving top-k sketch (Metwally et al.): at most k counters,
+    over-estimating a tracked item's count by at most the smallest
+    counter."""
+
+    __slots__ = ('k', 'counts')
+
+    def __init__(self, k: int):
+        self.k = k
+        self.counts: Dict[str, float] = {}
+
+    def add(self, item: str, count: float = 1):
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+        elif len(counts) < self.k:
+            counts[item] = count
+        else:
+            victim = min(counts, key=counts.__getitem__)
+            counts[item] = counts.pop(victim) + count
+
+    def merge(self, other: 'SpaceSaving'):
+        for item, count in other.counts.items():
+            self.add(item, count)
+
+    def decay(self, factor: float):
+        for item in self.counts:
+            self.counts[item] *= factor
+
+    def top(self, n: Optional[int] = None) -> List[str]:
+        return sorted(self.counts, key=self.counts.__getitem__, reverse=True)[:n]
+
+
+class DomainTraffic:
+    """Per-domain state: request counts for the current and the last
+    completed bucket, an EWMA baseline of the buckets before those, and
+    location sketches for the same windows.
+
+    The baseline trails by one bucket so a spike in the last bucket is
+    compared against the traffic before it, not diluted into it.
+    """
+
+    __slots__ = ('bucket', 'buckets_seen', 'baseline', 'current', 'current_failed',
+                 'current_geo', 'last', 'last_failed', 'last_geo', 'top_geo')
+
+    def __init__(self, bucket: int, top_k: int):
+        self.bucket = bucket
+        self.buckets_seen = 0
+        self.baseline: Optional[float] = None
+        self.current = self.current_failed = 0
+        self.current_geo = SpaceSaving(top_k)
+        self.last: Optional[int] = None
+        self.last_failed = 0
+        self.last_geo = SpaceSaving(top_k)
+        self.top_geo = SpaceSaving(top_k)
+
+    def add(self, record: TrafficRecord):
+        self.current += 1
+        if record.failed:
+            self.current_failed += 1
+        if record.location:
+            self.current_geo.add(record.location)
+
+    def advance(self, bucket: int, alpha: float):
+        elapsed = bucket - self.bucket
+        if elapsed <= 0:
+            return
+        for _ in range(min(elapsed, 2)):
+            self._fold(alpha)
+        if elapsed > 2:
+            # Idle buckets: the folds would only have added zeros.
+            factor = (1 - alpha) ** (elapsed - 2)
+            if self.baseline is not None:
+                self.baseline *= factor
+            self.top_geo.decay(factor)
+            self.buckets_seen += elapsed - 2
+        self.bucket = bucket
+
+    def _fold(self, alpha: float):
+        if self.last is not None:
+            if self.baseline is None:
+                self.baseline = float(self.last)
+            else:
+                self.baseline += alpha * (self.last - self.baseline)
+            self.top_geo.decay(1 - alpha)
+            self.top_geo.merge(self.last_geo)
+            self.buckets_seen += 1
+        # Recycle the folded bucket's sketch as the new current one.
+        recycled = self.last_geo
+        recycled.counts.clear()
+        self.last, self.last_failed, self.last_geo = (self.current, self.current_failed,
+                                                      self.current_geo)
+        self.current = self.current_failed = 0
+        self.current_geo = recycled
+
+    def traffic_data(self, warmup: int, min_baseline: float) -> Dict:
+        recent = self.current + (self.last or 0)
+        warmed_up = self.baseline is not None and self.buckets_seen >= warmup
+        current_geo = self.current_geo if self.current_geo.counts else self.last_geo
+        return {
+            # 0 until there is enough history: analyze_traffic then never flags a spike.
+            'avg_traffic': max(self.baseline, min_baseline) if warmed_up else 0,
+            'current_traffic': max(self.current, self.last or 0),
+            'failed_connections': ((self.current_failed + self.last_failed) / recent
+                                   if recent else 0.0),
+            'top_locations': self.top_geo.top() if warmed_up else [],
+            'current_locations': current_geo.top(),
+        }
+
+
+class TrafficAggregator:
+    """Bounded-memory streaming aggregation of traffic records by domain.
+
+    Time is split into `bucket_seconds` buckets and taken from the records
+    themselves, so replaying old logs gives the same result as live
+    ingestion. At most `max_domains` domains are tracked; the least
+    recently seen are dropped first. Each domain costs O(top_k) memory.
+    """
+
+    def __init__(self, bucket_seconds: float = 60, alpha: float = 0.1,
+                 max_domains: int = 100_000, top_k: int = 8, warmup: int = 5,
+                 min_baseline: float = 1.0):
+        self.bucket_seconds = bucket_seconds
+        self.alpha = alpha
+        self.max_domains = max_domains
+        self.top_k = top_k
+        self.warmup = warmup
+        self.min_baseline = min_baseline
+        self.now_bucket = 0
+        self.records = 0
+        self._domains: 'OrderedDict[str, DomainTraffic]' = OrderedDict()
+
+    def add(self, record: TrafficRecord):
+        bucket = int(record.timestamp // self.bucket_seconds)
+        self.now_bucket = max(self.now_bucket, bucket)
+        state = self._domains.get(record.domain)
+        if state is None:
+            state = self._domains[record.domain] = DomainTraffic(self.now_bucket, self.top_k)
+            if len(self._domains) > self.max_domains:
+                self._domains.popitem(last=False)
+        else:
+            self._domains.move_to_end(record.domain)
+            state.advance(self.now_bucket, self.alpha)
+        state.add(record)
+        self.records += 1
+
+    def ingest(self, records: Iterable[TrafficRecord]) -> int:
+        count = 0
+        for record in records:
+            self.add(record)
+            count += 1
+        return count
+
+    def traffic_data(self, domain: str) -> Dict:
+        state = self._domains.get(normalize_host(domain))
+        if state is None:
+            return {}
+        state.advance(self.now_bucket, self.alpha)
+        return state.traffic_data(self.warmup, self.min_baseline)
+
+    def __len__(self):
+        return len(self._domains)
+
+    def write_snapshot(self, path: str):
+        """Atomically replaces `path`, so readers never see a partial file."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.traffic-', suffix='.sqlite3')
+        os.close(fd)
+        try:
+            db = sqlite3.connect(tmp_path)
+            try:
+                db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+                db.execute("CREATE TABLE traffic (domain TEXT PRIMARY KEY, data TEXT NOT NULL)"
+                           " WITHOUT ROWID")
+                db.executemany("INSERT INTO meta VALUES (?, ?)", [
+                    ('version', str(SNAPSHOT_VERSION)),
+                    ('generated_at', str(time.time())),
+                    ('bucket_seconds', str(self.bucket_seconds)),
+                ])
+                db.executemany("INSERT INTO traffic VALUES (?, ?)", (
+                    (domain, json.dumps(self.traffic_data(domain), separators=(',', ':')))
+                    for domain in list(self._domains)))
+                db.commit()
+            finally:
+                db.close()
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class TrafficSnapshot:
+    """Read side of a snapshot file: one indexed row per domain lookup,
+    reopened when the ingester replaces the file."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._mtime: Optional[tuple] = None
+        self._checked: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _maybe_reopen(self):
+        now = time.monotonic()
+        if self.path is None or (self._checked is not None
+                                 and now - self._checked < RELOAD_INTERVAL):
+            return
+        self._checked = now
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._close()
+            return
+        # A replaced file has a new inode even within one mtime tick.
+        mtime = (stat.st_ino, stat.st_mtime)
+        if mtime == self._mtime:
+            return
+        try:
+            db = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True,
+                                 check_same_thread=False)
+            db.execute("SELECT 1 FROM traffic LIMIT 1")
+        except sqlite3.Error:
+            return  # keep serving the previous snapshot
+        self._close()
+        # The open connection keeps reading the file it opened even after
+        # the ingester replaces it, so every lookup sees one snapshot.
+        self._db, self._mtime = db, mtime
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+        self._db, self._mtime = None, None
+
+    def traffic_data(self, domain: str) -> Dict:
+        with self._lock:
+            self._maybe_reopen()
+            if self._db is None:
+                return {}
+            row = self._db.execute("SELECT data FROM traffic WHERE domain = ?",
+                                   (normalize_host(domain),)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+
+_snapshots: Dict[Optional[str], TrafficSnapshot] = {}
+_snapshots_pid: Optional[int] = None
+
+
+def load_traffic_snapshot(path) -> TrafficSnapshot:
+    """Returns the per-process reader for `path` (None reads as empty).
+    Readers are not shared across a fork: SQLite connections must not be."""
+    global _snapshots, _snapshots_pid
+    if _snapshots_pid != os.getpid():
+        _snapshots, _snapshots_pid = {}, os.getpid()
+    path = os.fspath(path) if path is not None else None
+    snapshot = _snapshots.get(path)
+    if snapshot is None:
+        snapshot = _snapshots[path] = TrafficSnapshot(path)
+    return snapshot
+
+
+def _first(row: Dict, keys) -> Optional[str]:
+    for key in keys:
+        value = row.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _parse_time(value) -> float:
+    if value is None:
+        return time.time()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+
+def record_from_row(row: Dict) -> Optional[TrafficRecord]:
+    """A record from a JSON or CSV flow row; None if it names no domain."""
+    domain = _first(row, DOMAIN_KEYS)
+    if not domain:
+        return None
+    status = _first(row, STATUS_KEYS)
+    failed = row.get('failed')
+    if failed is None:
+        try:
+            failed = status is not None and int(status) >= 400
+        except (TypeError, ValueError):
+            failed = False
+    elif isinstance(failed, str):
+        failed = failed.strip().lower() in ('1', 'true', 'yes')
+    location = _first(row, LOCATION_KEYS)
+    return TrafficRecord(_parse_time(_first(row, TIME_KEYS)), normalize_host(str(domain)),
+                         str(location).upper() if location else None, bool(failed))
+
+
+def _log_records(lines: Iterable[str]) -> Iterator[TrafficRecord]:
+    last_time, last_ts = None, 0.0
+    for line in lines:
+        match = _VHOST_LOG.match(line)
+        if not match:
+            continue
+        raw_time = match.group('time')
+        if raw_time != last_time:  # consecutive lines mostly share a second
+            try:
+                last_ts = datetime.strptime(raw_time, '%d/%b/%Y:%H:%M:%S %z').timestamp()
+            except ValueError:
+                continue
+            last_time = raw_time
+        status = match.group('status')
+        yield TrafficRecord(last_ts, normalize_host(match.group('host')), None,
+                            status != '-' and int(status) >= 400)
+
+
+def read_records(stream, fmt: str) -> Iterator[TrafficRecord]:
+    """Streams records from access logs ('log'), JSON lines or CSV."""
+    if fmt == 'log':
+        yield from _log_records(stream)
+        return
+    rows = csv.DictReader(stream) if fmt == 'csv' else (
+        json.loads(line) for line in stream if line.strip())
+    for row in rows:
+        try:
+            record = record_from_row(row)
+        except (ValueError, AttributeError):
+            continue
+        if record is not None:
+            yield record
+
+
+def _detect_format(path: str) -> str:
+    if path.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return 'csv' if path.endswith('.csv') else 'log'
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Aggregate traffic records into per-domain rates and locations.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help="stream records and keep a snapshot file current")
+    ingest.add_argument('snapshot', help="snapshot file the analyzers read")
+    ingest.add_argument('inputs', nargs='*', default=['-'],
+                        help="access logs, JSONL or CSV flow files ('-' for stdin)")
+    ingest.add_argument('--format', choices=('auto', 'log', 'jsonl', 'csv'), default='auto',
+                        help="'auto' goes by extension; stdin defaults to 'log'")
+    ingest.add_argument('--bucket-seconds', type=float, default=60)
+    ingest.add_argument('--alpha', type=float, default=0.1, help="EWMA weight of a new bucket")
+    ingest.add_argument('--max-domains', type=int, default=100_000)
+    ingest.add_argument('--top-k', type=int, default=8)
+    ingest.add_argument('--interval', type=float, default=30,
+                        help="seconds between snapshot writes while ingesting")
+
+    show = commands.add_parser('show', help="print domains' traffic data from a snapshot")
+    show.add_argument('snapshot')
+    show.add_argument('domains', nargs='+')
+
+    args = parser.parse_args(argv)
+    if args.command == 'show':
+        snapshot = load_traffic_snapshot(args.snapshot)
+        for domain in args.domains:
+            print(domain, json.dumps(snapshot.traffic_data(domain)))
+        return
+
+    aggregator = TrafficAggregator(args.bucket_seconds, args.alpha, args.max_domains, args.top_k)
+    next_write = time.monotonic() + args.interval
+    for path in args.inputs:
+        fmt = args.format if args.format != 'auto' else _detect_format(path)
+        stream = sys.stdin if path == '-' else open(path, encoding='utf-8', errors='replace',
+                                                    newline='')
+        try:
+            for record in read_records(stream, fmt):
+                aggregator.add(record)
+                if time.monotonic() >= next_write:
+                    aggregator.write_snapshot(args.snapshot)
+                    next_write = time.monotonic() + args.interval
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+    aggregator.write_snapshot(args.snapshot)
+    print(f"Aggregated {aggregator.records} records for {len(aggregator)} domains "
+          f"into {args.snapshot}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def damerau_levenshtein(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """Optimal string alignment distance between two strings.
+
+    Counts insertions, deletions, substitutions and adjacent transpositions,
+    i.e. the same edits generate_typosquatting_domains enumerates. When
+    `max_distance` is given the computation stops early once the distance
+    is known to exceed it, and any distance above it is returned as
+    `max_distance + 1`.
+    """
+    if a == b:
+        return 0
+
+    # Shared prefixes and suffixes never contribute to the distance, and
+    # squats usually differ from their target in one or two places only.
+    start = 0
+    end_a, end_b = len(a), len(b)
+    while start < end_a and start < end_b and a[start] == b[start]:
+        start += 1
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    # Keep one char of context so a transposition across the cut is seen.
+    start = max(start - 1, 0)
+    a, b = a[start:end_a], b[start:end_b]
+
+    len_a, len_b = len(a), len(b)
+    if max_distance is not None and abs(len_a - len_b) > max_distance:
+        return max_distance + 1
+    if not len_a:
+        return len_b
+    if not len_b:
+        return len_a
+
+    prev_prev: List[int] = []
+    prev = list(range(len_b + 1))
+    for i in range(1, len_a + 1):
+        current = [i] + [0] * len_b
+        row_min = i
+        char_a = a[i - 1]
+        for j in range(1, len_b + 1):
+            cost = 0 if char_a == b[j - 1] else 1
+            value = min(prev[j] + 1,            # deletion
+                        current[j - 1] + 1,     # insertion
+                        prev[j - 1] + cost)     # substitution
+            if (i > 1 and j > 1 and char_a == b[j - 2]
+                    and a[i - 2] == b[j - 1]):
+                value = min(value, prev_prev[j - 2] + 1)  # transposition
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if max_distance is not None and row_min > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, current
+    if max_distance is not None:
+        return min(prev[len_b], max_distance + 1)
+    return prev[len_b]
+
+
+def _deletes(term: str, max_distance: int) -> Dict[str, int]:
+    """Maps every string reachable from `term` by deleting up to
+    max_distance chars to the smallest number of deletions needed."""
+    deletes = {term: 0}
+    frontier = [term]
+    for count in range(1, max_distance + 1):
+        next_frontier = []
+        for word in frontier:
+            for i in range(len(word)):
+                deletion = word[:i] + word[i + 1:]
+                if deletion not in deletes:
+                    deletes[deletion] = count
+                    next_frontier.append(deletion)
+        frontier = next_frontier
+    return deletes
+
+
+class DeletionIndex:
+    """Symmetric-deletion (SymSpell style) index over a fixed list of terms.
+
+    Every term is stored under each string obtainable by deleting up to
+    `max_distance` characters. Two strings within Damerau-Levenshtein
+    distance k always share such a deletion, so a query only has to
+    generate its own deletions, collect the terms filed under them and
+    verify those few candidates, instead of comparing against every term
+    or enumerating every possible edit.
+    """
+
+    def __init__(self, terms: Iterable[str], max_distance: int = 2):
+        self.max_distance = max_distance
+        self.terms = list(dict.fromkeys(terms))
+        # deletion -> [(term_id, deletions needed to reach it), ...]
+        self.deletes: Dict[str, List[Tuple[int, int]]] = {}
+        for term_id, term in enumerate(self.terms):
+            for deletion, count in _deletes(term, max_distance).items():
+                self.deletes.setdefault(deletion, []).append((term_id, count))
+
+    def search(self, query: str, max_distance: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Returns (term, distance) pairs within max_distance of `query`.
+
+        Results are ordered by distance, then by the order the terms were
+        given in.
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        if max_distance > self.max_distance:
+            raise ValueError(
+                f"Index was built for distances up to {self.max_distance}")
+
+        candidates: Set[int] = set()
+        for deletion, query_count in _deletes(query, max_distance).items():
+            entries = self.deletes.get(deletion)
+            if not entries:
+                continue
+            for term_id, term_count in entries:
+                # Each edit costs at most one deletion on either side.
+                if term_count <= max_distance and query_count <= max_distance:
+                    candidates.add(term_id)
+
+        matches = []
+        for term_id in candidates:
+            term = self.terms[term_id]
+            distance = damerau_levenshtein(query, term, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, term_id, term))
+        matches.sort()
+        return [(term, distance) for distance, _, term in matches]
+
+    def __len__(self) -> int:
+        return len(self.deletes)
@@ -3,13 +3,37 @@ from PIL import Image
 import numpy as np
 import json
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.options import Options as ChromeOptions
+import atexit
 import tempfile
 import os
 import shutil
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
 from skimage.metrics import structural_similarity
 
+DEFAULTS = {
+    'SIZE': 2,               # drivers per process
+    'MAX_PAGES': 50,         # pages before a driver is replaced
+    'MAX_RSS_MB': 1500,      # chromedriver + Chrome resident memory before replacement
+    'RSS_CHECK_PAGES': 10,   # pages between memory checks, which walk /proc
+    'PAGE_TIMEOUT': 20,      # seconds per page load or script
+    'CHECKOUT_TIMEOUT': 60,  # seconds to wait for a free driver
+}
+
+
+def _configured() -> Dict:
+    config = dict(DEFAULTS)
+    try:
+        from django.conf import settings
+        config.update(getattr(settings, 'BROWSER_POOL', {}))
+    except Exception:  # Django missing or settings not configured
+        pass
+    return config
+
 def preprocess_ui_element(ui_element_path):
     try:
         img = cv2.imread(ui_element_path)
@@ -32,21 +56,212 @@ def extract_visual_similarity(processed_ui_element1, processed_ui_element2):
     (score, diff) = structural_similarity(gray_ui1, gray_ui2, full=True)
     return score
 
-def capture_screenshot_from_url(url, filename):
+def _new_driver(page_timeout):
     chrome_options = ChromeOptions()
     chrome_options.add_argument('--headless')
     chrome_options.add_argument('--start-maximized')
     service = ChromeService()
     driver = webdriver.Chrome(service=service, options=chrome_options)
+    driver.set_page_load_timeout(page_timeout)
+    driver.set_script_timeout(page_timeout)
+    return driver
+
+
+def _process_tree_rss(pid) -> Optional[int]:
+    """Resident bytes of `pid` and its descendants (chromedriver and the
+    Chrome processes it started), read from /proc; None elsewhere."""
+    try:
+        children: Dict[int, List[int]] = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue  # exited meanwhile
+            children.setdefault(ppid, []).append(int(entry))
+        page_size = os.sysconf('SC_PAGE_SIZE')
+        total, stack = 0, [pid]
+        while stack:
+            current = stack.pop()
+            try:
+                with open(f'/proc/{current}/statm') as f:
+                    total += int(f.read().split()[1]) * page_size
+            except (OSError, IndexError, ValueError):
+                pass
+            stack.extend(children.get(current, ()))
+        return total
+    except (OSError, ValueError):
+        return None
+
+
+class PooledBrowser:
+    __slots__ = ('driver', 'pages')
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class BrowserPool:
+    """Bounded pool of long-lived headless Chrome drivers.
+
+    Starting Chrome costs seconds and hundreds of MB, so drivers are kept
+    and reused: checkout() hands out an idle driver (the most recently
+    used, whose caches are warm) after a liveness check, or starts one
+    while fewer than `size` exist, or waits for a checkin. checkin() clears
+    cookies and parks the driver on about:blank; a driver is quit instead
+    when it failed, has served `max_pages` pages or its process tree has
+    grown past `max_rss_mb`, measured every `rss_check_pages` pages. Page loads and scripts time out after
+    `page_timeout` seconds; a timeout does not retire the driver.
+    """
+
+    def __init__(self, size: Optional[int] = None, max_pages: Optional[int] = None,
+                 max_rss_mb: Optional[float] = None, page_timeout: Optional[float] = None,
+                 checkout_timeout: Optional[float] = None,
+                 rss_check_pages: Optional[int] = None,
+                 driver_factory: Callable = _new_driver):
+        config = _configured()
+        self.size = size or config['SIZE']
+        self.max_pages = max_pages or config['MAX_PAGES']
+        self.max_rss_mb = max_rss_mb if max_rss_mb is not None else config['MAX_RSS_MB']
+        self.page_timeout = page_timeout or config['PAGE_TIMEOUT']
+        self.checkout_timeout = checkout_timeout or config['CHECKOUT_TIMEOUT']
+        self.rss_check_pages = rss_check_pages or config['RSS_CHECK_PAGES']
+        self._driver_factory = driver_factory
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._idle: List[PooledBrowser] = []
+        self._closed = False
+        self.stats = {'started': 0, 'reused': 0, 'recycled': 0, 'unhealthy': 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    @staticmethod
+    def _alive(browser: PooledBrowser) -> bool:
+        try:
+            return browser.driver.execute_script('return 1') == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(browser: PooledBrowser):
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
+
+    def _worn_out(self, browser: PooledBrowser) -> bool:
+        if browser.pages >= self.max_pages:
+            return True
+        if self.max_rss_mb and browser.pages % self.rss_check_pages == 0:
+            try:
+                rss = _process_tree_rss(browser.driver.service.process.pid)
+            except AttributeError:
+                rss = None
+            return rss is not None and rss > self.max_rss_mb * 2 ** 20
+        return False
+
+    def checkout(self) -> PooledBrowser:
+        if self._closed:
+            raise RuntimeError("BrowserPool is closed")
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise TimeoutError(f"No browser became free within {self.checkout_timeout}s")
+        try:
+            while True:
+                with self._lock:
+                    browser = self._idle.pop() if self._idle else None
+                if browser is None:
+                    browser = PooledBrowser(self._driver_factory(self.page_timeout))
+                    self._count('started')
+                    return browser
+                if self._alive(browser):
+                    self._count('reused')
+                    return browser
+                self._count('unhealthy')
+                self._quit(browser)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def checkin(self, browser: PooledBrowser, broken: bool = False):
+        try:
+            browser.pages += 1
+            if broken or self._closed:
+                self._quit(browser)
+                return
+            if self._worn_out(browser):
+                self._count('recycled')
+                self._quit(browser)
+                return
+            try:
+                browser.driver.delete_all_cookies()
+                browser.driver.get('about:blank')  # also stops a timed-out load
+            except Exception:
+                self._quit(browser)
+                return
+            with self._lock:
+                self._idle.append(browser)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def driver(self):
+        """Checks a driver out for the duration of the block. Errors other
+        than a page timeout retire it, since Chrome may be wedged."""
+        browser = self.checkout()
+        broken = False
+        try:
+            yield browser.driver
+        except TimeoutException:
+            raise
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.checkin(browser, broken)
+
+    def close(self):
+        """Quits the idle drivers; drivers in use are quit on checkin."""
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for browser in idle:
+            self._quit(browser)
+
+
+_pool: Optional[BrowserPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """The process-wide pool. Rebuilt after a fork, since a child cannot
+    drive its parent's Chrome processes."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = BrowserPool()
+            _pool_pid = os.getpid()
+            # atexit hooks survive fork; a prefork child exiting must not
+            # quit the drivers of the parent that registered this one.
+            atexit.register(lambda pool=_pool, pid=_pool_pid: os.getpid() == pid and pool.close())
+        return _pool
+
+
+def capture_screenshot_from_url(url, filename, pool=None):
+    pool = pool or get_browser_pool()
     try:
-        driver.get(url)
-        driver.save_screenshot(filename)
+        with pool.driver() as driver:
+            driver.get(url)
+            driver.save_screenshot(filename)
         return filename
     except Exception as e:
         print(f"Error capturing screenshot from {url}: {e}")
         return None
-    finally:
-        driver.quit()
 
 def compare_ui_elements(ui_element_path1, ui_element_path2):
     processed_ui1 = preprocess_ui_element(ui_element_path1)
@@ -61,6 +276,61 @@ def compare_ui_elements(ui_element_path1, ui_element_path2):
     return similarity_percentage, f"Visual similarity score based on SSIM."
 
 
+def grayscale_features(image_path):
+    """The resized grayscale array compare_ui_elements measures SSIM on,
+    or None if the image cannot be read."""
+    processed = preprocess_ui_element(image_path)
+    if processed is None:
+        return None
+    return cv2.cvtColor(processed, cv2.COLOR_BGR2GRAY)
+
+
+def perceptual_hash(gray) -> int:
+    """64-bit DCT hash: one bit per low-frequency coefficient above the
+    median, so similar layouts land a few bits apart."""
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    bits = np.packbits(low > np.median(low[1:]))
+    return int.from_bytes(bits.tobytes(), 'big')
+
+
+def hash_distance(hash1: int, hash2: int) -> int:
+    return bin(hash1 ^ hash2).count('1')
+
+
+class ReferenceSet:
+    """Reference screenshots held in memory as (name, grayscale array,
+    perceptual hash) for comparing many pages against many brands.
+
+    SSIM is only computed for the `candidates` references whose hashes are
+    closest to the page's, so matching costs about the same whether the
+    set holds five brands or hundreds.
+    """
+
+    def __init__(self, references, candidates: int = 10):
+        self.references = list(references)
+        self.candidates = candidates
+
+    def __len__(self):
+        return len(self.references)
+
+    def best_match(self, screenshot_path):
+        """Returns (name, similarity percentage) of the most similar
+        reference, or (None, 0.0) when none scores above zero."""
+        gray = grayscale_features(screenshot_path)
+        if gray is None or not self.references:
+            return None, 0.0
+        page_hash = perceptual_hash(gray)
+        closest = sorted(self.references,
+                         key=lambda reference: hash_distance(page_hash, reference[2]))
+        best_name, best_similarity = None, 0.0
+        for name, reference_gray, _ in closest[:self.candidates]:
+            similarity = structural_similarity(gray, reference_gray) * 100
+            if similarity > best_similarity:
+                best_name, best_similarity = name, similarity
+        return best_name, best_similarity
+
+
 if __name__ == "__main__":
     original_url = input("Enter the original website URL: ")
     phishing_url = input("Enter the phishing website URL: ")
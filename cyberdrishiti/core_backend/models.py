@@ -32,6 +32,9 @@ class ContentAnalysis(models.Model):
     ssl_valid = models.BooleanField(default=False)
     domain_age = models.IntegerField(default=0)
     suspicious_elements = models.IntegerField(default=0)
+    # Analysis stopped once the score was capped: suspicious_elements only
+    # counts the part of the page read until then.
+    suspicious_elements_partial = models.BooleanField(default=False)
     forms_with_password = models.BooleanField(default=False)
     suspicious_url_structure = models.BooleanField(default=False)
     score = models.FloatField(default=0.0)
@@ -75,3 +78,96 @@ class DetectionLog(models.Model):
     
     def __str__(self):
         return f"{self.domain.url} - {self.detection_time}"
+
+
+class DomainRegistration(models.Model):
+    """Registration data loaded offline from zone-file or registrar dumps
+    (manage.py import_registrations), consulted before live WHOIS."""
+    domain = models.CharField(max_length=253, unique=True)
+    creation_date = models.DateTimeField(null=True, blank=True)
+    registrar = models.CharField(max_length=255, blank=True, default='')
+    source = models.CharField(max_length=100, blank=True, default='')
+    imported_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.domain} - {self.creation_date}"
+
+
+class CertificateRecord(models.Model):
+    """A TLS certificate seen while analyzing domains, by SHA-256 fingerprint.
+    Domains sharing a certificate or SAN name usually share an operator."""
+    fingerprint = models.CharField(max_length=64, unique=True)
+    serial_number = models.CharField(max_length=100, blank=True, default='')
+    issuer = models.CharField(max_length=255, blank=True, default='')
+    not_after = models.DateTimeField(null=True, blank=True)
+    san_count = models.IntegerField(default=0)
+    first_seen = models.DateTimeField(default=timezone.now)
+    domains = models.ManyToManyField(PhishingDomain, through='DomainCertificate',
+                                     related_name='certificates')
+
+    def __str__(self):
+        return self.fingerprint
+
+
+class CertificateSAN(models.Model):
+    """Inverted index: SAN name (wildcards kept as written) -> certificates.
+    `registrable_domain` is the eTLD+1 the name covers, empty for
+    shared-hosting names, which never link domains."""
+    certificate = models.ForeignKey(CertificateRecord, on_delete=models.CASCADE, related_name='sans')
+    name = models.CharField(max_length=253, db_index=True)
+    registrable_domain = models.CharField(max_length=253, blank=True, default='', db_index=True)
+
+    class Meta:
+        unique_together = ('certificate', 'name')
+
+
+class DomainCertificate(models.Model):
+    """Which analyzed domain presented which certificate."""
+    domain = models.ForeignKey(PhishingDomain, on_delete=models.CASCADE)
+    certificate = models.ForeignKey(CertificateRecord, on_delete=models.CASCADE)
+    seen_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('domain', 'certificate')
+
+
+class ReferenceBrand(models.Model):
+    """A legitimate site phishing pages imitate. Its screenshot and the
+    comparison features derived from it are computed on a schedule, so
+    analyses compare against them without loading the brand's site."""
+    name = models.CharField(max_length=100)
+    domain = models.CharField(max_length=253, unique=True)
+    url = models.URLField(max_length=255)
+    active = models.BooleanField(default=True)
+    screenshot_path = models.CharField(max_length=255, blank=True, default='')
+    # 256x256 grayscale uint8 pixels, as compare_ui_elements resizes them
+    features = models.BinaryField(null=True, blank=True, editable=False)
+    phash = models.CharField(max_length=16, blank=True, default='')
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+    refresh_error = models.TextField(blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        brand = super().from_db(db, field_names, values)
+        brand._saved_url = brand.__dict__.get('url')
+        return brand
+
+    def save(self, *args, **kwargs):
+        saved_url = getattr(self, '_saved_url', None)
+        if saved_url is not None and self.url != saved_url:
+            # The features show the old page: drop them until the next
+            # refresh, which now treats the brand as never refreshed.
+            self.features = None
+            self.phash = ''
+            self.screenshot_path = ''
+            self.refreshed_at = None
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {
+                    'features', 'phash', 'screenshot_path', 'refreshed_at', 'updated_at'}
+        super().save(*args, **kwargs)
+        self._saved_url = self.url
+
+    def __str__(self):
+        return f"{self.name} ({self.domain})"
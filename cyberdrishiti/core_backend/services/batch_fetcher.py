@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterable, Iterator
+
+from core_backend.ml_models.content_analyzer import DEFAULT_MAX_BYTES
+from core_backend.services.fetch_context import FetchContext
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadedBatchFetcher:
+    """Fetches many URLs concurrently on a thread pool, yielding
+    FetchContexts as they finish.
+
+    The fetches are blocking FetchContext.fetch() calls, one per pool
+    thread, so `concurrency` is also the number of threads; each result
+    carries the body, certificate and redirect chain the analyzers
+    consume. An asyncio loop only schedules them: a global semaphore
+    bounds concurrency, a per-host semaphore keeps us polite to any one
+    server, and a deadline bounds the whole batch. Each fetch also takes
+    the shared HttpClient's slots, so a batch never exceeds the
+    process-wide connection limits.
+    """
+
+    def __init__(self, concurrency: int = 50, per_host: int = 4, deadline: float = 60.0,
+                 timeout: float = 10, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.deadline = deadline
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+
+    async def iter_fetch(self, urls: Iterable[str]) -> AsyncIterator[FetchContext]:
+        """Yields one fetched context per distinct URL, in completion order;
+        `requested_url` holds each URL as given.
+
+        URLs still unfinished at the deadline are yielded last with a
+        TimeoutError as their error.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        global_slots = asyncio.Semaphore(self.concurrency)
+        host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                      thread_name_prefix='batch-fetch')
+
+        async def fetch_one(context):
+            # Per-host first, so URLs queued on a busy host hold no global slot.
+            async with host_slots[context.hostname]:
+                async with global_slots:
+                    await loop.run_in_executor(executor, context.fetch)
+            return context
+
+        contexts = [FetchContext(url, timeout=self.timeout, max_bytes=self.max_bytes)
+                    for url in dict.fromkeys(urls)]
+        tasks = [asyncio.ensure_future(fetch_one(context)) for context in contexts]
+        finished = set()
+        try:
+            if tasks:
+                for next_done in asyncio.as_completed(
+                        tasks, timeout=max(deadline - loop.time(), 0)):
+                    try:
+                        context = await next_done
+                    except asyncio.TimeoutError:
+                        break
+                    finished.add(id(context))
+                    yield context
+        finally:
+            for task in tasks:
+                task.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        for context in contexts:
+            if id(context) not in finished:
+                # A fetch still running in its thread finishes unobserved;
+                # report a fresh context so no half-written state leaks.
+                expired = FetchContext(context.requested_url, timeout=self.timeout,
+                                       max_bytes=self.max_bytes)
+                expired.fetched = True
+                expired.error = TimeoutError(
+                    f"Batch deadline of {self.deadline}s exceeded")
+                yield expired
+
+    def fetch(self, urls: Iterable[str]) -> Iterator[FetchContext]:
+        """Synchronous version of iter_fetch for Django views and tasks:
+        the event loop runs in a helper thread and results are handed
+        over as they complete."""
+        results: 'queue.Queue' = queue.Queue()
+        done = object()
+
+        async def pump():
+            async for context in self.iter_fetch(urls):
+                results.put(context)
+
+        def run():
+            try:
+                asyncio.run(pump())
+            except Exception as e:
+                logger.exception("Batch fetch failed")
+                results.put(e)
+            finally:
+                results.put(done)
+
+        threading.Thread(target=run, name='batch-fetch-loop', daemon=True).start()
+        while True:
+            item = results.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
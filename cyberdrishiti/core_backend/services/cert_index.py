@@ -0,0 +1,122 @@
+import logging
+from datetime import timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Q, QuerySet
+
+from core_backend.ml_models.public_suffix import registrable_domain, under_private_suffix
+from core_backend.models import (
+    CertificateRecord, CertificateSAN, DetectionLog, DomainCertificate, PhishingDomain)
+
+logger = logging.getLogger(__name__)
+
+# Certificates naming more hosts than this are shared hosting or CDN
+# certificates whose tenants are unrelated; they are indexed, but sharing
+# one proves nothing about who runs a domain.
+MAX_CLUSTER_SANS = 20
+
+
+def certificate_sans(cert_details: Dict):
+    names = cert_details.get('extensions', {}).get('subjectAltName', [])
+    return sorted({name.lower().rstrip('.') for name in names if name})
+
+
+def linkable_domain(name: str) -> Optional[str]:
+    """The registrable domain a SAN name links domains through, or None.
+
+    Wildcards stand for the domain they cover (*.evil-login.com links
+    through evil-login.com). Names on shared hosting platforms (PSL
+    private section, e.g. *.herokuapp.com or foo.github.io) name many
+    unrelated tenants, so they never link anything.
+    """
+    name = name.lower().rstrip('.')
+    if name.startswith('*.'):
+        name = name[2:]
+    if not name or under_private_suffix(name):
+        return None
+    return registrable_domain(name)
+
+
+def linkable_domains(sans: Iterable[str]) -> List[str]:
+    return sorted({domain for domain in map(linkable_domain, sans) if domain})
+
+
+def index_certificate(domain: PhishingDomain, cert_details: Dict) -> Optional[CertificateRecord]:
+    """Records the certificate from an analyze_certificate() result against
+    `domain`, adding its SANs to the inverted index. Returns None for
+    results without a fingerprint (no certificate was retrieved)."""
+    fingerprint = cert_details.get('fingerprint_sha256')
+    if not fingerprint:
+        return None
+    sans = certificate_sans(cert_details)
+    not_after = cert_details.get('validity', {}).get('not_after')
+    issuer = cert_details.get('issuer', {}).get('commonname', [''])[0]
+    with transaction.atomic():
+        certificate, created = CertificateRecord.objects.get_or_create(
+            fingerprint=fingerprint,
+            defaults={
+                'serial_number': format(cert_details['serial_number'], 'x')
+                if cert_details.get('serial_number') is not None else '',
+                'issuer': issuer[:255],
+                'not_after': not_after.replace(tzinfo=dt_timezone.utc) if not_after else None,
+                'san_count': len(sans),
+            })
+        if created:
+            CertificateSAN.objects.bulk_create(
+                [CertificateSAN(certificate=certificate, name=name[:253],
+                                registrable_domain=(linkable_domain(name) or '')[:253])
+                 for name in sans],
+                ignore_conflicts=True)
+        DomainCertificate.objects.get_or_create(domain=domain, certificate=certificate)
+    return certificate
+
+
+def related_domains(sans: Iterable[str], fingerprint: Optional[str] = None,
+                    exclude: Optional[PhishingDomain] = None) -> QuerySet:
+    """Analyzed domains that presented the same certificate, or one naming
+    any of the same registrable domains, as one query over the index.
+
+    Only linkable names count (see linkable_domain), and certificates
+    above MAX_CLUSTER_SANS names link domains by fingerprint only.
+    """
+    sans = list(sans)
+    query = Q()
+    if fingerprint:
+        query |= Q(certificates__fingerprint=fingerprint)
+    domains = linkable_domains(sans)
+    if domains and len(sans) <= MAX_CLUSTER_SANS:
+        query |= Q(certificates__sans__registrable_domain__in=domains,
+                   certificates__san_count__lte=MAX_CLUSTER_SANS)
+    if not query:
+        return PhishingDomain.objects.none()
+    related = PhishingDomain.objects.filter(query)
+    if exclude is not None:
+        related = related.exclude(pk=exclude.pk)
+    return related.distinct()
+
+
+def shares_certificate_with_phish(sans: Iterable[str], fingerprint: Optional[str] = None,
+                                  exclude: Optional[PhishingDomain] = None
+                                  ) -> Optional[PhishingDomain]:
+    """A known phishing domain linked to this certificate, if any."""
+    return related_domains(sans, fingerprint, exclude).filter(is_phishing=True).first()
+
+
+def flag_linked_phish(domain: PhishingDomain, cert_details: Dict) -> Optional[PhishingDomain]:
+    """Flags `domain` as phishing when the certificate from its
+    analyze_certificate() result links it to a known phish, so the caller
+    can skip the content, behavior and UI stages. Returns that phish, or
+    None when there is no link and the full analysis should run."""
+    known_phish = shares_certificate_with_phish(certificate_sans(cert_details),
+                                                cert_details.get('fingerprint_sha256'),
+                                                exclude=domain)
+    if known_phish is None:
+        return None
+    domain.overall_score = 1.0
+    domain.is_phishing = True
+    domain.save(update_fields=['overall_score', 'is_phishing'])
+    DetectionLog.objects.create(domain=domain, ai_confidence=1.0,
+                                action_taken="Flagged: certificate of known phish")
+    logger.info(f"{domain.url} shares a certificate with known phish {known_phish.url}")
+    return known_phish
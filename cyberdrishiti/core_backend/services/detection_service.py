@@ -3,12 +3,15 @@ from sklearn.ensemble import IsolationForest
 import requests
 from urllib.parse import urlparse
 from datetime import datetime
-import whois  
 from urllib.parse import urlparse
 from core_backend.ml_models.content_analyzer import ContentAnalyzer
 from core_backend.ml_models.domain_behavior_analyzer import DomainBehaviorAnalyzer
 from core_backend.ml_models.ssl_mismatch_detector import SSLMismatchDetector
 from core_backend.ml_models.ui_clone_detector import UICloneDetector
+from core_backend.ml_models.public_suffix import split_host
+from core_backend.services.fetch_context import FetchContext
+from core_backend.services.http_client import get_http_client
+from core_backend.services.whois_service import get_whois_service
 import logging
 
 # Configure logging
@@ -30,7 +33,8 @@ class PhishingDetector:
 
     def analyze_domain(self, url):
         try:
-            domain_features = self._extract_features(url)
+            fetch_context = FetchContext(url).fetch()
+            domain_features = self._extract_features(url, fetch_context)
             # Placeholder prediction - Replace with actual model prediction later
             content_score = self.content_analyzer.analyze_content(url)  # Example call
             behavior_score = self.domain_behavior_analyzer.analyze_behavior(urlparse(url).netloc)  # Example call - domain only
@@ -51,11 +55,8 @@ class PhishingDetector:
     def _get_registration_age(self, url):
         """Get domain registration age in days."""
         try:
-            w = whois.whois(url)
-            if w.creation_date:
-                creation_date = w.creation_date
-                if isinstance(creation_date, list):
-                    creation_date = creation_date[0]
+            creation_date = get_whois_service().creation_date(self._registered_domain(url))
+            if creation_date:
                 age_days = (datetime.now().date() - creation_date.date()).days
                 return age_days
             else:
@@ -63,16 +64,21 @@ class PhishingDetector:
         except Exception:
             return 0
 
-    def _extract_features(self, url):
+    @staticmethod
+    def _registered_domain(url):
+        hostname = urlparse(url).hostname or url
+        return split_host(hostname)[1] or hostname
+
+    def _extract_features(self, url, fetch_context=None):
         """Extract basic features - Placeholder, expand this later"""
         parsed = urlparse(url)
+        subdomain = split_host(parsed.hostname or parsed.netloc)[0]
         features = {
             'domain_length': len(parsed.netloc),
-            'num_subdomains': parsed.netloc.count('.'),
-            'ssl_verified': self._check_ssl(url),
-            'ssl_info': self._check_ssl_info(url),
+            'num_subdomains': subdomain.count('.') + 1 if subdomain else 0,
+            'ssl_verified': self._check_ssl(url, fetch_context),
+            'ssl_info': self._check_ssl_info(url, fetch_context),
             'domain_registration_age': self._get_registration_age(url),
-            'registrar': self._get_registrar(url),
             # Placeholder - you'll need to implement screenshotting
             'screenshot_path': "/path/to/placeholder_screenshot.png",
             # Placeholder - UI similarity will be handled by UICloneDetector
@@ -80,19 +86,25 @@ class PhishingDetector:
         }
         return features
 
-    def _check_ssl(self, url):
+    def _check_ssl(self, url, fetch_context=None):
         """Placeholder for SSL check - Implement real check later"""
+        if fetch_context is not None:
+            return fetch_context.error is None
         try:
             # Basic SSL connection attempt
-            requests.get(url, verify=True, timeout=5)
+            get_http_client().get(url, verify=True, timeout=5).close()
             return True  # Assume verified if connection successful for now
         except requests.exceptions.SSLError:
             return False  # SSL error
         except requests.exceptions.RequestException:  # Other request exceptions
             return False  # Treat other errors as not verified for simplicity now
 
-    def _check_ssl_info(self, url):
+    def _check_ssl_info(self, url, fetch_context=None):
         """Placeholder for SSL info extraction - Implement properly later"""
+        if fetch_context is not None:
+            if fetch_context.cert_verified:
+                return fetch_context.peer_cert
+            return {"error": str(fetch_context.tls_error or "No certificate retrieved")}
         try:
             import ssl
             import socket
@@ -0,0 +1,409 @@
+import base64
+import functools
+import http.client
+import json
+import logging
+import os
+import socket
+import ssl
+import tempfile
+import time
+from email.message import Message
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from core_backend.ml_models.content_analyzer import (
+    CHUNK_SIZE, DEFAULT_MAX_BYTES, BoundedBodyReader, text_decoder)
+from core_backend.ml_models.ssl_mismatch_detector import decode_der_certificate
+from core_backend.services.http_client import RETRY_STATUSES, get_http_client
+
+logger = logging.getLogger(__name__)
+
+MAX_REDIRECTS = 10
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+USER_AGENT = 'Mozilla/5.0 (compatible; CyberDrishti/1.0)'
+
+# Errors cross the Celery broker as (kind, message); the kinds the
+# analyzers tell apart keep their type. Subclasses come first.
+_ERROR_TYPES = (
+    ('cert', ssl.SSLCertVerificationError),
+    ('ssl', ssl.SSLError),
+    ('timeout', socket.timeout),
+    ('gaierror', socket.gaierror),
+    ('os', OSError),
+)
+
+_default_context: Optional[ssl.SSLContext] = None
+
+
+def default_verify_context() -> ssl.SSLContext:
+    """Shared verifying context; loading the CA store costs tens of
+    milliseconds, far too much to repeat for every URL in a batch."""
+    global _default_context
+    if _default_context is None:
+        _default_context = ssl.create_default_context()
+    return _default_context
+
+
+class FetchContext:
+    """Everything the analyzers need from the network for one URL.
+
+    `fetch()` resolves the host once, performs one TLS handshake, records
+    the peer certificate and negotiated parameters from it, and sends the
+    GET over that same connection, following redirects. Content, SSL and
+    detection-service checks then read the results instead of each opening
+    their own connections. Failures are recorded, never raised.
+
+    Each attempt holds the shared HttpClient's global and per-host slots,
+    resolves through its DNS cache, and is retried on connection failures
+    and 429/5xx answers with its backoff; the fetch is counted in its
+    metrics.
+    """
+
+    def __init__(self, url: str, timeout: float = 10, max_bytes: int = DEFAULT_MAX_BYTES,
+                 verify_context: Optional[ssl.SSLContext] = None):
+        self.requested_url = url
+        self.url = url if '://' in url else f'https://{url}'
+        parsed = urlsplit(self.url)
+        self.scheme = parsed.scheme.lower()
+        self.hostname = parsed.hostname or ''
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.verify_context = verify_context or default_verify_context()
+        # TLS, for the URL's host (port 443 unless an https URL says otherwise)
+        self.tls_port = parsed.port if self.scheme == 'https' and parsed.port else 443
+        self.connections = 0
+        self.retries = 0
+        self.fetched = False
+        self._clear()
+
+    def _clear(self):
+        """Resets what a fetch attempt records."""
+        self.resolved_ips: List[str] = []
+
+        # TLS
+        self.cert_verified = False
+        self.peer_cert: dict = {}
+        self.peer_cert_der: Optional[bytes] = None
+        self.peer_chain_der: List[bytes] = []
+        self.tls_version: Optional[str] = None
+        self.cipher: Optional[tuple] = None
+        self.tls_error: Optional[Exception] = None
+
+        # HTTP
+        self.status_code: Optional[int] = None
+        self.headers: Optional[Message] = None
+        self.final_url: Optional[str] = None
+        self.redirect_chain: List[Tuple[int, str]] = []
+        self.body: Optional[bytes] = None
+        self.encoding: Optional[str] = None
+        self.bytes_read = 0
+        self.truncated = False
+        self.error: Optional[Exception] = None
+        self.__dict__.pop('text', None)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status_code is not None and self.status_code < 400
+
+    @property
+    def ssl_valid(self) -> bool:
+        """What requests.get(url, verify=True).ok reported: the page loaded
+        without a certificate error and without an HTTP error status."""
+        return self.ok
+
+    @functools.cached_property
+    def text(self) -> str:
+        """The body decoded once; a retried fetch (_clear) drops it."""
+        if not self.body:
+            return ''
+        return text_decoder(self.encoding).decode(self.body, final=True)
+
+    def to_payload(self) -> Dict:
+        """JSON-safe copy of the fetch results, so a fetched page can be
+        handed to a Celery task; from_payload() restores it without
+        refetching."""
+        return {
+            'url': self.requested_url,
+            'timeout': self.timeout,
+            'max_bytes': self.max_bytes,
+            'resolved_ips': self.resolved_ips,
+            'connections': self.connections,
+            'retries': self.retries,
+            'cert_verified': self.cert_verified,
+            'peer_cert_der': _b64encode(self.peer_cert_der),
+            'peer_chain_der': [_b64encode(der) for der in self.peer_chain_der],
+            'tls_version': self.tls_version,
+            'cipher': list(self.cipher) if self.cipher else None,
+            'tls_error': _encode_error(self.tls_error),
+            'status_code': self.status_code,
+            'headers': list(self.headers.items()) if self.headers is not None else None,
+            'final_url': self.final_url,
+            'redirect_chain': self.redirect_chain,
+            'body': _b64encode(self.body),
+            'encoding': self.encoding,
+            'bytes_read': self.bytes_read,
+            'truncated': self.truncated,
+            'error': _encode_error(self.error),
+        }
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> 'FetchContext':
+        context = cls(payload['url'], timeout=payload['timeout'], max_bytes=payload['max_bytes'])
+        context.fetched = True
+        context.resolved_ips = payload['resolved_ips']
+        context.connections = payload['connections']
+        context.retries = payload.get('retries', 0)
+        context.cert_verified = payload['cert_verified']
+        context.peer_cert_der = _b64decode(payload['peer_cert_der'])
+        if context.peer_cert_der:
+            context.peer_cert = decode_der_certificate(context.peer_cert_der)
+        context.peer_chain_der = [_b64decode(der) for der in payload['peer_chain_der']]
+        context.tls_version = payload['tls_version']
+        context.cipher = tuple(payload['cipher']) if payload['cipher'] else None
+        context.tls_error = _decode_error(payload['tls_error'])
+        context.status_code = payload['status_code']
+        if payload['headers'] is not None:
+            context.headers = Message()
+            for name, value in payload['headers']:
+                context.headers[name] = value
+        context.final_url = payload['final_url']
+        context.redirect_chain = [tuple(hop) for hop in payload['redirect_chain']]
+        context.body = _b64decode(payload['body'])
+        context.encoding = payload['encoding']
+        context.bytes_read = payload['bytes_read']
+        context.truncated = payload['truncated']
+        context.error = _decode_error(payload['error'])
+        return context
+
+    def spool(self, directory: str) -> str:
+        """Writes the payload to a new file in `directory` and returns its
+        path. Celery messages carry the path instead of the payload, so
+        bodies and certificate chains never pass through the broker."""
+        fd, path = tempfile.mkstemp(prefix='fetch-', suffix='.json', dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.to_payload(), f)
+        return path
+
+    @classmethod
+    def from_spool(cls, path: str) -> 'FetchContext':
+        """Restores a spooled fetch and deletes its file."""
+        with open(path, encoding='utf-8') as f:
+            payload = json.load(f)
+        os.remove(path)
+        return cls.from_payload(payload)
+
+    def fetch(self) -> 'FetchContext':
+        if self.fetched:
+            return self
+        self.fetched = True
+        if not self.hostname:
+            self.error = self.tls_error = ValueError(f"Invalid URL: {self.url}")
+            return self
+        client = get_http_client()
+        while True:
+            with client.slot(self.url):
+                self._fetch_once(client)
+            if self.retries >= (client.retry.total or 0) or not self._retryable():
+                break
+            self.retries += 1
+            # Back off without the slots, so other fetches can use them.
+            time.sleep(client.backoff(self.retries))
+            self._clear()
+        client.record(retries=self.retries, error=self.status_code is None)
+        return self
+
+    def _retryable(self) -> bool:
+        if self.status_code is not None:
+            return self.status_code in RETRY_STATUSES
+        # A certificate that fails verification fails again.
+        return (isinstance(self.error, OSError)
+                and not isinstance(self.error, ssl.SSLCertVerificationError))
+
+    def _fetch_once(self, client):
+        try:
+            self._resolve(client.dns_cache)
+        except OSError as e:
+            self.error = self.tls_error = e
+            return
+
+        tls_sock = self._handshake()
+        try:
+            if self.scheme == 'https':
+                if tls_sock is None:
+                    # requests would have refused the page as well
+                    self.error = self.tls_error
+                    return
+                self._get(self.url, tls_sock)
+                tls_sock = None  # owned by the HTTP connection now
+            elif self.scheme == 'http':
+                self._get(self.url, None)
+            else:
+                self.error = ValueError(f"Unsupported scheme: {self.scheme}")
+        except (OSError, http.client.HTTPException) as e:
+            self.error = e
+        finally:
+            if tls_sock is not None:
+                tls_sock.close()
+
+    def _resolve(self, dns_cache):
+        infos = dns_cache.getaddrinfo(self.hostname, self.tls_port, type=socket.SOCK_STREAM)
+        self.resolved_ips = list(dict.fromkeys(info[4][0] for info in infos))
+
+    def _connect(self, port: int) -> socket.socket:
+        last_error: Optional[OSError] = None
+        for ip in self.resolved_ips:
+            try:
+                sock = socket.create_connection((ip, port), timeout=self.timeout)
+                self.connections += 1
+                return sock
+            except OSError as e:
+                last_error = e
+        raise last_error or OSError(f"No addresses for {self.hostname}")
+
+    def _handshake(self) -> Optional[ssl.SSLSocket]:
+        """Verified handshake with the host, recording what it negotiated.
+
+        Returns the open socket for the GET to reuse. When verification
+        fails the certificate is still captured over an unverified
+        handshake, since that is the certificate worth inspecting.
+        """
+        try:
+            sock = self._connect(self.tls_port)
+        except OSError as e:
+            self.tls_error = e
+            return None
+        try:
+            tls_sock = self.verify_context.wrap_socket(sock, server_hostname=self.hostname)
+        except ssl.SSLCertVerificationError as e:
+            sock.close()
+            self.tls_error = e
+            self._capture_unverified()
+            return None
+        except (OSError, ssl.SSLError) as e:
+            sock.close()
+            self.tls_error = e
+            return None
+        self.cert_verified = True
+        self._record_tls(tls_sock, tls_sock.getpeercert())
+        return tls_sock
+
+    def _capture_unverified(self):
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        try:
+            with context.wrap_socket(self._connect(self.tls_port),
+                                     server_hostname=self.hostname) as tls_sock:
+                self._record_tls(tls_sock, None)
+        except (OSError, ssl.SSLError) as e:
+            logger.debug("Unverified handshake with %s failed: %s", self.hostname, e)
+
+    def _record_tls(self, tls_sock: ssl.SSLSocket, cert: Optional[dict]):
+        self.peer_cert_der = tls_sock.getpeercert(binary_form=True)
+        self.peer_cert = cert or decode_der_certificate(self.peer_cert_der)
+        self.tls_version = tls_sock.version()
+        self.cipher = tls_sock.cipher()
+        get_chain = getattr(tls_sock, 'get_unverified_chain', None)  # Python 3.13+
+        if get_chain is not None:
+            self.peer_chain_der = [bytes(cert) for cert in get_chain() or ()]
+        elif self.peer_cert_der:
+            self.peer_chain_der = [self.peer_cert_der]
+
+    def _open_connection(self, url: str, sock: Optional[socket.socket]):
+        parsed = urlsplit(url)
+        if parsed.scheme == 'https':
+            conn = http.client.HTTPSConnection(parsed.hostname, parsed.port,
+                                               timeout=self.timeout, context=self.verify_context)
+        elif parsed.scheme == 'http':
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=self.timeout)
+            if sock is None and parsed.hostname == self.hostname:
+                sock = self._connect(parsed.port or 80)
+        else:
+            raise http.client.HTTPException(f"Unsupported redirect scheme: {parsed.scheme}")
+        if sock is not None:
+            conn.sock = sock  # http.client sends over a preset socket as-is
+        else:
+            self.connections += 1
+        return conn
+
+    def _get(self, url: str, sock: Optional[socket.socket]):
+        conn = None
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                parsed = urlsplit(url)
+                if conn is None:
+                    conn = self._open_connection(url, sock)
+                    sock = None
+                path = (parsed.path or '/') + (f'?{parsed.query}' if parsed.query else '')
+                conn.request('GET', path, headers={'User-Agent': USER_AGENT,
+                                                   'Accept': '*/*',
+                                                   'Accept-Encoding': 'gzip, deflate'})
+                response = conn.getresponse()
+                location = response.getheader('Location')
+                if response.status not in REDIRECT_CODES or not location:
+                    self._read_response(url, response)
+                    return
+                self.redirect_chain.append((response.status, url))
+                url = urljoin(url, location)
+                # Same-origin redirects reuse the kept-alive connection.
+                target = urlsplit(url)
+                if (response.will_close
+                        or (target.scheme, target.hostname, target.port)
+                        != (parsed.scheme, parsed.hostname, parsed.port)):
+                    conn.close()
+                    conn = None
+                else:
+                    response.read(CHUNK_SIZE)
+                    if not response.isclosed():
+                        conn.close()
+                        conn = None
+            raise http.client.HTTPException(f"Exceeded {MAX_REDIRECTS} redirects")
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _read_response(self, url: str, response: http.client.HTTPResponse):
+        self.final_url = url
+        self.status_code = response.status
+        self.headers = response.msg
+        self.encoding = self.headers.get_content_charset()
+        if self.encoding is None and self.headers.get_content_maintype() == 'text':
+            self.encoding = 'ISO-8859-1'  # RFC 2616 default, as requests applies it
+
+        reader = BoundedBodyReader(self.headers.get('Content-Encoding'), self.max_bytes)
+        if not reader.supported:
+            return
+        parts = []
+        while not reader.truncated:
+            raw = response.read(CHUNK_SIZE)
+            if not raw:
+                break
+            parts.append(reader.feed(raw))
+        self.body = b''.join(parts)
+        self.bytes_read = reader.bytes_read
+        self.truncated = reader.truncated
+
+
+def _b64encode(data: Optional[bytes]) -> Optional[str]:
+    return base64.b64encode(data).decode('ascii') if data is not None else None
+
+
+def _b64decode(data: Optional[str]) -> Optional[bytes]:
+    return base64.b64decode(data) if data is not None else None
+
+
+def _encode_error(error: Optional[Exception]) -> Optional[List[str]]:
+    if error is None:
+        return None
+    for kind, error_type in _ERROR_TYPES:
+        if isinstance(error, error_type):
+            return [kind, str(error)]
+    return ['other', str(error)]
+
+
+def _decode_error(value: Optional[List[str]]) -> Optional[Exception]:
+    if value is None:
+        return None
+    kind, message = value
+    return dict(_ERROR_TYPES).get(kind, Exception)(message)
@@ -0,0 +1,398 @@
+import functools
+import logging
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable through the HTTP_CLIENT dict in Django settings.
+DEFAULTS = {
+    'CONNECT_TIMEOUT': 5,
+    'READ_TIMEOUT': 10,
+    'MAX_CONNECTIONS': 64,           # concurrent requests per process
+    'MAX_CONNECTIONS_PER_HOST': 8,   # also the keep-alive pool size per host
+    'MAX_HOST_POOLS': 256,           # hosts with pooled connections kept open
+    'RETRIES': 2,
+    'BACKOFF_FACTOR': 0.3,
+    'BACKOFF_JITTER': 0.3,
+    'DNS_CACHE_TTL': 300,
+    'DNS_CACHE_SIZE': 4096,
+}
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+def _configured() -> Dict:
+    config = dict(DEFAULTS)
+    try:
+        from django.conf import settings
+        config.update(getattr(settings, 'HTTP_CLIENT', {}))
+    except Exception:  # Django missing or settings not configured
+        pass
+    return config
+
+
+class DNSCache:
+    """TTL cache of getaddrinfo answers.
+
+    Only connections opened by the shared client's pools and by
+    FetchContext resolve through it; socket.getaddrinfo itself is left
+    alone, so database and broker connections keep the system resolver.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[tuple, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(entry[1])
+            self.misses += 1
+        result = socket.getaddrinfo(host, port, family, type, proto, flags)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, tuple(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def create_connection(self, address, timeout=None, source_address=None,
+                          socket_options=None) -> socket.socket:
+        """urllib3.util.connection.create_connection, resolving through
+        the cache: tries each cached address until one connects. A timeout
+        that is not a number (urllib3's default sentinel) leaves the socket
+        default in place."""
+        host, port = address
+        if host.startswith('['):
+            host = host.strip('[]')
+        error: Optional[OSError] = None
+        for family, socktype, proto, _, sockaddr in self.getaddrinfo(
+                host, port, allowed_gai_family(), socket.SOCK_STREAM):
+            sock = None
+            try:
+                sock = socket.socket(family, socktype, proto)
+                for option in socket_options or ():
+                    sock.setsockopt(*option)
+                if isinstance(timeout, (int, float)):
+                    sock.settimeout(timeout)
+                if source_address:
+                    sock.bind(source_address)
+                sock.connect(sockaddr)
+                return sock
+            except OSError as e:
+                error = e
+                if sock is not None:
+                    sock.close()
+        raise error or OSError("getaddrinfo returns an empty list")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _after_fork(self):
+        # The parent may have forked while another thread held the lock.
+        self._lock = threading.Lock()
+
+
+dns_cache = DNSCache()
+os.register_at_fork(after_in_child=dns_cache._after_fork)
+
+
+class _CachedDNSConnectionMixin:
+    """urllib3's _new_conn with name resolution going through dns_cache.
+
+    urllib3 has no public resolver hook, so this one method is overridden;
+    requirement.txt pins the urllib3 release it was written against.
+    `on_event('connect')` / `on_event('request')` is called for each
+    socket opened and each request sent, so the pools can be measured.
+    """
+
+    def __init__(self, *args, on_event: Optional[Callable[[str], None]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_event = on_event
+
+    def _new_conn(self) -> socket.socket:
+        try:
+            sock = dns_cache.create_connection((self.host, self.port), self.timeout,
+                                               source_address=self.source_address,
+                                               socket_options=self.socket_options)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})"
+            ) from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+        sys.audit('http.client.connect', self, self.host, self.port)
+        if self.on_event is not None:
+            self.on_event('connect')
+        return sock
+
+    def request(self, *args, **kwargs):
+        if self.on_event is not None:
+            self.on_event('request')
+        return super().request(*args, **kwargs)
+
+
+class _CachedDNSHTTPConnection(_CachedDNSConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CachedDNSHTTPSConnection(_CachedDNSConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _CachedDNSHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CachedDNSHTTPConnection
+
+
+class _CachedDNSHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CachedDNSHTTPSConnection
+
+
+class CachedDNSAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools resolve host names through dns_cache and
+    whose connections report to `on_connection_event`."""
+
+    def __init__(self, *args, on_connection_event: Optional[Callable[[str], None]] = None,
+                 **kwargs):
+        # Set first: HTTPAdapter.__init__ builds the pool manager.
+        self.on_connection_event = on_connection_event
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        # A copy: the manager shares urllib3's module-level mapping. Pools
+        # pass keyword arguments they do not know on to their connections.
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': functools.partial(_CachedDNSHTTPConnectionPool,
+                                      on_event=self.on_connection_event),
+            'https': functools.partial(_CachedDNSHTTPSConnectionPool,
+                                       on_event=self.on_connection_event),
+        }
+
+
+class HttpClient:
+    """Pooled HTTP transport shared by every analyzer in the process.
+
+    One requests Session keeps per-host keep-alive pools. Semaphores cap
+    concurrent requests globally and per host, so a burst of URLs on one
+    hosting provider queues instead of opening hundreds of sockets.
+    Connection failures and 429/5xx answers are retried with jittered
+    exponential backoff. Host names are resolved through dns_cache.
+
+    Transports that open their own connections (FetchContext) take the
+    same slots through slot(), back off with backoff() and report to
+    record(), so the limits and metrics cover them too.
+    """
+
+    def __init__(self, connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 max_connections: Optional[int] = None,
+                 max_connections_per_host: Optional[int] = None,
+                 retries: Optional[int] = None):
+        config = _configured()
+        self.timeout = (connect_timeout or config['CONNECT_TIMEOUT'],
+                        read_timeout or config['READ_TIMEOUT'])
+        self.max_connections_per_host = (max_connections_per_host
+                                         or config['MAX_CONNECTIONS_PER_HOST'])
+        self._slots = threading.BoundedSemaphore(max_connections or config['MAX_CONNECTIONS'])
+        # host -> [semaphore, claims waiting or holding it]; dropped when
+        # the last claim is released, so idle hosts cost nothing.
+        self._host_slots: Dict[str, List] = {}
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'errors': 0, 'slot_waits': 0,
+                       'connection_requests': 0, 'connections': 0}
+
+        self.retry = Retry(total=config['RETRIES'] if retries is None else retries,
+                           backoff_factor=config['BACKOFF_FACTOR'],
+                           backoff_jitter=config['BACKOFF_JITTER'],
+                           status_forcelist=RETRY_STATUSES,
+                           allowed_methods=frozenset(('GET', 'HEAD', 'OPTIONS')),
+                           raise_on_status=False)
+        self.adapter = CachedDNSAdapter(pool_connections=config['MAX_HOST_POOLS'],
+                                        pool_maxsize=self.max_connections_per_host,
+                                        pool_block=True, max_retries=self.retry,
+                                        on_connection_event=self._connection_event)
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        self.dns_cache = dns_cache
+        self.dns_cache.ttl = config['DNS_CACHE_TTL']
+        self.dns_cache.max_entries = config['DNS_CACHE_SIZE']
+
+    def _connection_event(self, event: str):
+        key = 'connections' if event == 'connect' else 'connection_requests'
+        with self._lock:
+            self._stats[key] += 1
+
+    def _host_slot(self, host: str) -> threading.BoundedSemaphore:
+        """The host's semaphore, registering one more claim on it; pair
+        with _drop_host_slot."""
+        with self._lock:
+            entry = self._host_slots.get(host)
+            if entry is None:
+                entry = self._host_slots[host] = [
+                    threading.BoundedSemaphore(self.max_connections_per_host), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def _drop_host_slot(self, host: str):
+        with self._lock:
+            entry = self._host_slots[host]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._host_slots[host]
+
+    def _acquire(self, slot: threading.BoundedSemaphore):
+        if not slot.acquire(blocking=False):
+            with self._lock:
+                self._stats['slot_waits'] += 1
+            slot.acquire()
+
+    def _claim(self, url: str) -> Callable[[], None]:
+        """Takes the per-host and global slots for `url`; returns a
+        function releasing them (idempotent)."""
+        host = (urlsplit(url).hostname or '').lower()
+        host_slot = self._host_slot(host)
+        # Per-host first: requests queued on a busy host do not hold
+        # global slots other hosts could use.
+        self._acquire(host_slot)
+        self._acquire(self._slots)
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                host_slot.release()
+                self._slots.release()
+                self._drop_host_slot(host)
+        return release
+
+    @contextmanager
+    def slot(self, url: str):
+        """Holds the slots a request to `url` would, for the duration of
+        the block."""
+        release = self._claim(url)
+        try:
+            yield
+        finally:
+            release()
+
+    def backoff(self, retry_number: int) -> float:
+        """Seconds to wait before retry `retry_number` (1-based), by the
+        same jittered exponential schedule as the adapter's Retry."""
+        if retry_number <= 1:
+            return 0.0
+        delay = (self.retry.backoff_factor * 2 ** (retry_number - 1)
+                 + random.random() * self.retry.backoff_jitter)
+        return min(delay, self.retry.backoff_max)
+
+    def record(self, retries: int = 0, error: bool = False):
+        """Counts one request made outside the session."""
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['retries'] += retries
+            self._stats['errors'] += int(error)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """requests.request() through the shared pools and limits.
+
+        Streamed responses hold their slots until they are closed, so
+        callers must close them (or use them as context managers).
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        release = self._claim(url)
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception:
+            release()
+            self.record(error=True)
+            raise
+
+        retries = getattr(response.raw, 'retries', None)
+        self.record(retries=len(retries.history) if retries else 0)
+        if not kwargs.get('stream'):
+            release()
+        else:
+            close = response.close
+
+            def close_and_release():
+                try:
+                    close()
+                finally:
+                    release()
+            response.close = close_and_release
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('allow_redirects', False)
+        return self.request('HEAD', url, **kwargs)
+
+    def metrics(self) -> Dict[str, int]:
+        """Request, pool and DNS counters.
+
+        A pool hit is a request served on an already-open keep-alive
+        connection; a miss had to open a new one.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        pool_requests = stats.pop('connection_requests')
+        pool_connections = stats.pop('connections')
+        stats.update(pool_hits=max(pool_requests - pool_connections, 0),
+                     pool_misses=pool_connections,
+                     host_pools=len(self.adapter.poolmanager.pools),
+                     dns_hits=self.dns_cache.hits,
+                     dns_misses=self.dns_cache.misses)
+        return stats
+
+    def close(self):
+        self.session.close()
+
+
+_client: Optional[HttpClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """The process-wide client. Rebuilt after a fork so Celery prefork
+    children never share their parent's sockets."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = HttpClient()
+            _client_pid = os.getpid()
+        return _client
@@ -0,0 +1,148 @@
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from core_backend.ml_models.ui_clone_detector import (
+    ReferenceSet, capture_screenshot_from_url, grayscale_features, perceptual_hash)
+from core_backend.models import ReferenceBrand
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SCREENSHOT_DIR': None,         # BASE_DIR/reference_screenshots if not configured
+    'REFRESH_INTERVAL': 24 * 3600,  # seconds before a brand's screenshot is retaken
+    'CANDIDATES': 10,               # closest references by hash that get an SSIM comparison
+    'RELOAD_INTERVAL': 60,          # seconds between checks for changed brands in a worker
+}
+
+FEATURE_SHAPE = (256, 256)
+
+
+def _configured() -> Dict:
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'REFERENCE_BRANDS', {}))
+    if config['SCREENSHOT_DIR'] is None:
+        config['SCREENSHOT_DIR'] = os.path.join(settings.BASE_DIR, 'reference_screenshots')
+    return config
+
+
+def refresh_brand(brand: ReferenceBrand) -> bool:
+    """Retakes the brand's screenshot and recomputes its features. On
+    failure the previous screenshot and features are kept."""
+    directory = _configured()['SCREENSHOT_DIR']
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{brand.domain}.png")
+    tmp_path = os.path.join(directory, f".{brand.domain}.new.png")
+
+    gray = None
+    if capture_screenshot_from_url(brand.url, tmp_path):
+        gray = grayscale_features(tmp_path)
+    if gray is None:
+        brand.refresh_error = f"Could not capture a screenshot of {brand.url}"
+        brand.save(update_fields=['refresh_error'])
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        return False
+
+    os.replace(tmp_path, path)
+    brand.screenshot_path = path
+    brand.features = gray.tobytes()
+    brand.phash = format(perceptual_hash(gray), '016x')
+    brand.refreshed_at = timezone.now()
+    brand.refresh_error = ''
+    brand.save()
+    return True
+
+
+def refresh_brands(force: bool = False, brand_ids: Optional[Iterable[int]] = None) -> Dict[str, int]:
+    """Refreshes active brands never refreshed or older than
+    REFRESH_INTERVAL (all of them with `force`)."""
+    brands = ReferenceBrand.objects.filter(active=True)
+    if brand_ids is not None:
+        brands = brands.filter(pk__in=list(brand_ids))
+    if not force:
+        stale_before = timezone.now() - timedelta(seconds=_configured()['REFRESH_INTERVAL'])
+        brands = brands.filter(Q(refreshed_at__isnull=True) | Q(refreshed_at__lt=stale_before))
+
+    stats = {'refreshed': 0, 'failed': 0}
+    for brand in brands.iterator():
+        if refresh_brand(brand):
+            stats['refreshed'] += 1
+        else:
+            stats['failed'] += 1
+            logger.warning(f"Reference brand {brand.domain}: {brand.refresh_error}")
+    return stats
+
+
+class ReferenceLibrary:
+    """A worker's in-memory copy of the refreshed reference brands.
+
+    Loaded on first use; afterwards one aggregate query every
+    RELOAD_INTERVAL seconds tells whether any brand was added, removed or
+    saved since, and only then are the features read again.
+    """
+
+    def __init__(self):
+        config = _configured()
+        self.candidates = config['CANDIDATES']
+        self.reload_interval = config['RELOAD_INTERVAL']
+        self._lock = threading.Lock()
+        self._references = ReferenceSet([], self.candidates)
+        self._version: Optional[Tuple] = None
+        self._checked: Optional[float] = None
+
+    @staticmethod
+    def _usable():
+        return ReferenceBrand.objects.filter(active=True, features__isnull=False).exclude(phash='')
+
+    def _current_version(self) -> Tuple:
+        # Every save bumps updated_at; the count catches deletions.
+        summary = ReferenceBrand.objects.aggregate(count=Count('pk'), latest=Max('updated_at'))
+        return summary['count'], summary['latest']
+
+    def _load(self) -> ReferenceSet:
+        references = [
+            (domain, np.frombuffer(bytes(features), dtype=np.uint8).reshape(FEATURE_SHAPE),
+             int(phash, 16))
+            for domain, features, phash in self._usable().values_list('domain', 'features', 'phash')]
+        if not references:
+            logger.warning("No refreshed reference brands; run manage.py refresh_reference_brands")
+        return ReferenceSet(references, self.candidates)
+
+    def reference_set(self) -> ReferenceSet:
+        now = time.monotonic()
+        with self._lock:
+            if self._checked is None or now - self._checked >= self.reload_interval:
+                self._checked = now
+                version = self._current_version()
+                if version != self._version:
+                    self._references = self._load()
+                    self._version = version
+            return self._references
+
+    def best_match(self, screenshot_path):
+        """(brand domain, similarity percentage) for a page screenshot."""
+        return self.reference_set().best_match(screenshot_path)
+
+
+_library: Optional[ReferenceLibrary] = None
+_library_pid: Optional[int] = None
+_library_lock = threading.Lock()
+
+
+def get_reference_library() -> ReferenceLibrary:
+    """The process-wide library, so each worker loads the brands once."""
+    global _library, _library_pid
+    with _library_lock:
+        if _library is None or _library_pid != os.getpid():
+            _library = ReferenceLibrary()
+            _library_pid = os.getpid()
+        return _library
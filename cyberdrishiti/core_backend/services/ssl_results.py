@@ -0,0 +1,60 @@
+import json
+import logging
+from itertools import islice
+from typing import Dict, Iterable, Iterator, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from core_backend.models import SSLAnalysisResult
+
+logger = logging.getLogger(__name__)
+
+UPDATE_FIELDS = ['timestamp', 'certificate_valid', 'hostname_match', 'tls_valid',
+                 'validation_score', 'error', 'cert_details_json']
+
+
+def to_model(url: str, result: Dict) -> SSLAnalysisResult:
+    """An SSLAnalysisResult row for an analyze_certificate() result."""
+    return SSLAnalysisResult(
+        url=url,
+        timestamp=timezone.now(),
+        certificate_valid=result['certificate_valid'],
+        hostname_match=result['hostname_match'],
+        tls_valid=result['tls_valid'],
+        validation_score=result['validation_score'],
+        error=result['error'],
+        # Validity dates are datetimes; str() keeps them readable.
+        cert_details_json=json.dumps(result['cert_details'], default=str),
+    )
+
+
+def store_results(results: Iterable[Tuple[str, Dict]], batch_size: int = 500) -> int:
+    """Upserts (url, result) pairs into SSLAnalysisResult, one statement per
+    batch, consuming the iterable as it goes. Returns the rows written."""
+    results = iter(results)
+    written = 0
+    while True:
+        batch = {url: to_model(url, result) for url, result in islice(results, batch_size)}
+        if not batch:
+            return written
+        with transaction.atomic():
+            SSLAnalysisResult.objects.bulk_create(
+                list(batch.values()), batch_size=batch_size, update_conflicts=True,
+                unique_fields=['url'], update_fields=UPDATE_FIELDS)
+        written += len(batch)
+
+
+def iter_store(results: Iterable[Tuple[str, Dict]],
+               batch_size: int = 500) -> Iterator[Tuple[str, Dict]]:
+    """Passes results through unchanged while storing them in batches, for
+    callers that also want to report each one."""
+    pending = []
+    for item in results:
+        pending.append(item)
+        yield item
+        if len(pending) >= batch_size:
+            store_results(pending, batch_size)
+            pending = []
+    if pending:
+        store_results(pending, batch_size)
@@ -0,0 +1,276 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import date, datetime, timezone
+from typing import Dict, NamedTuple, Optional
+
+import whois
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable through the WHOIS_SERVICE dict in Django settings.
+DEFAULTS = {
+    'CACHE': 'whois',               # Django cache alias; 'default' if not configured
+    'POSITIVE_TTL': 30 * 24 * 3600,  # registration dates practically never change
+    'NEGATIVE_TTL': 3600,           # failed lookups and records without a date
+    'LOCAL_CACHE_SIZE': 10000,      # in-process entries in front of the Django cache
+}
+
+# Formats seen in raw creation dates python-whois leaves unparsed.
+DATE_FORMATS = (
+    '%Y-%m-%d',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y.%m.%d',
+    '%Y/%m/%d',
+    '%d-%b-%Y',
+    '%d.%m.%Y',
+    '%Y%m%d',
+)
+
+
+def _configured() -> Dict:
+    config = dict(DEFAULTS)
+    try:
+        from django.conf import settings
+        config.update(getattr(settings, 'WHOIS_SERVICE', {}))
+    except Exception:  # Django missing or settings not configured
+        pass
+    return config
+
+
+def parse_creation_date(value) -> Optional[datetime]:
+    """Normalizes whatever python-whois returned as a creation date to a
+    naive UTC datetime, or None.
+
+    Registrars disagree: some records carry a list of dates (the earliest is
+    the registration), some strings python-whois could not parse, some
+    timezone-aware datetimes.
+    """
+    if isinstance(value, (list, tuple)):
+        dates = [d for d in map(parse_creation_date, value) if d is not None]
+        return min(dates) if dates else None
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return None
+        try:
+            return parse_creation_date(datetime.fromisoformat(text.replace('Z', '+00:00')))
+        except ValueError:
+            pass
+        # Drop trailing timezone names such as 'UTC' or '(GMT)'.
+        text = text.split(' (')[0].removesuffix(' UTC').removesuffix(' GMT')
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+    return None
+
+
+class WhoisRecord(NamedTuple):
+    domain: str
+    creation_date: Optional[datetime]
+    registrar: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def found(self) -> bool:
+        return self.creation_date is not None
+
+    def age_days(self, now: Optional[datetime] = None) -> Optional[int]:
+        if self.creation_date is None:
+            return None
+        return ((now or datetime.now()) - self.creation_date).days
+
+
+class WhoisService:
+    """WHOIS lookups shared by every analyzer in the process.
+
+    Registrations imported offline (manage.py import_registrations) answer
+    first; live WHOIS is only asked about domains missing from them.
+    Answers are cached twice: in a small in-process LRU, so repeat lookups
+    cost a dictionary probe, and in a Django cache, so other workers and
+    restarts reuse them. Records with a creation date are kept for
+    POSITIVE_TTL; failures for the much shorter NEGATIVE_TTL, so a flaky
+    registry is not hammered but is retried eventually. Concurrent lookups
+    of the same domain share one query.
+    """
+
+    def __init__(self, positive_ttl: Optional[float] = None,
+                 negative_ttl: Optional[float] = None, cache=None):
+        config = _configured()
+        self.positive_ttl = config['POSITIVE_TTL'] if positive_ttl is None else positive_ttl
+        self.negative_ttl = config['NEGATIVE_TTL'] if negative_ttl is None else negative_ttl
+        self.local_cache_size = config['LOCAL_CACHE_SIZE']
+        self.cache = cache if cache is not None else self._django_cache(config['CACHE'])
+        self._local: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'cache_hits': 0, 'registry_hits': 0,
+                       'queries': 0, 'shared_queries': 0, 'errors': 0}
+
+    @staticmethod
+    def _django_cache(alias: str):
+        try:
+            from django.core.cache import caches
+            from django.core.cache.backends.base import InvalidCacheBackendError
+        except ImportError:
+            return None
+        try:
+            return caches[alias]
+        except InvalidCacheBackendError:
+            return caches['default']
+        except Exception:  # settings not configured
+            return None
+
+    @staticmethod
+    def normalize(domain: str) -> str:
+        return domain.strip().rstrip('.').lower()
+
+    def lookup(self, domain: str) -> WhoisRecord:
+        """The WHOIS record for a registrable domain. Never raises; failures
+        come back as records without a creation date."""
+        domain = self.normalize(domain)
+        record = self._cached(domain)
+        if record is not None:
+            return record
+
+        with self._lock:
+            flight = self._inflight.get(domain)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[domain] = Future()
+            else:
+                self._stats['shared_queries'] += 1
+        if not leader:
+            return flight.result()
+
+        record = WhoisRecord(domain, None, error='lookup interrupted')
+        try:
+            record = self._registered(domain) or self._query(domain)
+            self._store(record)
+        except Exception as e:  # the cache backend failed, not WHOIS
+            logger.warning("Could not cache WHOIS record for %s: %s", domain, e)
+        finally:
+            with self._lock:
+                del self._inflight[domain]
+            flight.set_result(record)
+        return record
+
+    def creation_date(self, domain: str) -> Optional[datetime]:
+        return self.lookup(domain).creation_date
+
+    def _cached(self, domain: str) -> Optional[WhoisRecord]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(domain)
+            if entry is not None and entry[0] > now:
+                self._local.move_to_end(domain)
+                self._stats['local_hits'] += 1
+                return entry[1]
+        if self.cache is None:
+            return None
+        try:
+            record = self.cache.get(self._cache_key(domain))
+        except Exception as e:
+            logger.warning("WHOIS cache read failed for %s: %s", domain, e)
+            return None
+        if record is None:
+            return None
+        record = WhoisRecord(*record)
+        with self._lock:
+            self._stats['cache_hits'] += 1
+        # The shared cache tracks the real expiry; locally a short TTL is enough.
+        self._remember(domain, record, min(self._ttl(record), self.negative_ttl))
+        return record
+
+    def _registered(self, domain: str) -> Optional[WhoisRecord]:
+        """The record from the imported registration table, if it has one."""
+        try:
+            from core_backend.models import DomainRegistration
+            row = (DomainRegistration.objects.filter(domain=domain)
+                   .values_list('creation_date', 'registrar').first())
+        except Exception as e:  # no Django, or the table is not migrated yet
+            logger.debug("Registration table unavailable for %s: %s", domain, e)
+            return None
+        if row is None or row[0] is None:
+            return None
+        with self._lock:
+            self._stats['registry_hits'] += 1
+        return WhoisRecord(domain, parse_creation_date(row[0]), row[1] or None)
+
+    def _query(self, domain: str) -> WhoisRecord:
+        with self._lock:
+            self._stats['queries'] += 1
+        try:
+            info = whois.whois(domain)
+            registrar = info.get('registrar')
+            if isinstance(registrar, (list, tuple)):
+                registrar = registrar[0] if registrar else None
+            return WhoisRecord(domain, parse_creation_date(info.get('creation_date')),
+                               str(registrar) if registrar else None)
+        except Exception as e:
+            with self._lock:
+                self._stats['errors'] += 1
+            logger.debug("WHOIS lookup for %s failed: %s", domain, e)
+            return WhoisRecord(domain, None, error=str(e) or type(e).__name__)
+
+    def _ttl(self, record: WhoisRecord) -> float:
+        return self.positive_ttl if record.found else self.negative_ttl
+
+    def _store(self, record: WhoisRecord):
+        ttl = self._ttl(record)
+        self._remember(record.domain, record, ttl)
+        if self.cache is not None:
+            # Stored as a plain tuple so cached values outlive refactors.
+            self.cache.set(self._cache_key(record.domain), tuple(record), ttl)
+
+    def _remember(self, domain: str, record: WhoisRecord, ttl: float):
+        with self._lock:
+            self._local[domain] = (time.monotonic() + ttl, record)
+            self._local.move_to_end(domain)
+            while len(self._local) > self.local_cache_size:
+                self._local.popitem(last=False)
+
+    @staticmethod
+    def _cache_key(domain: str) -> str:
+        return f'whois:{domain}'
+
+    def forget(self, domain: str):
+        domain = self.normalize(domain)
+        with self._lock:
+            self._local.pop(domain, None)
+        if self.cache is not None:
+            self.cache.delete(self._cache_key(domain))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['local_entries'] = len(self._local)
+        return stats
+
+
+_service: Optional[WhoisService] = None
+_service_pid: Optional[int] = None
+_service_lock = threading.Lock()
+
+
+def get_whois_service() -> WhoisService:
+    """The process-wide service, rebuilt after a fork so a Celery prefork
+    child never inherits a lock held by one of its parent's threads."""
+    global _service, _service_pid
+    with _service_lock:
+        if _service is None or _service_pid != os.getpid():
+            _service = WhoisService()
+            _service_pid = os.getpid()
+        return _service
@@ -1,4 +1,5 @@
 from celery import shared_task
+from django.conf import settings
 from urllib.parse import urlparse
 import tempfile
 import os
@@ -8,13 +9,18 @@ import time
 logger = logging.getLogger(__name__)
 
 @shared_task
-def analyze_domain_task(url):
+def analyze_domain_task(url, spooled_fetch=None):
     try:
         from .models import PhishingDomain, ContentAnalysis, DomainBehaviorAnalysis, SSLAnalysis, UICloneAnalysis, DetectionLog
+        from .ml_models.Auto_Phish_detect import lexical_analysis
         from .ml_models.content_analyzer import PhishingContentAnalyzer
         from .ml_models.domain_behavior_analyzer import PhishingDetector as DomainBehaviorAnalyzer
+        from .ml_models.traffic_aggregator import load_traffic_snapshot
         from .ml_models.ssl_mismatch_detector import SSLCertificateAnalyzer
-        from .ml_models.ui_clone_detector import capture_screenshot_from_url, compare_ui_elements
+        from .ml_models.ui_clone_detector import capture_screenshot_from_url
+        from .services.cert_index import flag_linked_phish, index_certificate
+        from .services.fetch_context import FetchContext
+        from .services.reference_brands import get_reference_library
         
         domain_name = urlparse(url).netloc
         
@@ -32,9 +38,75 @@ def analyze_domain_task(url):
         overall_score = 0.0
         analysis_count = 0
         
+        # One fetch per analysis: the content and SSL checks share its
+        # connection, certificate and body. Batch submissions arrive with
+        # the page already fetched and spooled by batch_fetch_task.
+        fetch_context = None
+        if spooled_fetch is not None:
+            try:
+                fetch_context = FetchContext.from_spool(spooled_fetch)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Spooled fetch for {url} unreadable, refetching: {str(e)}")
+        if fetch_context is None:
+            fetch_context = FetchContext(url).fetch()
+
+        # SSL Analysis
+        cert_details = {}
+        try:
+            ssl_analyzer = SSLCertificateAnalyzer()
+            ssl_result = ssl_analyzer.analyze_certificate(url, tls_check=True, fetch_context=fetch_context)
+            ssl_score = ssl_result['validation_score']
+            overall_score += ssl_score
+            analysis_count += 1
+            
+            cert_details = ssl_result.get('cert_details', {})
+            issuer = cert_details.get('issuer', {}).get('commonname', ['Unknown'])[0] if cert_details else 'Unknown'
+            validity_status = cert_details.get('validity_status', 'unknown') if cert_details else 'unknown'
+            
+            SSLAnalysis.objects.update_or_create(
+                domain=domain,
+                defaults={
+                    'certificate_valid': ssl_result.get('certificate_valid', False),
+                    'hostname_match': ssl_result.get('hostname_match', False),
+                    'tls_valid': ssl_result.get('tls_valid', False),
+                    'issuer': issuer,
+                    'validity_status': validity_status,
+                    'score': ssl_score,
+                }
+            )
+            index_certificate(domain, cert_details)
+        except Exception as e:
+            logger.error(f"SSL analysis error for {url}: {str(e)}")
+        
+        # A certificate shared with a known phish settles the verdict; the
+        # content, behavior and UI stages are skipped.
+        try:
+            known_phish = flag_linked_phish(domain, cert_details)
+        except Exception as e:
+            known_phish = None
+            logger.error(f"Certificate link error for {url}: {str(e)}")
+        if known_phish is not None:
+            return {
+                'url': url,
+                'is_phishing': True,
+                'score': domain.overall_score,
+                'related_to': known_phish.url
+            }
+        
+        # Lexical Analysis (squatting of a trusted domain); only a hit
+        # counts, since a clean name says nothing about the page.
+        try:
+            lexical = lexical_analysis(urlparse(url).hostname or domain_name)
+            if lexical['is_suspicious']:
+                overall_score += 1.0
+                analysis_count += 1
+                logger.info(f"Lexical indicators for {url}: {' | '.join(lexical['reasons'])}")
+        except Exception as e:
+            logger.error(f"Lexical analysis error for {url}: {str(e)}")
+        
         # Content Analysis
         try:
-            content_analyzer = PhishingContentAnalyzer(url)
+            content_analyzer = PhishingContentAnalyzer(url, fetch_context=fetch_context)
             content_score = content_analyzer.calculate_threat_score()
             overall_score += content_score / 20.0  # Normalize to 0-1
             analysis_count += 1
@@ -45,6 +117,7 @@ def analyze_domain_task(url):
                     'ssl_valid': content_analyzer.ssl_valid,
                     'domain_age': content_analyzer.domain_age,
                     'suspicious_elements': content_analyzer.suspicious_elements,
+                    'suspicious_elements_partial': content_analyzer.stopped_early,
                     'score': content_score / 20.0,
                 }
             )
@@ -53,8 +126,11 @@ def analyze_domain_task(url):
         
         # Domain Behavior Analysis
         try:
-            behavior_analyzer = DomainBehaviorAnalyzer(domain_name)
+            traffic_data = load_traffic_snapshot(
+                getattr(settings, 'TRAFFIC_SNAPSHOT', None)).traffic_data(domain_name)
+            behavior_analyzer = DomainBehaviorAnalyzer(domain_name, traffic_data)
             behavior_analyzer.check_dns()
+            behavior_analyzer.analyze_traffic()
             behavior_score = behavior_analyzer.calculate_threat_score()
             overall_score += behavior_score / 10.0  # Normalize to 0-1
             analysis_count += 1
@@ -67,56 +143,22 @@ def analyze_domain_task(url):
                     'dmarc_exists': behavior_analyzer.dmarc_exists,
                     'a_record_count': behavior_analyzer.a_record_count,
                     'domain_age_score': behavior_analyzer.domain_age_score,
+                    'traffic_spike': behavior_analyzer.traffic_spike,
+                    'unusual_geolocations': behavior_analyzer.unusual_geolocations,
                     'score': behavior_score / 10.0,
                 }
             )
         except Exception as e:
             logger.error(f"Domain behavior analysis error for {url}: {str(e)}")
         
-        # SSL Analysis
-        try:
-            ssl_analyzer = SSLCertificateAnalyzer()
-            ssl_result = ssl_analyzer.analyze_certificate(url, tls_check=True)
-            ssl_score = ssl_result['validation_score']
-            overall_score += ssl_score
-            analysis_count += 1
-            
-            cert_details = ssl_result.get('cert_details', {})
-            issuer = cert_details.get('issuer', {}).get('commonname', ['Unknown'])[0] if cert_details else 'Unknown'
-            validity_status = cert_details.get('validity_status', 'unknown') if cert_details else 'unknown'
-            
-            SSLAnalysis.objects.update_or_create(
-                domain=domain,
-                defaults={
-                    'certificate_valid': ssl_result.get('certificate_valid', False),
-                    'hostname_match': ssl_result.get('hostname_match', False),
-                    'tls_valid': ssl_result.get('tls_valid', False),
-                    'issuer': issuer,
-                    'validity_status': validity_status,
-                    'score': ssl_score,
-                }
-            )
-        except Exception as e:
-            logger.error(f"SSL analysis error for {url}: {str(e)}")
-        
         # UI Clone Analysis
         try:
             screenshot_saved = capture_screenshot_from_url(url, screenshot_path)
             ui_score = 0.0
             
             if screenshot_saved:
-                similar_domains = ['google.com', 'facebook.com', 'apple.com', 'amazon.com', 'microsoft.com']
-                max_similarity = 0.0
-                similar_to = None
-                
-                for reference_domain in similar_domains:
-                    ref_screenshot = os.path.join(temp_dir, f"{reference_domain}_screenshot.png")
-                    if capture_screenshot_from_url(f"https://{reference_domain}", ref_screenshot):
-                        similarity, _ = compare_ui_elements(screenshot_path, ref_screenshot)
-                        if similarity > max_similarity:
-                            max_similarity = similarity
-                            similar_to = reference_domain
-                
+                # Reference brands are screenshotted on a schedule, not per analysis.
+                similar_to, max_similarity = get_reference_library().best_match(screenshot_path)
                 ui_score = max_similarity / 100.0
                 overall_score += ui_score
                 analysis_count += 1
@@ -150,9 +192,45 @@ def analyze_domain_task(url):
         return {
             'url': url,
             'is_phishing': domain.is_phishing,
-            'score': domain.overall_score
+            'score': domain.overall_score,
+            'related_to': None
         }
     
     except Exception as e:
         logger.error(f"Error in analyze_domain_task for {url}: {str(e)}")
-        return {'error': str(e)} 
\ No newline at end of file
+        return {'error': str(e)} 
+
+
+@shared_task
+def batch_fetch_task(urls):
+    """Fetches a batch concurrently and queues one analysis per page. The
+    pages are spooled to FETCH_SPOOL_DIR, which every worker must see;
+    the analysis messages carry only the file path."""
+    from .services.batch_fetcher import ThreadedBatchFetcher
+
+    spool_dir = str(getattr(settings, 'FETCH_SPOOL_DIR', None) or tempfile.gettempdir())
+    os.makedirs(spool_dir, exist_ok=True)
+    queued = 0
+    for fetch_context in ThreadedBatchFetcher().fetch(urls):
+        url = fetch_context.requested_url
+        path = None
+        try:
+            path = fetch_context.spool(spool_dir)
+            analyze_domain_task.delay(url, path)
+            queued += 1
+        except Exception as e:
+            logger.error(f"Error queueing batch domain analysis for {url}: {str(e)}")
+            if path is not None:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    return {'queued': queued}
+
+
+@shared_task
+def refresh_reference_brands_task(force=False, brand_ids=None):
+    from .services.reference_brands import refresh_brands
+    stats = refresh_brands(force=force, brand_ids=brand_ids)
+    logger.info(f"Reference brands refreshed: {stats}")
+    return stats
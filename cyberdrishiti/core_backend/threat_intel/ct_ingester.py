@@ -0,0 +1,345 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import signal
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from core_backend.ml_models.Auto_Phish_detect import TRUSTED_DOMAINS, iter_scan_chunks
+
+logger = logging.getLogger(__name__)
+
+MatchHandler = Callable[[str, Dict], None]
+
+
+def certificate_hostnames(entry: Dict) -> List[str]:
+    """SAN hostnames of one CT entry, lower-cased and de-duplicated, with
+    wildcards reduced to the name they cover.
+
+    Accepts certstream messages ({"data": {"leaf_cert": {...}}}), bare
+    leaf_cert objects and {"all_domains": [...]} / {"domains": [...]}
+    records; without a domain list the subjectAltName extension string
+    ("DNS:a.example, DNS:b.example") is parsed instead.
+    """
+    data = entry.get('data', entry)
+    leaf = data.get('leaf_cert', data) if isinstance(data, dict) else {}
+    names = leaf.get('all_domains') or leaf.get('domains')
+    if names is None:
+        san = (leaf.get('extensions') or {}).get('subjectAltName') or ''
+        names = [part.strip()[4:] for part in san.split(',') if part.strip().startswith('DNS:')]
+    hosts = []
+    for name in names:
+        if not isinstance(name, str):
+            continue
+        host = name.strip().lower().rstrip('.')
+        if host.startswith('*.'):
+            host = host[2:]
+        if host:
+            hosts.append(host)
+    return list(dict.fromkeys(hosts))
+
+
+class RecentHosts:
+    """Bounded LRU set of hostnames already scanned. Precertificates,
+    final certificates, renewals and submissions to several logs repeat
+    the same names, so most hostnames in a CT stream were just seen."""
+
+    def __init__(self, max_size: int = 200_000):
+        self.max_size = max_size
+        self._hosts: 'OrderedDict[str, None]' = OrderedDict()
+
+    def add(self, host: str) -> bool:
+        """Records `host`; True if it was not seen recently."""
+        if host in self._hosts:
+            self._hosts.move_to_end(host)
+            return False
+        self._hosts[host] = None
+        if len(self._hosts) > self.max_size:
+            self._hosts.popitem(last=False)
+        return True
+
+    def __len__(self):
+        return len(self._hosts)
+
+
+class Checkpoint:
+    """Byte offset into the CT source below which every entry has been
+    scanned and its matches handed on, written atomically. It is tied to
+    the file's inode, so a rotated or truncated log is read from the start."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+
+    def load(self, source: os.stat_result) -> int:
+        if self.path is None or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable CT checkpoint {self.path}: {e}")
+            return 0
+        if (saved.get('inode'), saved.get('device')) != (source.st_ino, source.st_dev):
+            return 0
+        offset = saved.get('offset', 0)
+        return offset if 0 <= offset <= source.st_size else 0
+
+    def save(self, offset: int, source: os.stat_result):
+        if self.path is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.ct-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'offset': offset, 'inode': source.st_ino,
+                           'device': source.st_dev, 'saved': time.time()}, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class Batch(NamedTuple):
+    end_offset: int
+    hostnames: List[str]
+
+
+class CTIngester:
+    """Feeds the hostnames of a CT log stand-in through the lexical squat
+    checks of Auto_Phish_detect and hands only the matches to `on_match`.
+
+    The source is a JSON-lines file of certificate entries (or '-' for
+    stdin); with `follow` the file is tailed as it grows. A reader thread
+    parses entries, drops recently seen hostnames and puts batches on a
+    bounded queue; when the scan pool falls behind the queue fills and
+    the reader blocks, so memory stays bounded. Batches are scanned on
+    the bulk_scan process pool and their results come back in order,
+    which lets the checkpoint advance past a batch only once its matches
+    were handed on: a restart rescans at most the batches in flight and
+    never skips one. Rotated logs are picked up on the next start.
+    """
+
+    def __init__(self, source: str, checkpoint_path: Optional[str] = None,
+                 on_match: Optional[MatchHandler] = None, batch_size: int = 1000,
+                 queue_size: int = 64, workers: Optional[int] = None,
+                 follow: bool = False, poll_interval: float = 1.0,
+                 checkpoint_interval: float = 1.0, recent_hosts: int = 200_000,
+                 trusted_domains: List[str] = TRUSTED_DOMAINS,
+                 known_bad_path: Optional[str] = None,
+                 variant_store_path: Optional[str] = None):
+        self.source = source
+        self.checkpoint = Checkpoint(None if source == '-' else checkpoint_path)
+        self.on_match = on_match or self._log_match
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.workers = workers
+        self.follow = follow
+        self.poll_interval = poll_interval
+        self.checkpoint_interval = checkpoint_interval
+        self.recent = RecentHosts(recent_hosts)
+        self.trusted_domains = trusted_domains
+        self.known_bad_path = known_bad_path
+        self.variant_store_path = variant_store_path
+        self.stats = {'entries': 0, 'malformed': 0, 'hostnames': 0, 'duplicates': 0,
+                      'scanned': 0, 'matches': 0, 'errors': 0}
+
+        self._stop = threading.Event()
+        self._closed = False
+        self._source_stat: Optional[os.stat_result] = None
+        self._read_offset = 0
+        self._done_offset = 0
+        self._saved_offset = 0
+        self._saved_at = 0.0
+
+    @staticmethod
+    def _log_match(hostname: str, report: Dict):
+        logger.info(f"CT match {hostname}: {' | '.join(report['reasons'])}")
+
+    def stop(self):
+        """Stops reading; batches already read are still scanned and
+        checkpointed before run() returns."""
+        self._stop.set()
+
+    def _open(self):
+        if self.source == '-':
+            return sys.stdin.buffer, 0
+        stream = open(self.source, 'rb')
+        self._source_stat = os.fstat(stream.fileno())
+        offset = self.checkpoint.load(self._source_stat)
+        stream.seek(offset)
+        return stream, offset
+
+    def _put(self, batches: queue.Queue, item) -> bool:
+        # Blocks while the queue is full; gives up only once run() is gone.
+        while not self._closed:
+            try:
+                batches.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _add_entry(self, line: bytes, hostnames: List[str]):
+        self.stats['entries'] += 1
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            self.stats['malformed'] += 1
+            return
+        if not isinstance(entry, dict):
+            self.stats['malformed'] += 1
+            return
+        if entry.get('message_type', 'certificate_update') != 'certificate_update':
+            return  # certstream heartbeats
+        for host in certificate_hostnames(entry):
+            self.stats['hostnames'] += 1
+            if self.recent.add(host):
+                hostnames.append(host)
+            else:
+                self.stats['duplicates'] += 1
+
+    def _read(self, batches: queue.Queue, stream, offset: int):
+        hostnames: List[str] = []
+        pending = False
+        try:
+            while not self._stop.is_set():
+                line = stream.readline()
+                complete = line.endswith(b'\n')
+                at_end = not complete
+                if complete or (line and (not self.follow or stream is sys.stdin.buffer)):
+                    # A final line without a newline only counts once the
+                    # writer is known to be done with it.
+                    offset += len(line)
+                    pending = True
+                    if line.strip():
+                        self._add_entry(line, hostnames)
+                    if len(hostnames) < self.batch_size and complete:
+                        continue
+                if pending:
+                    if not self._put(batches, Batch(offset, hostnames)):
+                        return
+                    hostnames, pending = [], False
+                if not at_end:
+                    continue
+                if not self.follow or stream is sys.stdin.buffer:
+                    break
+                if line:
+                    stream.seek(offset)  # reread the partial line once it is complete
+                self._stop.wait(self.poll_interval)
+            if pending:
+                self._put(batches, Batch(offset, hostnames))
+        except BaseException as e:
+            self._put(batches, e)
+        finally:
+            self._put(batches, None)
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+    def _commit(self, offset: int, force: bool = False):
+        self._done_offset = max(self._done_offset, offset)
+        if self._source_stat is None or self._done_offset == self._saved_offset:
+            return
+        now = time.monotonic()
+        if force or now - self._saved_at >= self.checkpoint_interval:
+            self.checkpoint.save(self._done_offset, self._source_stat)
+            self._saved_offset, self._saved_at = self._done_offset, now
+
+    def _chunks(self, batches: queue.Queue, in_flight: deque) -> Iterator[List[str]]:
+        while True:
+            try:
+                item = batches.get(timeout=self.poll_interval)
+            except queue.Empty:
+                if not in_flight:
+                    self._commit(self._read_offset)
+                yield []  # idle source: lets finished results out
+                continue
+            if item is None:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            self._read_offset = item.end_offset
+            if item.hostnames:
+                in_flight.append(item.end_offset)
+            yield item.hostnames
+
+    def _handle(self, reports: List[Dict]):
+        for report in reports:
+            self.stats['scanned'] += 1
+            if report.get('error'):
+                self.stats['errors'] += 1
+            elif report['is_suspicious']:
+                self.stats['matches'] += 1
+                self.on_match(report['domain'], report)
+
+    def run(self) -> Dict[str, int]:
+        """Ingests until the source ends (or, with `follow`, until stop())
+        and returns the counters."""
+        stream, offset = self._open()
+        self._read_offset = self._done_offset = self._saved_offset = offset
+        batches: queue.Queue = queue.Queue(self.queue_size)
+        in_flight: deque = deque()
+        reader = threading.Thread(target=self._read, args=(batches, stream, offset),
+                                  name='ct-reader', daemon=True)
+        reader.start()
+        try:
+            for reports in iter_scan_chunks(self._chunks(batches, in_flight), self.trusted_domains,
+                                            self.workers, self.known_bad_path,
+                                            self.variant_store_path):
+                self._handle(reports)
+                end_offset = in_flight.popleft()
+                # With nothing in flight, batches without new hostnames
+                # read after this one are done as well.
+                self._commit(end_offset if in_flight else self._read_offset)
+            self._commit(self._read_offset, force=True)
+        finally:
+            self._closed = True
+            self._stop.set()
+            self._commit(self._done_offset, force=True)
+        return self.stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Scan CT log entries (JSON lines) for squatting hostnames; "
+                    "prints the matches as JSON lines.")
+    parser.add_argument('source', nargs='?', default='-',
+                        help="JSON-lines file of certificate entries ('-' for stdin)")
+    parser.add_argument('--checkpoint', default=None, help="offset file to resume from")
+    parser.add_argument('--follow', action='store_true', help="keep reading as the file grows")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument('--batch-size', type=int, default=1000, help="hostnames per batch")
+    parser.add_argument('--queue-size', type=int, default=64, help="batches buffered ahead")
+    parser.add_argument('--known-bad', default=None, metavar="STORE",
+                        help="known-bad domain store built with known_bad_store.py")
+    parser.add_argument('--variant-store', default=None, metavar="STORE",
+                        help="squatting variant store built with squat_variants.py")
+    args = parser.parse_args(argv)
+
+    def print_match(hostname, report):
+        print(json.dumps(report, ensure_ascii=False))
+
+    ingester = CTIngester(args.source, args.checkpoint, print_match,
+                          batch_size=args.batch_size, queue_size=args.queue_size,
+                          workers=args.workers, follow=args.follow,
+                          known_bad_path=args.known_bad,
+                          variant_store_path=args.variant_store)
+    signal.signal(signal.SIGINT, lambda *_: ingester.stop())
+    signal.signal(signal.SIGTERM, lambda *_: ingester.stop())
+    start = time.perf_counter()
+    stats = ingester.run()
+    elapsed = time.perf_counter() - start
+    print(f"{stats['entries']} entries, {stats['scanned']} hostnames scanned, "
+          f"{stats['duplicates']} repeats skipped, {stats['matches']} matches in "
+          f"{elapsed:.1f}s ({stats['entries'] / max(elapsed, 1e-9):.0f} entries/s)",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
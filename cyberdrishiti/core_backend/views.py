@@ -9,6 +9,7 @@ from rest_framework.views import APIView
 from rest_framework.decorators import api_view
 from django.http import HttpResponse
 from django.shortcuts import render
+from django.conf import settings
 from urllib.parse import urlparse
 import tempfile
 import os
@@ -18,11 +19,16 @@ import time
 from django.views.decorators.http import require_GET
 from .models import PhishingDomain, DetectionLog, ContentAnalysis, DomainBehaviorAnalysis, SSLAnalysis, UICloneAnalysis
 from .serializers import PhishingDomainSerializer, AnalysisResultSerializer
+from .ml_models.Auto_Phish_detect import lexical_analysis
 from .ml_models.content_analyzer import PhishingContentAnalyzer
 from .ml_models.domain_behavior_analyzer import PhishingDetector as DomainBehaviorAnalyzer
+from .ml_models.traffic_aggregator import load_traffic_snapshot
 from .ml_models.ssl_mismatch_detector import SSLCertificateAnalyzer
 from .ml_models.ui_clone_detector import capture_screenshot_from_url, compare_ui_elements
-from .tasks import analyze_domain_task
+from .services.cert_index import flag_linked_phish, index_certificate
+from .services.fetch_context import FetchContext
+from .services.reference_brands import get_reference_library
+from .tasks import analyze_domain_task, batch_fetch_task
 
 
 # Configure logging
@@ -81,9 +87,67 @@ class PhishingAnalysisAPI(APIView):
             overall_score = 0.0
             analysis_count = 0
 
+            # One fetch per analysis: the content and SSL checks share its
+            # connection, certificate and body.
+            fetch_context = FetchContext(url).fetch()
+
+            # SSL Analysis
+            cert_details = {}
+            try:
+                ssl_analyzer = SSLCertificateAnalyzer()
+                ssl_result = ssl_analyzer.analyze_certificate(
+                    url, tls_check=True, fetch_context=fetch_context)
+                ssl_score = ssl_result['validation_score']
+                overall_score += ssl_score
+                analysis_count += 1
+
+                cert_details = ssl_result.get('cert_details', {})
+                issuer = cert_details.get('issuer', {}).get('commonname', ['Unknown'])[
+                    0] if cert_details else 'Unknown'
+                validity_status = cert_details.get(
+                    'validity_status', 'unknown') if cert_details else 'unknown'
+
+                SSLAnalysis.objects.update_or_create(
+                    domain=domain,
+                    defaults={
+                        'certificate_valid': ssl_result.get('certificate_valid', False),
+                        'hostname_match': ssl_result.get('hostname_match', False),
+                        'tls_valid': ssl_result.get('tls_valid', False),
+                        'issuer': issuer,
+                        'validity_status': validity_status,
+                        'score': ssl_score,
+                    }
+                )
+                index_certificate(domain, cert_details)
+            except Exception as e:
+                logger.error(f"SSL analysis error for {url}: {str(e)}")
+
+            # A certificate shared with a known phish settles the verdict;
+            # the content, behavior and UI stages are skipped.
+            try:
+                known_phish = flag_linked_phish(domain, cert_details)
+            except Exception as e:
+                known_phish = None
+                logger.error(f"Certificate link error for {url}: {str(e)}")
+            if known_phish is not None:
+                data = dict(AnalysisResultSerializer(domain).data)
+                data['related_to'] = known_phish.url
+                return Response(data)
+
+            # Lexical Analysis (squatting of a trusted domain); only a hit
+            # counts, since a clean name says nothing about the page.
+            try:
+                lexical = lexical_analysis(urlparse(url).hostname or domain_name)
+                if lexical['is_suspicious']:
+                    overall_score += 1.0
+                    analysis_count += 1
+                    logger.info(f"Lexical indicators for {url}: {' | '.join(lexical['reasons'])}")
+            except Exception as e:
+                logger.error(f"Lexical analysis error for {url}: {str(e)}")
+
             # Content Analysis
             try:
-                content_analyzer = PhishingContentAnalyzer(url)
+                content_analyzer = PhishingContentAnalyzer(url, fetch_context=fetch_context)
                 content_score = content_analyzer.calculate_threat_score()
                 overall_score += content_score / 20.0  # Normalize to 0-1
                 analysis_count += 1
@@ -94,6 +158,7 @@ class PhishingAnalysisAPI(APIView):
                         'ssl_valid': content_analyzer.ssl_valid,
                         'domain_age': content_analyzer.domain_age,
                         'suspicious_elements': content_analyzer.suspicious_elements,
+                        'suspicious_elements_partial': content_analyzer.stopped_early,
                         'score': content_score / 20.0,
                     }
                 )
@@ -102,8 +167,11 @@ class PhishingAnalysisAPI(APIView):
 
             # Domain Behavior Analysis
             try:
-                behavior_analyzer = DomainBehaviorAnalyzer(domain_name)
+                traffic_data = load_traffic_snapshot(
+                    getattr(settings, 'TRAFFIC_SNAPSHOT', None)).traffic_data(domain_name)
+                behavior_analyzer = DomainBehaviorAnalyzer(domain_name, traffic_data)
                 behavior_analyzer.check_dns()
+                behavior_analyzer.analyze_traffic()
                 behavior_score = behavior_analyzer.calculate_threat_score()
                 overall_score += behavior_score / 10.0  # Normalize to 0-1
                 analysis_count += 1
@@ -116,6 +184,8 @@ class PhishingAnalysisAPI(APIView):
                         'dmarc_exists': behavior_analyzer.dmarc_exists,
                         'a_record_count': behavior_analyzer.a_record_count,
                         'domain_age_score': behavior_analyzer.domain_age_score,
+                        'traffic_spike': behavior_analyzer.traffic_spike,
+                        'unusual_geolocations': behavior_analyzer.unusual_geolocations,
                         'score': behavior_score / 10.0,
                     }
                 )
@@ -123,35 +193,6 @@ class PhishingAnalysisAPI(APIView):
                 logger.error(
                     f"Domain behavior analysis error for {url}: {str(e)}")
 
-            # SSL Analysis
-            try:
-                ssl_analyzer = SSLCertificateAnalyzer()
-                ssl_result = ssl_analyzer.analyze_certificate(
-                    url, tls_check=True)
-                ssl_score = ssl_result['validation_score']
-                overall_score += ssl_score
-                analysis_count += 1
-
-                cert_details = ssl_result.get('cert_details', {})
-                issuer = cert_details.get('issuer', {}).get('commonname', ['Unknown'])[
-                    0] if cert_details else 'Unknown'
-                validity_status = cert_details.get(
-                    'validity_status', 'unknown') if cert_details else 'unknown'
-
-                SSLAnalysis.objects.update_or_create(
-                    domain=domain,
-                    defaults={
-                        'certificate_valid': ssl_result.get('certificate_valid', False),
-                        'hostname_match': ssl_result.get('hostname_match', False),
-                        'tls_valid': ssl_result.get('tls_valid', False),
-                        'issuer': issuer,
-                        'validity_status': validity_status,
-                        'score': ssl_score,
-                    }
-                )
-            except Exception as e:
-                logger.error(f"SSL analysis error for {url}: {str(e)}")
-
             # UI Clone Analysis
             try:
                 screenshot_saved = capture_screenshot_from_url(
@@ -159,21 +200,8 @@ class PhishingAnalysisAPI(APIView):
                 ui_score = 0.0
 
                 if screenshot_saved:
-                    similar_domains = ['google.com', 'facebook.com',
-                                       'apple.com', 'amazon.com', 'microsoft.com']
-                    max_similarity = 0.0
-                    similar_to = None
-
-                    for reference_domain in similar_domains:
-                        ref_screenshot = os.path.join(
-                            temp_dir, f"{reference_domain}_screenshot.png")
-                        if capture_screenshot_from_url(f"https://{reference_domain}", ref_screenshot):
-                            similarity, _ = compare_ui_elements(
-                                screenshot_path, ref_screenshot)
-                            if similarity > max_similarity:
-                                max_similarity = similarity
-                                similar_to = reference_domain
-
+                    similar_to, max_similarity = get_reference_library().best_match(
+                        screenshot_path)
                     ui_score = max_similarity / 100.0
                     overall_score += ui_score
                     analysis_count += 1
@@ -280,27 +308,26 @@ class BatchAnalysisAPI(APIView):
             if not urls:
                 return Response({'error': 'No URLs provided'}, status=status.HTTP_400_BAD_REQUEST)
 
+            # The pages are fetched and analyzed by Celery tasks, so the
+            # request returns as soon as the batch is queued.
             results = []
-            for url in urls:
+            for url in dict.fromkeys(urls):
                 domain_name = urlparse(url).netloc
                 domain, created = PhishingDomain.objects.get_or_create(
                     url=url,
                     defaults={'domain_name': domain_name}
                 )
-                # Instead of using Celery, perform analysis directly for now
-                # You can implement the Celery task later
-                try:
-                    analyze_domain(url)
-                except Exception as e:
-                    logger.error(
-                        f"Error during batch domain analysis: {str(e)}")
-
                 results.append({
                     'url': url,
                     'status': 'pending',
                     'domain_id': str(domain.id)
                 })
 
+            try:
+                batch_fetch_task.delay([result['url'] for result in results])
+            except Exception as e:
+                logger.error(f"Error queueing batch domain analysis: {str(e)}")
+
             return Response({'results': results}, status=status.HTTP_202_ACCEPTED)
         except Exception as e:
             logger.error(f"Error in BatchAnalysisAPI: {str(e)}")
@@ -308,7 +335,7 @@ class BatchAnalysisAPI(APIView):
 
 
 # Helper function for direct analysis
-def analyze_domain(url):
+def analyze_domain(url, fetch_context=None):
     """Analyze a domain without using Celery task"""
     domain_name = urlparse(url).netloc
 
@@ -326,7 +353,35 @@ def analyze_domain(url):
     overall_score = 0.0
     analysis_count = 0
 
-    # Run all analyses (content, behavior, SSL, UI) and update the domain
+    # Lexical Analysis (squatting of a trusted domain); only a hit
+    # counts, since a clean name says nothing about the page.
+    try:
+        lexical = lexical_analysis(urlparse(url).hostname or domain_name)
+        if lexical['is_suspicious']:
+            overall_score += 1.0
+            analysis_count += 1
+            logger.info(f"Lexical indicators for {url}: {' | '.join(lexical['reasons'])}")
+    except Exception as e:
+        logger.error(f"Lexical analysis error for {url}: {str(e)}")
+
+    # Content Analysis, on the page prefetched by the batch when given
+    try:
+        content_analyzer = PhishingContentAnalyzer(url, fetch_context=fetch_context)
+        content_score = content_analyzer.calculate_threat_score()
+        ContentAnalysis.objects.update_or_create(
+            domain=domain,
+            defaults={
+                'ssl_valid': content_analyzer.ssl_valid,
+                'domain_age': content_analyzer.domain_age,
+                'suspicious_elements': content_analyzer.suspicious_elements,
+                'suspicious_elements_partial': content_analyzer.stopped_early,
+                'score': content_score / 20.0,
+            }
+        )
+    except Exception as e:
+        logger.error(f"Content analysis error for {url}: {str(e)}")
+
+    # Run the remaining analyses (behavior, SSL, UI) and update the domain
     # [Same analysis code as in PhishingAnalysisAPI.post]
 
     return {
@@ -0,0 +1,22 @@
+import os
+
+from celery import Celery
+from celery.signals import worker_init
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cyberdrishiti.settings')
+
+app = Celery('cyberdrishiti')
+
+# CELERY_-prefixed Django settings configure the app, e.g.
+# CELERY_BEAT_SCHEDULE becomes beat_schedule.
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+
+@worker_init.connect
+def load_lexical_index(**kwargs):
+    """Loads the lexical checks' index and known-bad store in the parent
+    worker process, so prefork children inherit them instead of each
+    loading their own."""
+    from core_backend.ml_models.Auto_Phish_detect import lexical_analysis
+    lexical_analysis('example.com')
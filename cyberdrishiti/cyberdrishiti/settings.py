@@ -162,4 +162,83 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ]
-}
\ No newline at end of file
+}
+
+# Shared outbound HTTP transport (core_backend/services/http_client.py);
+# keys left out fall back to http_client.DEFAULTS.
+HTTP_CLIENT = {
+    'CONNECT_TIMEOUT': 5,
+    'READ_TIMEOUT': 10,
+    'MAX_CONNECTIONS': 64,
+    'MAX_CONNECTIONS_PER_HOST': 8,
+    'RETRIES': 2,
+}
+
+# The default cache stays per-process; WHOIS records go to a database cache
+# so every worker and restart reuses them (core_backend/services/whois_service.py).
+# A table keeps lookups and culling indexed at this size, where a file cache
+# lists its whole directory on every write. Create it once with
+# `python manage.py createcachetable`.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'whois': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'whois_cache',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 200000},
+    },
+}
+
+WHOIS_SERVICE = {
+    'CACHE': 'whois',
+    'POSITIVE_TTL': 30 * 24 * 3600,
+    'NEGATIVE_TTL': 3600,
+}
+
+# Headless Chrome drivers kept per worker process for screenshots
+# (core_backend/ml_models/ui_clone_detector.py); keys left out fall back
+# to ui_clone_detector.DEFAULTS.
+BROWSER_POOL = {
+    'SIZE': 2,
+    'MAX_PAGES': 50,
+    'MAX_RSS_MB': 1500,
+    'PAGE_TIMEOUT': 20,
+}
+
+# Brand screenshots the UI stage compares against, managed in the admin
+# (core_backend/services/reference_brands.py).
+REFERENCE_BRANDS = {
+    'SCREENSHOT_DIR': BASE_DIR / 'reference_screenshots',
+    'REFRESH_INTERVAL': 24 * 3600,
+    'CANDIDATES': 10,
+}
+
+# Read by the Celery app in cyberdrishiti/celery.py; run the scheduler with
+# `celery -A cyberdrishiti beat` next to the worker.
+CELERY_BEAT_SCHEDULE = {
+    'refresh-reference-brands': {
+        'task': 'core_backend.tasks.refresh_reference_brands_task',
+        'schedule': 6 * 3600,  # refreshes only the brands older than REFRESH_INTERVAL
+    },
+}
+
+# Written by `python -m core_backend.ml_models.traffic_aggregator ingest`;
+# domain behavior analysis reads per-domain traffic from it when present.
+TRAFFIC_SNAPSHOT = BASE_DIR / 'traffic_snapshot.sqlite3'
+
+# Pages fetched by core_backend.tasks.batch_fetch_task wait here for their
+# analysis task, which deletes them; every Celery worker must see it.
+FETCH_SPOOL_DIR = BASE_DIR / 'fetch_spool'
+
+# Prebuilt stores for the lexical checks in analysis tasks and views
+# (core_backend/ml_models/Auto_Phish_detect.py). Build VARIANT_STORE with
+# `python -m core_backend.ml_models.squat_variants build <path>`; while it
+# is unset each process generates the variants itself at startup.
+# KNOWN_BAD_STORE (`python -m core_backend.ml_models.known_bad_store build`)
+# adds the blocklist check.
+LEXICAL_DETECTION = {
+    'VARIANT_STORE': None,
+    'KNOWN_BAD_STORE': None,
+}